@@ -1,18 +1,141 @@
+import functools
 import subprocess
+import sys
+import threading
+import time
+import types
 
 
 ENCODING: str = "utf-8"
 
+# classes and helpers are imported on first attribute access, so a script which uses only one helper
+# does not pay for importing every module. e.g. 'from linux_cmdproxier import Service'
+_LAZY_ATTRIBUTES: dict = {
+    "enable_session_pool": ".session",
+    "disable_session_pool": ".session",
+    "get_session_pool": ".session",
+    "get_runner": ".session",
+    "enable_privileged_session": ".session",
+    "disable_privileged_session": ".session",
+    "get_privileged_session": ".session",
+    "cached": ".cache",
+    "get_cache": ".cache",
+    "invalidate_cache": ".cache",
+    "set_cache_enabled": ".cache",
+    "set_cache_ttl": ".cache",
+    "record_command": ".metrics",
+    "get_metrics": ".metrics",
+    "reset_metrics": ".metrics",
+    "set_metrics_enabled": ".metrics",
+    "write_prometheus_textfile": ".metrics",
+    "configure_logging": ".log",
+    "get_logger": ".log",
+    "CommandTimeout": ".deadline",
+    "deadline": ".deadline",
+    "effective_timeout": ".deadline",
+    "kill_process_group": ".deadline",
+    "make_timeout": ".deadline",
+    "run_with_timeout": ".deadline",
+    "LocalTransport": ".transport",
+    "SSHTransport": ".transport",
+    "get_transport": ".transport",
+    "set_default_transport": ".transport",
+    "use_transport": ".transport",
+    "ssh_transport": ".transport",
+    "close_transports": ".transport",
+    "SystemdBus": ".systemd_bus",
+    "enable_dbus_backend": ".systemd_bus",
+    "disable_dbus_backend": ".systemd_bus",
+    "get_dbus_backend": ".systemd_bus",
+    "Account": ".account",
+    "FileSystem": ".file",
+    "Firewall": ".firewall",
+    "ProcessMonitor": ".ps",
+    "ProcessSnapshot": ".proc",
+    "Service": ".service",
+    "ServiceSnapshot": ".service",
+    "Dnf": ".centos.dnf",
+    "NetworkManager": ".centos.nmcli",
+    "Rpm": ".centos.rpm",
+    "Apt": ".ubuntu.apt",
+    "Dpkg": ".ubuntu.dpkg",
+    "execute_command_run_async": ".aio",
+    "FanOutExecutor": ".fanout",
+    "HostResult": ".fanout",
+    "fan_out": ".fanout",
+    "ArchiveProgress": ".archive",
+    "FileIndex": ".index",
+    "Walker": ".walk",
+}
+
+
+def __getattr__(name: str):
+
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], package=__name__), name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
+
+
+class _Package(types.ModuleType):
+
+    def __setattr__(self, name: str, value) -> None:
+
+        # importing the submodule 'deadline' binds it over the helper deadline() of the same name.
+        if name == "deadline" and isinstance(value, types.ModuleType):
+            value = value.deadline
+
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+def build_command(command_str: str, shell: bool = False, sudo_password: str = None) -> tuple:
+
+    """
+    build the argument for subprocess from command string.
+    with sudo_password, the command is wrapped with 'sudo -S' and executed with shell.
+    the result is passed to the transport of the current thread, e.g. it is wrapped with 'ssh' by SSHTransport.
+
+    :param command_str: os command you want to execute.
+    :param shell: set the 'shell' options for subprocess.
+    :param sudo_password: if you want to execute command with sudo, set the sudo password.
+    :return: tuple of (command string or list of arguments, shell)
+    """
+
+    from .transport import get_transport
+
+    if sudo_password is not None:
+        shell: bool = True
+        command_str = f"echo {sudo_password} | sudo -S {command_str}"
+
+    if not shell:
+        command_str = command_str.split(" ")
+
+    return get_transport().wrap(command_str, shell)
+
 
 def execute_command_run(command_str: str,
                         stdout: int = subprocess.PIPE,
                         stderr: int = subprocess.PIPE,
                         shell: bool = False,
-                        sudo_password: str = None
+                        sudo_password: str = None,
+                        timeout: float = None
                         ) -> subprocess.CompletedProcess:
 
     """
     execute os command and return subprocess.CompletedProcess.
+    if timeout or the deadline of 'with deadline(seconds)' expires, the whole process group is killed
+    and CommandTimeout is returned.
 
     :param command_str: os command you want to execute.
     :param stdout:  set where the result will be stored. default is subprocess.PIPE.
@@ -21,15 +144,65 @@ def execute_command_run(command_str: str,
                     if you want to print the result on the screen, set the value None
     :param shell:   set the 'shell' options for subprocess.run()
     :param sudo_password: if you want to execute command with sudo, set the sudo password.
-    :return: executed result with subprocess.CompletedProcess
+    :param timeout: seconds until the command is killed. default is no limit except the current deadline.
+    :return: executed result with subprocess.CompletedProcess, or CommandTimeout.
     """
 
-    if sudo_password is not None:
-        shell: bool = True
-        command_str = f"echo {sudo_password} | sudo -S {command_str}"
+    from .deadline import effective_timeout
+    from .metrics import record_command
+
+    started: float = time.perf_counter()
+    cp = _dispatch_command_run(command_str=command_str,
+                               stdout=stdout,
+                               stderr=stderr,
+                               shell=shell,
+                               sudo_password=sudo_password,
+                               timeout=effective_timeout(timeout))
+
+    record_command(kind="run",
+                   elapsed=time.perf_counter() - started,
+                   returncode=cp.returncode,
+                   stdout=cp.stdout,
+                   stderr=cp.stderr,
+                   sudo=sudo_password is not None,
+                   shell=shell or sudo_password is not None)
+    return cp
+
+
+def _dispatch_command_run(command_str: str,
+                          stdout: int,
+                          stderr: int,
+                          shell: bool,
+                          sudo_password: str | None,
+                          timeout: float | None
+                          ) -> subprocess.CompletedProcess:
 
-    if not shell:
-        command_str = command_str.split(" ")
+    """
+    choose where the command of execute_command_run() is executed.
+    """
+
+    from .deadline import make_timeout, run_with_timeout
+    from .session import get_privileged_session, get_runner
+    from .transport import get_transport
+
+    if timeout is not None and timeout <= 0:
+        return make_timeout(args=command_str, timeout=0.0)
+
+    # privileged session: the command is executed by the shell of the root worker on this host.
+    privileged = get_privileged_session(sudo_password=sudo_password)
+    if privileged is not None and stdout == subprocess.PIPE and stderr == subprocess.PIPE \
+            and not get_transport().remote:
+        return privileged.run(command_str=command_str, timeout=timeout)
+
+    command_str, shell = build_command(command_str=command_str, shell=shell, sudo_password=sudo_password)
+
+    # session mode or awaitable twins: run on the bound runner when the result is captured.
+    runner = get_runner()
+    if runner is not None and stdout == subprocess.PIPE and stderr == subprocess.PIPE:
+        return runner(command_str, timeout)
+
+    if timeout is not None:
+        return run_with_timeout(args=command_str, stdout=stdout, stderr=stderr, shell=shell, timeout=timeout)
 
     return subprocess.run(args=command_str, stdout=stdout, stderr=stderr, shell=shell)
 
@@ -38,7 +211,9 @@ def execute_command_popen(command_str: str,
                           stdout: int = subprocess.PIPE,
                           stderr: int = subprocess.PIPE,
                           shell: bool = False,
-                          sudo_password: str = None
+                          sudo_password: str = None,
+                          new_session: bool = False,
+                          stdin: int = None
                           ) -> subprocess.Popen:
 
     """
@@ -52,17 +227,131 @@ def execute_command_popen(command_str: str,
                     if you want to print the result on the screen, set the value None
     :param shell:   set the 'shell' options for subprocess.Popen()
     :param sudo_password: if you want to execute command with sudo, set the sudo password.
+    :param new_session: start the command in a new process group, so the whole group can be killed at once.
+    :param stdin: set where the input comes from, e.g. subprocess.PIPE. default is the stdin of this process.
     :return: executed result with subprocess.Popen
     """
 
-    if sudo_password is not None:
-        shell: bool = True
-        command_str = f"echo {sudo_password} | sudo -S {command_str}"
+    from .metrics import record_command
 
-    if not shell:
-        command_str = command_str.split(" ")
+    started: float = time.perf_counter()
+    command_str, shell = build_command(command_str=command_str, shell=shell, sudo_password=sudo_password)
+
+    process = subprocess.Popen(args=command_str, stdin=stdin, stdout=stdout, stderr=stderr, shell=shell,
+                               start_new_session=new_session)
+
+    record_command(kind="popen", elapsed=time.perf_counter() - started, sudo=sudo_password is not None, shell=shell)
+    return process
 
-    return subprocess.Popen(args=command_str, stdout=stdout, stderr=stderr, shell=shell)
+
+def execute_command_stream(command_str: str,
+                           shell: bool = False,
+                           sudo_password: str = None,
+                           parser=None,
+                           limit: int = None,
+                           max_line_length: int = 65536,
+                           timeout: float = None):
+
+    """
+    execute os command and yield the lines of stdout as they arrive, instead of buffering the whole result.
+    only one line is held in memory at once. stderr of the command is discarded.
+    if the iteration stops before the end of stdout (limit, break or close()), the command is killed.
+    if timeout or the current deadline expires, the command is killed and the iteration stops.
+
+    :param command_str: os command you want to execute.
+    :param shell:   set the 'shell' options for subprocess.Popen()
+    :param sudo_password: if you want to execute command with sudo, set the sudo password.
+    :param parser: callable(line) which converts a line into a record. a line is skipped if parser returns None.
+    :param limit: stop after yielding 'limit' items and kill the command. default is no limit.
+    :param max_line_length: longer lines are yielded in pieces of this length.
+    :param timeout: seconds until the command is killed. default is no limit except the current deadline.
+    :return: generator of decoded lines without line feed, or records made by parser.
+    """
+
+    from .deadline import effective_timeout, kill_process_group
+    from .metrics import record_command
+
+    timeout = effective_timeout(timeout)
+    if timeout is not None and timeout <= 0:
+        return
+
+    started: float = time.perf_counter()
+    stdout_bytes: int = 0
+    process = execute_command_popen(command_str=command_str,
+                                    stderr=subprocess.DEVNULL,
+                                    shell=shell,
+                                    sudo_password=sudo_password,
+                                    new_session=True)
+    finished: bool = False
+    count: int = 0
+    timer = None
+
+    if timeout is not None:
+        timer = threading.Timer(interval=timeout, function=kill_process_group, kwargs={"pid": process.pid})
+        timer.daemon = True
+        timer.start()
+
+    try:
+        while limit is None or count < limit:
+            line: bytes = process.stdout.readline(max_line_length)
+
+            if line == b"":
+                finished = True
+                break
+
+            stdout_bytes += len(line)
+
+            item = line.decode(ENCODING, errors="replace").rstrip("\n")
+            if parser is not None:
+                item = parser(item)
+                if item is None:
+                    continue
+
+            yield item
+            count += 1
+
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+        if not finished and process.poll() is None:
+            kill_process_group(pid=process.pid)
+
+        process.stdout.close()
+        process.wait()
+
+        record_command(kind="stream",
+                       elapsed=time.perf_counter() - started,
+                       returncode=process.returncode if finished else None,
+                       stdout=stdout_bytes,
+                       sudo=sudo_password is not None,
+                       shell=shell or sudo_password is not None)
+
+
+def _cached(namespace: str, ttl: float = None):
+
+    """
+    cache.cached() for the helpers of this module. the cache module is imported on the first call instead of
+    on 'import' of this package.
+    """
+
+    def decorator(func):
+        cached_func = None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal cached_func
+
+            if cached_func is None:
+                from .cache import cached
+
+                cached_func = cached(namespace, ttl=ttl)(func)
+
+            return cached_func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
 
 def get_specific_env_values(grep_str: str = None) -> str | None:
@@ -87,6 +376,7 @@ def get_specific_env_values(grep_str: str = None) -> str | None:
     return None
 
 
+@_cached("dist")
 def get_linux_dist() -> str | None:
 
     """
@@ -104,6 +394,7 @@ def get_linux_dist() -> str | None:
     return None
 
 
+@_cached("network", ttl=10.0)
 def get_interface_ipv4_addr(ifc_name: str) -> str | None:
 
     """
@@ -127,37 +418,16 @@ def printf_colorlog(text: str, color: str = "white") -> None:
     """
     print colorful text on the terminal.
     set the <> at the start and end of the sentence you want to highlight.
+    the text is rendered in-process and written by the logger of configure_logging().
 
     :param text: set the text you want to print out on your terminal. don't forget to insert '<' and '>'.
-    :param color: set the text color you want to highlight. please refer to variable 'color_code'.
+    :param color: set the text color you want to highlight. please refer to variable 'COLOR_CODE' in log.py.
     :return: None
     """
 
-    color_code: dict = \
-        {
-            "white": "\033[0m",
-            "gray": "\033[30m",
-            "red": "\033[31m",
-            "b_red": "\033[1;31m",
-            "green": "\033[32m",
-            "b_green": "\033[1;32m",
-            "yellow": "\033[33m",
-            "b_yellow": "\033[1;33m",
-            "blue": "\033[34m",
-            "b_blue": "\033[1;34m",
-            "purple": "\033[35m",
-            "b_purple": "\033[1;35m",
-            "turquoise": "\033[36m",
-            "b_turquoise": "\033[36m"
-        }
-
-    if "<" in text and ">" not in text:
-        text += ">"
-
-    text: str = text.replace("<", color_code[color]).replace(">", color_code["white"])
-    command_str: str = f"echo -e {text}"
-
-    execute_command_run(command_str=command_str, stdout=None, stderr=None)
+    from .log import get_logger
+
+    get_logger().log(text=text, color=color)
     return None
 
 
@@ -170,10 +440,7 @@ def print_wo_change_line(text: str) -> None:
     :return: None
     """
 
-    command_str: str = f"echo -n {text}"
-    cp = execute_command_run(command_str=command_str, stdout=None, stderr=None)
-
-    if cp.returncode != 0:
-        print(cp.stderr.decode(ENCODING))
+    from .log import get_logger
 
+    get_logger().log(text=text, end="")
     return None
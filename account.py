@@ -1,4 +1,5 @@
-from .__init__ import ENCODING, execute_command_run
+from . import ENCODING, execute_command_run
+from .cache import cached
 
 
 class Account:
@@ -7,9 +8,12 @@ class Account:
     class Service supports some tools that can handle or check related in linux account.
 
     all methods are set as static.
+    the current username and home directory are cached for 60 seconds. call invalidate_cache("account")
+    after changing them in this process, e.g. with os.setuid().
     """
 
     @staticmethod
+    @cached("account", ttl=60.0)
     def get_current_username() -> str | None:
 
         """
@@ -27,6 +31,7 @@ class Account:
         return None
 
     @staticmethod
+    @cached("account", ttl=60.0)
     def get_current_user_home_path() -> str | None:
 
         """
@@ -0,0 +1,241 @@
+import asyncio
+import contextvars
+import functools
+import importlib
+import inspect
+import subprocess
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from . import build_command
+from .deadline import effective_timeout, kill_process_group, make_timeout
+from .metrics import record_command
+from .session import bind_runner
+from .transport import get_transport, use_transport
+
+
+DEFAULT_CONCURRENCY_LIMIT: int = 64
+
+_limit: int = DEFAULT_CONCURRENCY_LIMIT
+_semaphores = weakref.WeakKeyDictionary()
+_executor: ThreadPoolExecutor | None = None
+
+# name of awaitable twin: (module path relative to this package, class name)
+_TWINS: dict = {
+    "AsyncAccount": (".account", "Account"),
+    "AsyncFileSystem": (".file", "FileSystem"),
+    "AsyncFirewall": (".firewall", "Firewall"),
+    "AsyncProcessMonitor": (".ps", "ProcessMonitor"),
+    "AsyncService": (".service", "Service"),
+    "AsyncDnf": (".centos.dnf", "Dnf"),
+    "AsyncNetworkManager": (".centos.nmcli", "NetworkManager"),
+    "AsyncRpm": (".centos.rpm", "Rpm"),
+    "AsyncApt": (".ubuntu.apt", "Apt"),
+    "AsyncDpkg": (".ubuntu.dpkg", "Dpkg"),
+}
+
+
+def set_concurrency_limit(limit: int) -> None:
+
+    """
+    set the maximum number of os commands executed at the same time by this module.
+
+    :param limit: maximum number of concurrent child processes.
+    :return: None
+    """
+
+    global _limit, _executor
+
+    if limit < 1:
+        raise ValueError("concurrency limit must be 1 or more.")
+
+    _limit = limit
+    _semaphores.clear()
+
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+    return None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+
+    """
+    return the semaphore of the running event loop.
+
+    :return: asyncio.Semaphore which limits the number of concurrent child processes.
+    """
+
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_limit)
+        _semaphores[loop] = semaphore
+
+    return semaphore
+
+
+def _get_executor() -> ThreadPoolExecutor:
+
+    """
+    return the thread pool which runs the blocking body of awaitable twins.
+
+    :return: ThreadPoolExecutor sized with the concurrency limit.
+    """
+
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=_limit, thread_name_prefix="linux_cmd_aio")
+
+    return _executor
+
+
+async def execute_command_run_async(command_str: str,
+                                    stdout: int = subprocess.PIPE,
+                                    stderr: int = subprocess.PIPE,
+                                    shell: bool = False,
+                                    sudo_password: str = None,
+                                    timeout: float = None
+                                    ) -> subprocess.CompletedProcess:
+
+    """
+    awaitable version of execute_command_run(). execute os command and return subprocess.CompletedProcess.
+    the number of concurrent child processes is limited by set_concurrency_limit().
+
+    :param command_str: os command you want to execute.
+    :param stdout:  set where the result will be stored. default is subprocess.PIPE.
+                    if you want to print the result on the screen, set the value None.
+    :param stderr:  set where the error will be stored. default is subprocess.PIPE.
+                    if you want to print the result on the screen, set the value None
+    :param shell:   execute the command with '/bin/sh -c'.
+    :param sudo_password: if you want to execute command with sudo, set the sudo password.
+    :param timeout: seconds until the process group is killed. default is no limit except the current deadline.
+    :return: executed result with subprocess.CompletedProcess, or CommandTimeout.
+    """
+
+    started: float = time.perf_counter()
+    command_str, shell = build_command(command_str=command_str, shell=shell, sudo_password=sudo_password)
+    cp = await _run(command_str=command_str, stdout=stdout, stderr=stderr, timeout=effective_timeout(timeout))
+
+    record_command(kind="run",
+                   elapsed=time.perf_counter() - started,
+                   returncode=cp.returncode,
+                   stdout=cp.stdout,
+                   stderr=cp.stderr,
+                   sudo=sudo_password is not None,
+                   shell=shell)
+    return cp
+
+
+async def _run(command_str: str | list,
+               stdout: int = subprocess.PIPE,
+               stderr: int = subprocess.PIPE,
+               timeout: float = None
+               ) -> subprocess.CompletedProcess:
+
+    """
+    execute already built command. a string is executed with '/bin/sh -c' and a list is executed directly.
+
+    :param command_str: command built by build_command().
+    :param stdout: set where the result will be stored.
+    :param stderr: set where the error will be stored.
+    :param timeout: seconds until the process group is killed. default is no limit.
+    :return: executed result with subprocess.CompletedProcess, or CommandTimeout.
+             if the awaiting task is cancelled, the process group is killed before CancelledError is raised again.
+    """
+
+    args: list = ["/bin/sh", "-c", command_str] if isinstance(command_str, str) else command_str
+
+    if timeout is not None and timeout <= 0:
+        return make_timeout(args=command_str, timeout=0.0)
+
+    async with _get_semaphore():
+        # the process always leads its own group, so a timeout or a cancel kills its children as well.
+        process = await asyncio.create_subprocess_exec(*args, stdout=stdout, stderr=stderr, start_new_session=True)
+        try:
+            out, err = await asyncio.wait_for(process.communicate(), timeout=timeout)
+
+        except asyncio.TimeoutError:
+            kill_process_group(pid=process.pid)
+            await process.wait()
+            return make_timeout(args=command_str, timeout=timeout)
+
+        except asyncio.CancelledError:
+            kill_process_group(pid=process.pid)
+            await asyncio.shield(process.wait())
+            raise
+
+    return subprocess.CompletedProcess(args=command_str, returncode=process.returncode, stdout=out, stderr=err)
+
+
+def _make_twin(func):
+
+    """
+    make an awaitable twin of a blocking static method.
+    the method body runs in a worker thread, and every captured command of the body
+    is executed on the event loop with asyncio.create_subprocess_exec().
+
+    :param func: function of the static method.
+    :return: coroutine function with the same signature.
+    """
+
+    # generator methods such as iter_installed() are consumed in the worker thread.
+    generator: bool = inspect.isgeneratorfunction(inspect.unwrap(func))
+
+    @functools.wraps(func)
+    async def twin(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        transport = get_transport()
+
+        def runner(command_str: str | list, timeout: float = None) -> subprocess.CompletedProcess:
+            return asyncio.run_coroutine_threadsafe(_run(command_str=command_str, timeout=timeout), loop).result()
+
+        def body():
+            with use_transport(transport), bind_runner(runner):
+                result = func(*args, **kwargs)
+                return list(result) if generator else result
+
+        # run_in_executor() does not carry the context variables into the thread, so the body runs in a copy
+        # of the caller's context, and a deadline set around the await applies to its commands.
+        context: contextvars.Context = contextvars.copy_context()
+        return await loop.run_in_executor(_get_executor(), context.run, body)
+
+    return twin
+
+
+def make_async_class(cls: type) -> type:
+
+    """
+    make a class that has awaitable twins of all static methods of cls.
+    e.g. 'await AsyncService.is_running(service="sshd")' for 'Service.is_running(service="sshd")'
+
+    :param cls: class with static methods, such as Service or Firewall.
+    :return: new class named 'Async' + cls.__name__.
+    """
+
+    namespace: dict = {"__doc__": f"awaitable twin of class {cls.__name__}.\n\nall methods are set as static."}
+
+    for name, attr in vars(cls).items():
+        if isinstance(attr, staticmethod):
+            namespace[name] = staticmethod(_make_twin(attr.__func__))
+
+    return type(f"Async{cls.__name__}", (), namespace)
+
+
+@functools.cache
+def _load_twin(name: str) -> type:
+    module_name, class_name = _TWINS[name]
+    module = importlib.import_module(module_name, package=__package__)
+    return make_async_class(getattr(module, class_name))
+
+
+def __getattr__(name: str):
+
+    # twins are created on first access, so distro-specific modules are imported only when used.
+    if name in _TWINS:
+        return _load_twin(name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,528 @@
+import fnmatch
+import lzma
+import os
+import secrets
+import struct
+import tarfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+COMPRESSIONS: tuple = ("gzip", "xz", "zstd")
+
+# suffixes of archive names and their compression.
+SUFFIXES: dict = {
+    ".tar.gz": "gzip",
+    ".tgz": "gzip",
+    ".tar.xz": "xz",
+    ".txz": "xz",
+    ".tar.zst": "zstd",
+    ".tzst": "zstd",
+    ".tar": None,
+}
+
+DEFAULT_SUFFIXES: dict = {None: ".tar", "gzip": ".tar.gz", "xz": ".tar.xz", "zstd": ".tar.zst"}
+DEFAULT_LEVELS: dict = {"gzip": 6, "xz": 6, "zstd": 3}
+BLOCK_SIZES: dict = {None: 1 << 20, "gzip": 1 << 20, "xz": 4 << 20, "zstd": 4 << 20}
+
+ZSTD_MAGIC: bytes = b"\x28\xb5\x2f\xfd"
+
+# deflate looks back 32KiB at most, so each gzip block is primed with the last 32KiB of the previous one.
+_DEFLATE_WINDOW: int = 32768
+
+
+def is_zstd_available() -> bool:
+
+    """
+    :return: bool whether the optional package 'zstandard' is installed or not.
+    """
+
+    try:
+        import zstandard
+
+    except ImportError:
+        return False
+
+    return True
+
+
+def compression_of(path: str) -> str | None:
+
+    """
+    return the compression of an archive by its name, e.g. 'gzip' for 'bundle.tar.gz'.
+
+    :param path: archive path.
+    :return: 'gzip', 'xz', 'zstd', or None for a plain tar or an unknown name.
+    """
+
+    for suffix, compression in SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+
+    return None
+
+
+class ArchiveProgress:
+
+    """
+    class ArchiveProgress is given to the progress callback of create_archive() and extract_archive().
+
+    - bytes_in: bytes consumed. the tar stream for create_archive(), the archive file for extract_archive().
+    - bytes_out: bytes produced. the archive file for create_archive(), the extracted files for extract_archive().
+    - total: expected bytes_in at the end, or None if it is not known.
+    """
+
+    __slots__ = ("files", "bytes_in", "bytes_out", "total", "elapsed", "done")
+
+    def __init__(self, files: int = 0, bytes_in: int = 0, bytes_out: int = 0, total: int = None,
+                 elapsed: float = 0.0, done: bool = False) -> None:
+        self.files: int = files
+        self.bytes_in: int = bytes_in
+        self.bytes_out: int = bytes_out
+        self.total: int | None = total
+        self.elapsed: float = elapsed
+        self.done: bool = done
+
+    @property
+    def throughput(self) -> float:
+
+        """
+        :return: bytes_in per second.
+        """
+
+        return self.bytes_in / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def fraction(self) -> float | None:
+
+        """
+        :return: progress between 0.0 and 1.0, or None if the total is not known.
+        """
+
+        if self.done:
+            return 1.0
+
+        if not self.total:
+            return None
+
+        return min(1.0, self.bytes_in / self.total)
+
+    def __repr__(self) -> str:
+        return (f"ArchiveProgress(files={self.files}, bytes_in={self.bytes_in}, bytes_out={self.bytes_out}, "
+                f"total={self.total}, throughput={self.throughput:.0f}/s, done={self.done})")
+
+
+class _Tracker:
+
+    """
+    calls the progress callback at most once per interval, and once more at the end.
+    """
+
+    def __init__(self, callback, interval: float, total: int | None) -> None:
+        self.callback = callback
+        self.interval: float = interval
+        self.progress: ArchiveProgress = ArchiveProgress(total=total)
+        self._started: float = time.perf_counter()
+        self._reported: float = self._started
+
+    def update(self, force: bool = False) -> None:
+        if self.callback is None:
+            return None
+
+        now: float = time.perf_counter()
+        if not force and now - self._reported < self.interval:
+            return None
+
+        self._reported = now
+        self.progress.elapsed = now - self._started
+        self.callback(self.progress)
+
+    def finish(self) -> None:
+        self.progress.done = True
+        self.update(force=True)
+
+
+def _deflate(block: bytes, dictionary: bytes, level: int, last: bool) -> bytes:
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+
+    return compressor.compress(block) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _xz(block: bytes, level: int) -> bytes:
+    return lzma.compress(block, format=lzma.FORMAT_XZ, preset=level)
+
+
+def _zstd(block: bytes, level: int) -> bytes:
+    import zstandard
+
+    return zstandard.ZstdCompressor(level=level).compress(block)
+
+
+class ParallelCompressor:
+
+    """
+    class ParallelCompressor is a writable file object which compresses the data in blocks on all cores.
+    zlib, lzma and zstandard release the GIL while compressing, so the blocks are compressed in parallel threads,
+    and written in order.
+
+    - gzip: one gzip member of deflate blocks, each primed with the end of the previous block like 'pigz'.
+    - xz: one xz stream per block. 'xz -d' and lzma read concatenated streams.
+    - zstd: one zstd frame per block. it needs the optional package 'zstandard'.
+    - None: the data is written as it is.
+    """
+
+    def __init__(self, fileobj, compression: str = None, level: int = None, workers: int = None,
+                 block_size: int = None) -> None:
+
+        """
+        :param fileobj: writable binary file object which receives the compressed data.
+        :param compression: 'gzip', 'xz', 'zstd' or None.
+        :param level: compression level. default is 6 for gzip and xz, 3 for zstd.
+        :param workers: number of compressing threads. default is the number of cores.
+        :param block_size: size of one block in bytes.
+        """
+
+        if compression not in COMPRESSIONS and compression is not None:
+            raise ValueError(f"unknown compression: {compression}")
+
+        if compression == "zstd" and not is_zstd_available():
+            raise ValueError("zstd needs the package 'zstandard'")
+
+        self.fileobj = fileobj
+        self.compression: str | None = compression
+        self.level: int | None = level if level is not None else DEFAULT_LEVELS.get(compression)
+        self.workers: int = max(1, workers or os.cpu_count() or 1)
+        self.block_size: int = block_size or BLOCK_SIZES[compression]
+        self.bytes_in: int = 0
+        self.bytes_out: int = 0
+        self.on_write = None
+        self._buffer: bytearray = bytearray()
+        self._pending: deque = deque()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="linux_cmd_compress") \
+            if compression is not None else None
+        self._dictionary: bytes = b""
+        self._crc: int = 0
+        self._closed: bool = False
+
+        if compression == "gzip":
+            # magic, deflate, no flags, no mtime, no extra flags, unix
+            self._output(b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\x03")
+
+    def write(self, data) -> int:
+        size: int = len(data)
+        self.bytes_in += size
+
+        if self.compression is None:
+            self._output(data)
+
+        else:
+            self._buffer += data
+            while len(self._buffer) >= self.block_size:
+                block: bytes = bytes(self._buffer[:self.block_size])
+                del self._buffer[:self.block_size]
+                self._submit(block=block, last=False)
+
+        if self.on_write is not None:
+            self.on_write()
+
+        return size
+
+    def flush(self) -> None:
+        return None
+
+    def close(self) -> None:
+
+        """
+        compress the rest of the data, write the end of the stream and wait for all blocks.
+        the file object given to this object is not closed.
+        """
+
+        if self._closed:
+            return None
+
+        self._closed = True
+        if self.compression is not None:
+            if self._buffer or self.compression == "gzip":
+                self._submit(block=bytes(self._buffer), last=True)
+                self._buffer.clear()
+
+            while self._pending:
+                self._output(self._pending.popleft().result())
+
+            self._executor.shutdown(wait=True)
+
+        if self.compression == "gzip":
+            self._output(struct.pack("<II", self._crc & 0xffffffff, self.bytes_in & 0xffffffff))
+
+        return None
+
+    def abort(self) -> None:
+
+        """
+        stop the threads without writing the rest.
+        """
+
+        self._closed = True
+        if self._executor is not None:
+            for future in self._pending:
+                future.cancel()
+
+            self._executor.shutdown(wait=True)
+
+    def _submit(self, block: bytes, last: bool) -> None:
+        if self.compression == "gzip":
+            self._crc = zlib.crc32(block, self._crc)
+            future = self._executor.submit(_deflate, block, self._dictionary, self.level, last)
+            self._dictionary = block[-_DEFLATE_WINDOW:] if len(block) >= _DEFLATE_WINDOW \
+                else (self._dictionary + block)[-_DEFLATE_WINDOW:]
+
+        elif self.compression == "xz":
+            future = self._executor.submit(_xz, block, self.level)
+
+        else:
+            future = self._executor.submit(_zstd, block, self.level)
+
+        self._pending.append(future)
+
+        # blocks are written in order as soon as they are ready, and at most 2 blocks per thread are kept in memory.
+        while self._pending and (self._pending[0].done() or len(self._pending) > self.workers * 2):
+            self._output(self._pending.popleft().result())
+
+    def _output(self, data: bytes) -> None:
+        self.fileobj.write(data)
+        self.bytes_out += len(data)
+
+
+class _CountingReader:
+
+    """
+    readable file object which counts the bytes read from the archive file.
+    """
+
+    def __init__(self, fileobj, tracker: _Tracker) -> None:
+        self.fileobj = fileobj
+        self.tracker: _Tracker = tracker
+
+    def read(self, size: int = -1) -> bytes:
+        data: bytes = self.fileobj.read(size)
+        self.tracker.progress.bytes_in += len(data)
+        self.tracker.update()
+        return data
+
+    def close(self) -> None:
+        return None
+
+
+def _total_size(paths: list) -> int:
+    total: int = 0
+    for path in paths:
+        if os.path.isdir(path) and not os.path.islink(path):
+            for root, _, names in os.walk(path):
+                for name in names:
+                    try:
+                        total += os.lstat(os.path.join(root, name)).st_size
+
+                    except OSError:
+                        continue
+
+        else:
+            try:
+                total += os.lstat(path).st_size
+
+            except OSError:
+                continue
+
+    return total
+
+
+def create_archive(paths: list, save_as: str, compression: str = None, level: int = None, workers: int = None,
+                   progress=None, interval: float = 0.5) -> bool:
+
+    """
+    create a tar archive of the paths, compressed in parallel blocks. the archive is streamed, so the memory does
+    not grow with the size of the files. it is written into a temporary file which is renamed at the end,
+    so a broken archive is never left at save_as. the names in the archive are the paths without the leading '/',
+    as 'tar -c' does.
+
+    :param paths: list of files and folders. folders are archived recursively.
+    :param save_as: archive path.
+    :param compression: 'gzip', 'xz', 'zstd' or None.
+    :param level: compression level.
+    :param workers: number of compressing threads. default is the number of cores.
+    :param progress: callable(ArchiveProgress) called at most once per interval and once at the end.
+    :param interval: seconds between the calls of progress.
+    :return: bool whether the archive is created or not.
+    """
+
+    tracker: _Tracker = _Tracker(callback=progress, interval=interval,
+                                 total=_total_size(paths=paths) if progress is not None else None)
+    temp_path: str = f"{save_as}.{secrets.token_hex(4)}.part"
+
+    def count(member: tarfile.TarInfo) -> tarfile.TarInfo:
+        tracker.progress.files += 1
+        return member
+
+    def update() -> None:
+        tracker.progress.bytes_in = writer.bytes_in
+        tracker.progress.bytes_out = writer.bytes_out
+        tracker.update()
+
+    try:
+        with open(temp_path, "wb") as file:
+            writer: ParallelCompressor = ParallelCompressor(fileobj=file, compression=compression, level=level,
+                                                            workers=workers)
+            writer.on_write = update
+
+            try:
+                with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                    for path in paths:
+                        tar.add(path, filter=count)
+
+                writer.close()
+
+            except BaseException:
+                writer.abort()
+                raise
+
+            update()
+
+        os.replace(temp_path, save_as)
+
+    except (OSError, ValueError, tarfile.TarError, lzma.LZMAError, zlib.error):
+        try:
+            os.unlink(temp_path)
+
+        except OSError:
+            pass
+
+        return False
+
+    tracker.finish()
+    return True
+
+
+def _check_member(member: tarfile.TarInfo, path: str) -> tarfile.TarInfo:
+
+    """
+    minimal 'data' filter for python without the extraction filters of tarfile (before 3.11.4).
+    """
+
+    import copy
+
+    destination: str = os.path.realpath(path)
+    target: str = os.path.realpath(os.path.join(destination, member.name))
+    if os.path.isabs(member.name) or os.path.commonpath([destination, target]) != destination:
+        raise tarfile.TarError(f"{member.name} is outside the destination")
+
+    if member.issym() or member.islnk():
+        base: str = os.path.dirname(target) if member.issym() else destination
+        link: str = os.path.realpath(os.path.join(base, member.linkname))
+        if os.path.isabs(member.linkname) or os.path.commonpath([destination, link]) != destination:
+            raise tarfile.TarError(f"{member.name} links outside the destination")
+
+    if member.isdev():
+        raise tarfile.TarError(f"{member.name} is a device file")
+
+    member = copy.copy(member)
+    member.uid, member.gid, member.uname, member.gname = os.getuid(), os.getgid(), "", ""
+    member.mode &= 0o755
+    return member
+
+
+def _is_selected(name: str, include: list | None, exclude: list | None) -> bool:
+    name = name.rstrip("/")
+    if include and not any(fnmatch.fnmatchcase(name, pattern) for pattern in include):
+        return False
+
+    return not (exclude and any(fnmatch.fnmatchcase(name, pattern) for pattern in exclude))
+
+
+def _open_decompressed(fileobj, magic: bytes):
+
+    """
+    return a readable file object of the decompressed archive. the compression is detected by the magic bytes.
+    the readers of the compression modules are used instead of tarfile's own, because they also read
+    the concatenated streams written by ParallelCompressor and tools such as 'pigz' or 'pixz'.
+    """
+
+    import bz2
+    import gzip
+
+    if magic.startswith(b"\x1f\x8b"):
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+
+    if magic.startswith(b"\xfd7zXZ\x00"):
+        return lzma.LZMAFile(fileobj, mode="rb")
+
+    if magic.startswith(b"BZh"):
+        return bz2.BZ2File(fileobj, mode="rb")
+
+    if magic.startswith(ZSTD_MAGIC):
+        if not is_zstd_available():
+            return None
+
+        import zstandard
+
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
+
+    return fileobj
+
+
+def extract_archive(path: str, save_path: str, include: list = None, exclude: list = None, trusted: bool = False,
+                    progress=None, interval: float = 0.5) -> bool:
+
+    """
+    extract a tar archive member by member as it is read, so the memory does not grow with the size of the archive.
+    gzip, xz and bzip2 are detected by the contents. zstd needs the optional package 'zstandard'.
+
+    unless trusted, the members are checked with the 'data' filter of tarfile: a member outside save_path,
+    a link pointing outside of it, or a device file stops the extraction, and owners and special mode bits
+    are not restored.
+
+    :param path: archive path.
+    :param save_path: folder where the members are extracted. it is created if it does not exist.
+    :param include: glob patterns of member names to extract. default is all members.
+    :param exclude: glob patterns of member names not to extract.
+    :param trusted: extract everything as it is, including owners and absolute links, like 'tar -x' as root.
+    :param progress: callable(ArchiveProgress) called at most once per interval and once at the end.
+    :param interval: seconds between the calls of progress.
+    :return: bool whether the archive is extracted or not.
+    """
+
+    filters: bool = hasattr(tarfile, "data_filter")
+
+    try:
+        tracker: _Tracker = _Tracker(callback=progress, interval=interval, total=os.path.getsize(path))
+        os.makedirs(save_path, exist_ok=True)
+
+        with open(path, "rb") as file:
+            magic: bytes = file.read(6)
+            file.seek(0)
+            stream = _open_decompressed(fileobj=_CountingReader(fileobj=file, tracker=tracker), magic=magic)
+            if stream is None:
+                return False
+
+            with tarfile.open(fileobj=stream, mode="r|") as tar:
+                for member in tar:
+                    if not _is_selected(name=member.name, include=include, exclude=exclude):
+                        continue
+
+                    if filters:
+                        tar.extract(member, save_path, filter="fully_trusted" if trusted else "data")
+                    else:
+                        tar.extract(member if trusted else _check_member(member=member, path=save_path), save_path)
+
+                    tracker.progress.files += 1
+                    tracker.progress.bytes_out += member.size
+                    tracker.update()
+
+    except (OSError, ValueError, EOFError, tarfile.TarError, lzma.LZMAError, zlib.error):
+        return False
+
+    tracker.finish()
+    return True
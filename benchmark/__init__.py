@@ -0,0 +1,327 @@
+"""
+benchmark harness for linux_cmd.
+
+fake 'systemctl', 'firewall-cmd', 'nmcli', 'dpkg', 'rpm', 'apt-get', 'dnf', 'ps', 'ls' (and 'sudo', 'wget')
+are put at the front of PATH, so every public method can be measured without touching the system.
+run it with 'python -m linux_cmdproxier.benchmark --help'.
+the import time of the package is measured with 'python -X importtime' (see importtime.py).
+"""
+
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from .stubs import install_stubs
+
+
+def build_cases(workspace: str) -> dict:
+
+    """
+    return the benchmark cases of all public methods.
+
+    :param workspace: temporary directory for methods which create files.
+    :return: dict of {qualified method name: callable without argument}
+    """
+
+    from ..account import Account
+    from ..file import FileSystem
+    from ..firewall import Firewall
+    from ..ps import ProcessMonitor
+    from ..service import Service
+    from ..centos.dnf import Dnf
+    from ..centos.nmcli import NetworkManager
+    from ..centos.rpm import Rpm
+    from ..ubuntu.apt import Apt
+    from ..ubuntu.dpkg import Dpkg
+
+    text_path: str = os.path.join(workspace, "contents.txt")
+    tar_path: str = os.path.join(workspace, "bundle.tar")
+    units: list = [f"unit{i}.service" for i in range(250)]
+    with open(text_path, "w") as f:
+        f.write("benchmark\n" * 100)
+
+    return {
+        "Account.get_current_username": lambda: Account.get_current_username(),
+        "Account.get_current_user_home_path": lambda: Account.get_current_user_home_path(),
+        "Account.is_root_or_has_sudo": lambda: Account.is_root_or_has_sudo(),
+        "Account.is_user_exist": lambda: Account.is_user_exist(username="root"),
+
+        "FileSystem.create_symlink": lambda: FileSystem.create_symlink(target_path=text_path,
+                                                                       link_path=os.path.join(workspace, "link")),
+        "FileSystem.build_index": lambda: FileSystem.build_index(path=workspace,
+                                                                 index_dir=os.path.join(workspace, "index")),
+        "FileSystem.is_path_exist": lambda: FileSystem.is_path_exist(path=workspace),
+        "FileSystem.get_file_contents": lambda: FileSystem.get_file_contents(path=text_path),
+        "FileSystem.get_list_on_path": lambda: FileSystem.get_list_on_path(path=workspace),
+        "FileSystem.get_path_type": lambda: FileSystem.get_path_type(path=workspace),
+        "FileSystem.get_path_with_name": lambda: FileSystem.get_path_with_name(name="contents.txt", path=workspace),
+        "FileSystem.iter_list_on_path": lambda: list(FileSystem.iter_list_on_path(path=workspace)),
+        "FileSystem.iter_path_with_name": lambda: list(FileSystem.iter_path_with_name(name="contents.txt",
+                                                                                      path=workspace)),
+        "FileSystem.iter_chunks": lambda: list(FileSystem.iter_chunks(path=text_path)),
+        "FileSystem.iter_lines": lambda: list(FileSystem.iter_lines(path=text_path)),
+        "FileSystem.make_folder": lambda: FileSystem.make_folder(path=os.path.join(workspace, "a/b"), parents=True),
+        "FileSystem.read_bytes": lambda: FileSystem.read_bytes(path=text_path, offset=1, length=4),
+        "FileSystem.search": lambda: list(FileSystem.search(path=workspace, name="*.txt", max_depth=2)),
+        "FileSystem.set_file_contents": lambda: FileSystem.set_file_contents(path=os.path.join(workspace, "out.txt"),
+                                                                             contents="benchmark"),
+        "FileSystem.set_files_contents": lambda: FileSystem.set_files_contents(
+            files={os.path.join(workspace, f"out{i}.txt"): "benchmark" for i in range(10)}),
+        "FileSystem.tail": lambda: FileSystem.tail(path=text_path, n=1),
+        "FileSystem.tar_zip": lambda: FileSystem.tar_zip(list_target_file=[text_path], save_as=tar_path),
+        "FileSystem.tar_unzip": lambda: FileSystem.tar_unzip(tarball_path=tar_path,
+                                                             save_path=os.path.join(workspace, "extract")),
+        "FileSystem.wget_download": lambda: FileSystem.wget_download(url="http://localhost/file", save_path=workspace),
+
+        "Firewall.is_running": lambda: Firewall.is_running(),
+        "Firewall.get_active_zone_names": lambda: Firewall.get_active_zone_names(),
+        "Firewall.get_all_zones": lambda: Firewall.get_all_zones(),
+        "Firewall.get_default_zone": lambda: Firewall.get_default_zone(),
+        "Firewall.get_zone_interfaces": lambda: Firewall.get_zone_interfaces(zone="public"),
+        "Firewall.rich_rule": lambda: Firewall.rich_rule(action="add", rule_action="accept", srcip="10.0.0.1"),
+        "Firewall.rule_object": lambda: Firewall.rule_object(action="add", obj_type="port", value="8080/tcp"),
+        "Firewall.set_default_zone": lambda: Firewall.set_default_zone(zone="zone0"),
+        "Firewall.reload": lambda: Firewall.reload(),
+
+        "ProcessMonitor.get_process_by_id": lambda: ProcessMonitor.get_process_by_id(pid=1),
+        "ProcessMonitor.iter_processes": lambda: list(ProcessMonitor.iter_processes()),
+        "ProcessMonitor.get_process": lambda: ProcessMonitor.get_process(pid=1),
+        "ProcessMonitor.snapshot": lambda: ProcessMonitor.snapshot(),
+        "ProcessMonitor.find": lambda: ProcessMonitor.find(user="root", cmdline=r"python"),
+        "ProcessMonitor.get_children": lambda: ProcessMonitor.get_children(pid=1),
+        "ProcessMonitor.sampler": lambda: ProcessMonitor.sampler().sample(),
+        "ProcessMonitor.top": lambda: ProcessMonitor.top(interval=0),
+
+        "Service.is_enabled": lambda: Service.is_enabled(service="sshd"),
+        "Service.is_running": lambda: Service.is_running(service="sshd"),
+        "Service.are_enabled": lambda: Service.are_enabled(services=units),
+        "Service.are_running": lambda: Service.are_running(services=units),
+        "Service.get_states": lambda: Service.get_states(verb="is-active", services=units),
+        "Service.snapshot": lambda: Service.snapshot(),
+        "Service.wait_for": lambda: Service.wait_for(service="sshd", timeout=5),
+        "Service.wait_for_all": lambda: Service.wait_for_all(services=units, timeout=5),
+        "Service.plan_restart": lambda: Service.plan_restart(services=units),
+        "Service.restart_all": lambda: Service.restart_all(services=units[:50]),
+        "Service.set_disable": lambda: Service.set_disable(service="sshd"),
+        "Service.set_enable": lambda: Service.set_enable(service="sshd"),
+        "Service.start": lambda: Service.start(service="sshd"),
+        "Service.stop": lambda: Service.stop(service="sshd"),
+        "Service.restart": lambda: Service.restart(service="sshd"),
+
+        "Dnf.install": lambda: Dnf.install(package="vim"),
+        "Dnf.is_installed": lambda: Dnf.is_installed(package="package1"),
+        "Dnf.iter_installed": lambda: list(Dnf.iter_installed()),
+        "Dnf.uninstall": lambda: Dnf.uninstall(package="vim"),
+        "Dnf.update": lambda: Dnf.update(),
+
+        "NetworkManager.get_connection_id": lambda: NetworkManager.get_connection_id(ifc="eth0"),
+        "NetworkManager.get_interface_zone": lambda: NetworkManager.get_interface_zone(ifc="eth0"),
+        "NetworkManager.ifc_up": lambda: NetworkManager.ifc_up(ifc="eth0"),
+        "NetworkManager.ifc_down": lambda: NetworkManager.ifc_down(ifc="eth0"),
+        "NetworkManager.reload_connection": lambda: NetworkManager.reload_connection(),
+        "NetworkManager.set_interface_zone": lambda: NetworkManager.set_interface_zone(ifc="eth0", zone="public"),
+
+        "Rpm.check_command_belong_to": lambda: Rpm.check_command_belong_to(command="ls"),
+        "Rpm.install": lambda: Rpm.install(package_path="/tmp/vim.rpm"),
+        "Rpm.is_installed": lambda: Rpm.is_installed(package_name="package1"),
+        "Rpm.iter_installed": lambda: list(Rpm.iter_installed()),
+        "Rpm.uninstall": lambda: Rpm.uninstall(package_name="vim"),
+
+        "Apt.auto_remove": lambda: Apt.auto_remove(package="vim"),
+        "Apt.install": lambda: Apt.install(package="vim"),
+        "Apt.is_installed": lambda: Apt.is_installed(package="package1"),
+        "Apt.iter_installed": lambda: list(Apt.iter_installed()),
+        "Apt.uninstall": lambda: Apt.uninstall(package="vim"),
+        "Apt.update": lambda: Apt.update(),
+
+        "Dpkg.check_command_belong_to": lambda: Dpkg.check_command_belong_to(command="ls"),
+        "Dpkg.install": lambda: Dpkg.install(package_path="/tmp/vim.deb"),
+        "Dpkg.is_installed": lambda: Dpkg.is_installed(package_name="package1"),
+        "Dpkg.iter_installed": lambda: list(Dpkg.iter_installed()),
+        "Dpkg.uninstall": lambda: Dpkg.uninstall(package_name="vim"),
+    }
+
+
+def find_uncovered(cases: dict) -> list:
+
+    """
+    return public static methods of wrapper classes which have no benchmark case.
+
+    :param cases: result of build_cases().
+    :return: list of qualified method names without a case.
+    """
+
+    from ..account import Account
+    from ..file import FileSystem
+    from ..firewall import Firewall
+    from ..ps import ProcessMonitor
+    from ..service import Service
+    from ..centos.dnf import Dnf
+    from ..centos.nmcli import NetworkManager
+    from ..centos.rpm import Rpm
+    from ..ubuntu.apt import Apt
+    from ..ubuntu.dpkg import Dpkg
+
+    uncovered: list = []
+    for cls in (Account, FileSystem, Firewall, ProcessMonitor, Service, Dnf, NetworkManager, Rpm, Apt, Dpkg):
+        for name, attr in vars(cls).items():
+            if isinstance(attr, staticmethod) and not name.startswith("_") and f"{cls.__name__}.{name}" not in cases:
+                uncovered.append(f"{cls.__name__}.{name}")
+
+    return uncovered
+
+
+def measure(func, iterations: int = 50, warmup: int = 2) -> dict:
+
+    """
+    measure per-call latency, throughput and peak python memory of func.
+    memory is measured in a separate call, so tracemalloc does not distort the latency.
+
+    :param func: callable without argument.
+    :param iterations: number of measured calls.
+    :param warmup: number of calls before measuring.
+    :return: dict of measured values. times are in seconds.
+    """
+
+    for _ in range(warmup):
+        func()
+
+    latencies: list = []
+    started: float = time.perf_counter()
+
+    for _ in range(iterations):
+        call_started: float = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_started)
+
+    total: float = time.perf_counter() - started
+
+    tracemalloc.start()
+    func()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "mean_s": statistics.fmean(latencies),
+        "p50_s": latencies[len(latencies) // 2],
+        "p95_s": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "min_s": latencies[0],
+        "throughput_per_s": iterations / total if total > 0 else 0.0,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def _git_revision() -> str | None:
+    cp = subprocess.run(args=["git", "rev-parse", "HEAD"],
+                        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL)
+
+    return cp.stdout.decode().strip() if cp.returncode == 0 else None
+
+
+def run_benchmarks(iterations: int = 50,
+                   scale: int = 1000,
+                   name_filter: str = None,
+                   session_pool: int = 0,
+                   use_cache: bool = False) -> dict:
+
+    """
+    run benchmark cases with fake commands on PATH.
+
+    :param iterations: number of measured calls per method.
+    :param scale: number of lines of list outputs of fake commands.
+    :param name_filter: run only methods whose name contains this string.
+    :param session_pool: if it is more than 0, run with the session pool of this size.
+    :param use_cache: keep the result cache on. default is off, so every call executes a command.
+    :return: dict with 'meta' and 'results', which can be saved as JSON.
+    """
+
+    from ..cache import set_cache_enabled
+    from ..session import enable_session_pool, disable_session_pool
+
+    original_path: str = os.environ.get("PATH", "")
+
+    with tempfile.TemporaryDirectory(prefix="linux_cmd_bench_") as root:
+        bin_path: str = install_stubs(path=os.path.join(root, "stubs"), scale=scale)
+        workspace: str = os.path.join(root, "workspace")
+        os.makedirs(workspace)
+        os.environ["PATH"] = f"{bin_path}{os.pathsep}{original_path}"
+        set_cache_enabled(use_cache)
+
+        try:
+            if session_pool > 0:
+                enable_session_pool(size=session_pool)
+
+            cases: dict = build_cases(workspace=workspace)
+            results: dict = {}
+
+            for name, func in cases.items():
+                if name_filter is None or name_filter in name:
+                    results[name] = measure(func=func, iterations=iterations)
+
+            uncovered: list = find_uncovered(cases=cases)
+
+        finally:
+            disable_session_pool()
+            set_cache_enabled(True)
+            os.environ["PATH"] = original_path
+
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split(" ")[0],
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "scale": scale,
+            "session_pool": session_pool,
+            "cache": use_cache,
+            "children_max_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+            "uncovered": uncovered,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> dict:
+
+    """
+    compare two results of run_benchmarks().
+
+    :param baseline: older result.
+    :param current: newer result.
+    :return: dict of {method name: ratio of mean latency (current / baseline)}. less than 1.0 means faster.
+    """
+
+    ratios: dict = {}
+    for name, values in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is not None and old["mean_s"] > 0:
+            ratios[name] = values["mean_s"] / old["mean_s"]
+
+    return ratios
+
+
+def save(result: dict, path: str) -> None:
+
+    """
+    save the result of run_benchmarks() as JSON.
+
+    :param result: result of run_benchmarks().
+    :param path: path of JSON file.
+    :return: None
+    """
+
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+    return None
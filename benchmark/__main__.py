@@ -0,0 +1,58 @@
+import argparse
+import json
+import sys
+from . import compare, run_benchmarks, save
+from .importtime import measure_import_time
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m linux_cmdproxier.benchmark",
+                                     description="measure every public method of linux_cmd with fake commands.")
+    parser.add_argument("--iterations", type=int, default=50, help="measured calls per method. default is 50.")
+    parser.add_argument("--scale", type=int, default=1000, help="lines of list outputs. default is 1000.")
+    parser.add_argument("--filter", dest="name_filter", default=None, help="run only methods containing this text.")
+    parser.add_argument("--session-pool", type=int, default=0, help="run with a session pool of this size.")
+    parser.add_argument("--cache", action="store_true", help="keep the result cache on.")
+    parser.add_argument("--output", default=None, help="save the result as JSON to this path.")
+    parser.add_argument("--compare", default=None, help="JSON of an older run to compare with.")
+    parser.add_argument("--import-budget-ms", type=float, default=None,
+                        help="fail with exit code 1 if importing the package takes longer than this.")
+    args = parser.parse_args(argv)
+
+    result: dict = run_benchmarks(iterations=args.iterations,
+                                  scale=args.scale,
+                                  name_filter=args.name_filter,
+                                  session_pool=args.session_pool,
+                                  use_cache=args.cache)
+
+    result["import_time"] = measure_import_time()
+
+    if args.output is not None:
+        save(result=result, path=args.output)
+
+    ratios: dict = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            ratios = compare(baseline=json.load(f), current=result)
+
+    print(f"{'method':<40} {'mean(ms)':>10} {'p95(ms)':>10} {'calls/s':>10} {'peak(KiB)':>10} {'ratio':>7}")
+    for name, values in result["results"].items():
+        ratio: str = f"{ratios[name]:.2f}" if name in ratios else "-"
+        print(f"{name:<40} {values['mean_s'] * 1000:>10.3f} {values['p95_s'] * 1000:>10.3f} "
+              f"{values['throughput_per_s']:>10.1f} {values['peak_memory_bytes'] / 1024:>10.1f} {ratio:>7}")
+
+    if result["meta"]["uncovered"]:
+        print(f"methods without benchmark case: {', '.join(result['meta']['uncovered'])}", file=sys.stderr)
+
+    import_ms: float = result["import_time"]["cumulative_us"] / 1000
+    print(f"import {result['import_time']['module']}: {import_ms:.1f} ms")
+
+    if args.import_budget_ms is not None and import_ms > args.import_budget_ms:
+        print(f"import time exceeds the budget of {args.import_budget_ms} ms.", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
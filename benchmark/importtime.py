@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+
+
+PACKAGE: str = __name__.split(".")[0]
+PACKAGE_PARENT: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _parse(stderr: str) -> dict:
+
+    """
+    parse the output of 'python -X importtime'.
+
+    :return: dict of {module name: cumulative import time in microseconds}
+    """
+
+    result: dict = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        result[name.strip()] = int(cumulative)
+
+    return result
+
+
+def measure_import_time(module: str = PACKAGE, repeat: int = 5) -> dict:
+
+    """
+    measure the import time of module in fresh interpreters with 'python -X importtime'.
+    the fastest run is reported, so noise of the machine does not make a false regression.
+
+    :param module: module name to import. default is this package.
+    :param repeat: number of interpreters to start.
+    :return: dict with 'module', 'cumulative_us' and 'modules' (import time of each module of this package).
+    """
+
+    best: dict | None = None
+
+    for _ in range(repeat):
+        cp = subprocess.run(args=[sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PACKAGE_PARENT,
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+
+        if cp.returncode != 0:
+            raise ImportError(cp.stderr.decode(errors="replace"))
+
+        times: dict = _parse(stderr=cp.stderr.decode(errors="replace"))
+        if best is None or times[module] < best[module]:
+            best = times
+
+    return {
+        "module": module,
+        "cumulative_us": best[module],
+        "modules": {name: value for name, value in best.items() if name.split(".")[0] == PACKAGE},
+    }
+
+
+def check_import_time(budget_ms: float, module: str = PACKAGE, repeat: int = 5) -> bool:
+
+    """
+    return bool whether the import time of module is within budget_ms or not.
+
+    :param budget_ms: allowed import time in milliseconds.
+    :param module: module name to import. default is this package.
+    :param repeat: number of interpreters to start.
+    :return: bool whether the import time is within budget or not.
+    """
+
+    return measure_import_time(module=module, repeat=repeat)["cumulative_us"] <= budget_ms * 1000
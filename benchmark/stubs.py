@@ -0,0 +1,147 @@
+import os
+import stat
+
+
+# shell scripts of fake commands. '$DATA' is replaced with the directory of canned outputs.
+STUBS: dict = {
+    "systemctl": """
+verb="$1"
+shift
+case "$verb" in
+    is-enabled) for unit in "$@"; do echo enabled; done ;;
+    is-active) for unit in "$@"; do echo active; done ;;
+    list-units) cat "$DATA/list_units" ;;
+    list-unit-files) cat "$DATA/list_unit_files" ;;
+    show) shift; for unit in "$@"; do printf 'MainPID=1\nId=%s\nUnitFileState=enabled\n\n' "$unit"; done ;;
+    *) exit 0 ;;
+esac
+""",
+    "firewall-cmd": """
+case "$*" in
+    --state) echo running ;;
+    --get-zones) cat "$DATA/zones" ;;
+    --get-active-zone) cat "$DATA/active_zones" ;;
+    --get-default-zone) echo public ;;
+    --list-all*) cat "$DATA/zone_list_all" ;;
+    *) echo success ;;
+esac
+""",
+    "nmcli": """
+case "$*" in
+    "-g GENERAL.CONNECTION device show"*) echo eth0 ;;
+    "connection show"*) cat "$DATA/nmcli_connection" ;;
+    *) exit 0 ;;
+esac
+""",
+    "dpkg": """
+case "$1" in
+    --list) cat "$DATA/dpkg_list" ;;
+    --search) echo "coreutils: /usr/bin/ls" ;;
+    *) exit 0 ;;
+esac
+""",
+    "dpkg-query": """
+cat "$DATA/dpkg_query"
+""",
+    "rpm": """
+case "$1" in
+    -qa) cat "$DATA/rpm_qa" ;;
+    -qf) echo coreutils-8.30-15.el8.x86_64 ;;
+    *) exit 0 ;;
+esac
+""",
+    "apt-get": """
+exit 0
+""",
+    "dnf": """
+case "$*" in
+    "list --installed") cat "$DATA/dnf_list" ;;
+    *) exit 0 ;;
+esac
+""",
+    "ps": """
+cat "$DATA/ps_aux"
+""",
+    "ls": """
+case "$1" in
+    -lhd) echo "drwxr-xr-x 2 root root 4.0K Mar 27 12:00 $2" ;;
+    *) cat "$DATA/ls" ;;
+esac
+""",
+    "wget": """
+exit 0
+""",
+    "sudo": """
+while [ "$#" -gt 0 ]; do
+    case "$1" in
+        -S) read -r _ ;;
+        -p) shift ;;
+        -n|-v) ;;
+        --) shift; break ;;
+        *) break ;;
+    esac
+    shift
+done
+[ "$#" -eq 0 ] && exit 0
+exec "$@"
+""",
+}
+
+
+def _write_data(data_path: str, scale: int) -> None:
+
+    """
+    write canned outputs of fake commands. the number of lines of list outputs is 'scale'.
+    """
+
+    outputs: dict = {
+        "zones": " ".join(f"zone{i}" for i in range(min(scale, 64))) + "\n",
+        "active_zones": "public\n  interfaces: eth0\n",
+        "zone_list_all": "public (active)\n  target: default\n  interfaces: eth0 eth1\n  services: ssh\n",
+        "nmcli_connection": "connection.id:                          eth0\nconnection.zone:                        public\n",
+        "dpkg_list": "".join(f"ii  package{i}  1.0.{i}-1  amd64  description of package{i}\n" for i in range(scale)),
+        "dpkg_query": "".join(f"package{i}\t1.0.{i}-1\n" for i in range(scale)),
+        "rpm_qa": "".join(f"package{i}-1.0.{i}-1.el8.x86_64\n" for i in range(scale)),
+        "dnf_list": "Installed Packages\n" + "".join(f"package{i}.x86_64    1.0.{i}-1.el8    @baseos\n"
+                                                    for i in range(scale)),
+        "ps_aux": "USER  PID %CPU %MEM    VSZ   RSS TTY STAT START   TIME COMMAND\n"
+                  + "".join(f"root  {i + 1}  0.0  0.1  16000  9000 ?  Ss  12:00  0:00 /usr/bin/daemon{i} --flag\n"
+                            for i in range(scale)),
+        "ls": "".join(f"file{i}\n" for i in range(scale)),
+        "list_units": "".join(f"unit{i}.service loaded {'failed failed' if i % 50 == 0 else 'active running'} "
+                              f"description of unit{i}\n" for i in range(scale)),
+        "list_unit_files": "".join(f"unit{i}.service enabled enabled\n" for i in range(scale)),
+    }
+
+    for name, contents in outputs.items():
+        with open(os.path.join(data_path, name), "w") as f:
+            f.write(contents)
+
+    return None
+
+
+def install_stubs(path: str, scale: int = 1000) -> str:
+
+    """
+    create fake commands and their canned outputs under path.
+
+    :param path: directory where 'bin' and 'data' folders are created.
+    :param scale: number of lines of list outputs, such as 'dnf list --installed' or 'ps -aux'.
+    :return: path of 'bin' folder which should be put at the front of PATH.
+    """
+
+    bin_path: str = os.path.join(path, "bin")
+    data_path: str = os.path.join(path, "data")
+    os.makedirs(bin_path, exist_ok=True)
+    os.makedirs(data_path, exist_ok=True)
+
+    _write_data(data_path=data_path, scale=scale)
+
+    for name, body in STUBS.items():
+        stub_path: str = os.path.join(bin_path, name)
+        with open(stub_path, "w") as f:
+            f.write(f"#!/bin/sh\nDATA='{data_path}'\n{body.lstrip()}")
+
+        os.chmod(stub_path, os.stat(stub_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    return bin_path
@@ -0,0 +1,313 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from .deadline import timeout_count
+from .transport import get_transport
+
+
+DEFAULT_MAXSIZE: int = 1024
+
+
+class TTLCache:
+
+    """
+    class TTLCache is a size-bounded LRU cache whose entries expire after their own TTL.
+
+    a key is a tuple (namespace, method name, arguments) made by the decorator cached().
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+
+        """
+        :param maxsize: maximum number of entries. the least recently used entry is evicted first.
+        """
+
+        self.maxsize: int = maxsize
+        self.enabled: bool = True
+        self.ttls: dict = {}
+        self.hits: int = 0
+        self.misses: int = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> tuple:
+
+        """
+        return the cached value of key.
+
+        :param key: key of the entry.
+        :return: tuple of (bool whether the value is found or not, value)
+        """
+
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is not None:
+                expire_at, value = entry
+                if expire_at is None or expire_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+
+                del self._data[key]
+
+            self.misses += 1
+            return False, None
+
+    def set(self, key: tuple, value, ttl: float = None) -> None:
+
+        """
+        store value with key.
+
+        :param key: key of the entry.
+        :param value: value to store.
+        :param ttl: seconds until the entry expires. None means it never expires.
+        :return: None
+        """
+
+        expire_at: float | None = None if ttl is None else time.monotonic() + ttl
+
+        with self._lock:
+            self._data[key] = (expire_at, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+        return None
+
+    def invalidate(self, namespace: str = None, **match) -> int:
+
+        """
+        remove entries. without arguments, all entries are removed.
+
+        :param namespace: remove only entries in this namespace, e.g. 'firewall' or 'service'.
+        :param match: remove only entries called with these arguments, e.g. service="sshd".
+        :return: number of removed entries.
+        """
+
+        with self._lock:
+            targets: list = [key for key in self._data if _is_matched(key=key, namespace=namespace, match=match)]
+            for key in targets:
+                del self._data[key]
+
+        return len(targets)
+
+    def invalidate_query(self, query: str) -> int:
+
+        """
+        remove all entries of one query.
+
+        :param query: qualified name of the method, e.g. 'Service.is_running'.
+        :return: number of removed entries.
+        """
+
+        with self._lock:
+            targets: list = [key for key in self._data if key[1] == query]
+            for key in targets:
+                del self._data[key]
+
+        return len(targets)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _is_matched(key: tuple, namespace: str | None, match: dict) -> bool:
+    if namespace is not None and key[0] != namespace:
+        return False
+
+    arguments: dict = dict(key[2])
+    return all(arguments.get(name, value) == value for name, value in match.items())
+
+
+_cache = TTLCache()
+
+
+def get_cache() -> TTLCache:
+
+    """
+    return the cache which is shared by all read-only queries of this package.
+
+    :return: TTLCache in use.
+    """
+
+    return _cache
+
+
+def set_cache_enabled(enabled: bool) -> None:
+
+    """
+    turn on or off the result cache. turning it off also removes all entries.
+
+    :param enabled: bool whether the result cache is used or not.
+    :return: None
+    """
+
+    _cache.enabled = enabled
+    if not enabled:
+        _cache.invalidate()
+
+    return None
+
+
+def set_cache_ttl(query: str, ttl: float | None) -> None:
+
+    """
+    change the TTL of a cached query, e.g. set_cache_ttl("Service.is_running", 2.0).
+    the state queries, such as Service.is_running(), are not cached by default, because a poller must see
+    the current state. set a TTL to share their results for a while.
+
+    :param query: qualified name of the method, e.g. 'Service.is_running' or 'Firewall.get_all_zones'.
+    :param ttl: seconds until the result expires. 0 turns off the cache of the query. None means it never expires.
+    :return: None
+    """
+
+    _cache.ttls[query] = ttl
+    _cache.invalidate_query(query=query)
+    return None
+
+
+def invalidate_cache(namespace: str = None, **match) -> int:
+
+    """
+    remove cached results explicitly, e.g. after changing the system outside of this package.
+
+    :param namespace: remove only entries in this namespace. ['account', 'dist', 'firewall', 'network', 'nmcli', 'package', 'service']
+    :param match: remove only entries called with these arguments, e.g. service="sshd".
+    :return: number of removed entries.
+    """
+
+    return _cache.invalidate(namespace, **match)
+
+
+def _bind_arguments(func, args: tuple, kwargs: dict) -> dict:
+
+    """
+    return {argument name: value} of a call of func, with default values filled.
+    the code object is read directly instead of inspect.signature(), which is slow to import.
+    """
+
+    code = func.__code__
+    names: tuple = code.co_varnames[:code.co_argcount]
+    defaults: tuple = func.__defaults__ or ()
+
+    arguments: dict = dict(zip(names[len(names) - len(defaults):], defaults))
+    arguments.update(zip(names, args))
+    arguments.update(kwargs)
+    return arguments
+
+
+def _make_key(namespace: str, func, args: tuple, kwargs: dict) -> tuple:
+
+    """
+    make a hashable cache key from the arguments of func.
+    sudo_password itself is not stored. only whether it was given or not is a part of the key,
+    because the result of a query can be different with and without privilege.
+    the name of the transport is a part of the key, so a result of one host is never returned for another.
+    None is returned if an argument is not hashable, e.g. a dict, and the call is not cached.
+    """
+
+    arguments: list = []
+    for name, value in sorted(_bind_arguments(func=func, args=args, kwargs=kwargs).items(), key=lambda a: a[0]):
+        if name == "sudo_password":
+            value = value is not None
+
+        elif isinstance(value, list):
+            value = tuple(value)
+
+        arguments.append((name, value))
+
+    # results of remote hosts are kept apart from each other and from this host.
+    key: tuple = (namespace, func.__qualname__, tuple(arguments), get_transport().name)
+    try:
+        hash(key)
+
+    except TypeError:
+        return None
+
+    return key
+
+
+def _copy(value):
+
+    """
+    return a shallow copy of a mutable result, so a caller who changes its result does not change the cached one.
+    """
+
+    if isinstance(value, (dict, list, set)):
+        return value.copy()
+
+    return value
+
+
+def cached(namespace: str, ttl: float = None):
+
+    """
+    decorator for read-only queries. a result which is not None is stored for 'ttl' seconds.
+    the TTL can be changed later with set_cache_ttl().
+
+    :param namespace: namespace of the entries, used by invalidates() and invalidate_cache().
+    :param ttl: seconds until the result expires. 0 means the query is not cached unless set_cache_ttl() is called.
+                None means it never expires.
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            query_ttl: float | None = _cache.ttls.get(func.__qualname__, ttl)
+            if not _cache.enabled or query_ttl == 0:
+                return func(*args, **kwargs)
+
+            key: tuple | None = _make_key(namespace=namespace, func=func, args=args, kwargs=kwargs)
+            if key is None:
+                return func(*args, **kwargs)
+
+            found, value = _cache.get(key)
+            if found:
+                return _copy(value)
+
+            timeouts: int = timeout_count()
+            value = func(*args, **kwargs)
+
+            # a result which failed by a timeout is not an answer of the system.
+            if value is not None and timeout_count() == timeouts:
+                _cache.set(key, _copy(value), ttl=query_ttl)
+
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates(*namespaces: str, by: str = None):
+
+    """
+    decorator for mutating methods. cached results in namespaces are removed after the method is called.
+
+    :param namespaces: namespaces which are affected by the method.
+    :param by: name of the argument which narrows the invalidation,
+               e.g. by="service" removes only the results of the same service.
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+
+            finally:
+                match: dict = {}
+                if by is not None:
+                    match[by] = _bind_arguments(func=func, args=args, kwargs=kwargs)[by]
+
+                for namespace in namespaces:
+                    _cache.invalidate(namespace, **match)
+
+        return wrapper
+
+    return decorator
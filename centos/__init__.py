@@ -1 +1,23 @@
-from ..__init__ import execute_command_run, printf_colorlog, ENCODING
+import importlib
+
+
+# classes are imported on first attribute access, e.g. 'from linux_cmdproxier.centos import Dnf'
+_LAZY_CLASSES: dict = {
+    "Dnf": ".dnf",
+    "NetworkManager": ".nmcli",
+    "Rpm": ".rpm",
+}
+
+
+def __getattr__(name: str):
+
+    if name in _LAZY_CLASSES:
+        value = getattr(importlib.import_module(_LAZY_CLASSES[name], package=__name__), name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + list(_LAZY_CLASSES))
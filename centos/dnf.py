@@ -1,4 +1,5 @@
-from ..centos import *
+from .. import execute_command_run, execute_command_stream
+from ..cache import cached, invalidates
 
 
 class Dnf:
@@ -10,6 +11,7 @@ class Dnf:
     """
 
     @staticmethod
+    @invalidates("package")
     def install(package: str, sudo_password: str = None) -> bool:
 
         """
@@ -29,6 +31,7 @@ class Dnf:
         return False
 
     @staticmethod
+    @cached("package", ttl=30.0)
     def is_installed(package: str, sudo_password: str = None) -> bool:
 
         """
@@ -48,6 +51,39 @@ class Dnf:
         return False
 
     @staticmethod
+    def iter_installed(limit: int = None, sudo_password: str = None):
+
+        """
+        yield installed packages from 'dnf list --installed' as they arrive, without buffering the whole list.
+
+        :param limit: stop after 'limit' packages. default is no limit.
+        :param sudo_password: if you need sudo, set sudo password.
+        :return: generator of tuple (package name with arch, version, repository).
+        """
+
+        command_str: str = "dnf list --installed"
+        pending: list = []
+        count: int = 0
+
+        for line in execute_command_stream(command_str=command_str, sudo_password=sudo_password):
+            if line.startswith(("Installed Packages", "Last metadata")):
+                continue
+
+            # dnf wraps a long package name and prints the rest of fields on the next line.
+            fields: list = pending + line.split()
+            if len(fields) < 3:
+                pending = fields
+                continue
+
+            pending = []
+            yield tuple(fields[:3])
+            count += 1
+
+            if limit is not None and count >= limit:
+                return
+
+    @staticmethod
+    @invalidates("package")
     def uninstall(package: str, sudo_password: str = None) -> bool:
 
         """
@@ -67,6 +103,7 @@ class Dnf:
         return False
 
     @staticmethod
+    @invalidates("package")
     def update(sudo_password: str = None) -> bool:
 
         """
@@ -1,4 +1,5 @@
-from ..centos import *
+from .. import ENCODING, execute_command_run
+from ..cache import cached, invalidates
 
 
 class NetworkManager:
@@ -10,6 +11,7 @@ class NetworkManager:
     """
 
     @staticmethod
+    @cached("nmcli", ttl=10.0)
     def get_connection_id(ifc: str, sudo_password: str = None) -> str | None:
 
         """
@@ -29,6 +31,7 @@ class NetworkManager:
         return None
 
     @staticmethod
+    @cached("nmcli", ttl=10.0)
     def get_interface_zone(ifc: str, sudo_password: str = None) -> str | None:
 
         """
@@ -50,6 +53,7 @@ class NetworkManager:
         return None
 
     @staticmethod
+    @invalidates("nmcli")
     def ifc_up(ifc: str, sudo_password: str = None) -> bool:
 
         """
@@ -69,6 +73,7 @@ class NetworkManager:
         return False
 
     @staticmethod
+    @invalidates("nmcli")
     def ifc_down(ifc: str, sudo_password: str = None) -> bool:
 
         """
@@ -92,6 +97,7 @@ class NetworkManager:
         return False
 
     @staticmethod
+    @invalidates("nmcli")
     def reload_connection(sudo_password: str = None) -> bool:
 
         """
@@ -110,6 +116,7 @@ class NetworkManager:
         return False
 
     @staticmethod
+    @invalidates("nmcli", "firewall")
     def set_interface_zone(ifc: str, zone: str, sudo_password: str = None) -> bool:
 
         """
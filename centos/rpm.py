@@ -1,4 +1,5 @@
-from ..centos import *
+from .. import ENCODING, execute_command_run, execute_command_stream
+from ..cache import cached, invalidates
 
 
 class Rpm:
@@ -29,6 +30,7 @@ class Rpm:
         return None
 
     @staticmethod
+    @invalidates("package")
     def install(package_path: str, sudo_password: str = None) -> bool:
 
         """
@@ -48,6 +50,7 @@ class Rpm:
         return False
 
     @staticmethod
+    @cached("package", ttl=30.0)
     def is_installed(package_name: str, sudo_password: str = None) -> bool:
 
         """
@@ -67,6 +70,24 @@ class Rpm:
         return False
 
     @staticmethod
+    def iter_installed(limit: int = None, sudo_password: str = None):
+
+        """
+        yield installed rpm packages as they arrive, without buffering the whole list of 'rpm -qa'.
+
+        :param limit: stop after 'limit' packages. default is no limit.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: generator of installed package names with version, e.g. 'bash-4.4.20-4.el8.x86_64'.
+        """
+
+        command_str: str = "rpm -qa"
+        yield from execute_command_stream(command_str=command_str,
+                                          sudo_password=sudo_password,
+                                          parser=lambda a: a if a != '' else None,
+                                          limit=limit)
+
+    @staticmethod
+    @invalidates("package")
     def uninstall(package_name: str, sudo_password: str = None) -> bool:
 
         """
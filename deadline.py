@@ -0,0 +1,158 @@
+import contextlib
+import contextvars
+import os
+import signal
+import subprocess
+import threading
+import time
+
+
+_deadline = contextvars.ContextVar("linux_cmd_deadline", default=None)
+_local = threading.local()
+
+
+class CommandTimeout(subprocess.CompletedProcess):
+
+    """
+    class CommandTimeout is the result of a command which was killed because its time ran out.
+    it is a subprocess.CompletedProcess with a negative returncode, so existing 'returncode == 0' checks fail.
+    """
+
+    def __init__(self, args, timeout: float, stdout: bytes = b"", stderr: bytes = b"") -> None:
+        super().__init__(args=args, returncode=-signal.SIGKILL, stdout=stdout, stderr=stderr)
+        self.timeout: float = timeout
+        self.timed_out: bool = True
+
+    def __repr__(self) -> str:
+        return f"CommandTimeout(args={self.args!r}, timeout={self.timeout!r})"
+
+
+@contextlib.contextmanager
+def deadline(seconds: float):
+
+    """
+    give a time budget to all commands executed in the 'with' block.
+    every command gets the time remaining, so a compound method such as Firewall.rule_object()
+    (dist lookup, command, reload) or Apt.uninstall() (purge, autoremove) finishes within the budget.
+    nested deadlines never extend the outer one.
+
+    e.g.
+        with deadline(60):
+            Apt.uninstall(package="vim", sudo_password=pw)
+
+    :param seconds: time budget in seconds.
+    """
+
+    expire_at: float = time.monotonic() + seconds
+    outer: float | None = _deadline.get()
+    if outer is not None:
+        expire_at = min(expire_at, outer)
+
+    token = _deadline.set(expire_at)
+    try:
+        yield expire_at
+
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> float | None:
+
+    """
+    return seconds left until the current deadline.
+
+    :return: remaining seconds, or None if there is no deadline.
+    """
+
+    expire_at: float | None = _deadline.get()
+    if expire_at is None:
+        return None
+
+    return max(0.0, expire_at - time.monotonic())
+
+
+def effective_timeout(timeout: float | None) -> float | None:
+
+    """
+    return the smaller one of timeout and the time left until the current deadline.
+
+    :param timeout: timeout of one command given by the caller.
+    :return: timeout in seconds, or None if there is no limit.
+    """
+
+    remaining: float | None = remaining_time()
+    if remaining is None:
+        return timeout
+
+    if timeout is None:
+        return remaining
+
+    return min(timeout, remaining)
+
+
+def timeout_count() -> int:
+
+    """
+    return the number of timeouts which happened in the current thread.
+    it is used to avoid caching a result which failed by a timeout.
+
+    :return: number of timeouts.
+    """
+
+    return getattr(_local, "timeouts", 0)
+
+
+def make_timeout(args, timeout: float, stdout: bytes = b"", stderr: bytes = b"") -> CommandTimeout:
+
+    """
+    make CommandTimeout and count it for the current thread.
+    """
+
+    _local.timeouts = timeout_count() + 1
+    return CommandTimeout(args=args, timeout=timeout, stdout=stdout or b"", stderr=stderr or b"")
+
+
+def kill_process_group(pid: int) -> None:
+
+    """
+    kill the process group led by pid, so children such as 'sudo' or 'dnf' under a shell are killed as well.
+
+    :param pid: process id of the group leader.
+    :return: None
+    """
+
+    try:
+        os.killpg(pid, signal.SIGKILL)
+
+    except (ProcessLookupError, PermissionError):
+        pass
+
+    return None
+
+
+def run_with_timeout(args, stdout: int, stderr: int, shell: bool, timeout: float) -> subprocess.CompletedProcess:
+
+    """
+    subprocess.run() which kills the whole process group on timeout and returns CommandTimeout.
+
+    :param args: command built by build_command().
+    :param stdout: set where the result will be stored.
+    :param stderr: set where the error will be stored.
+    :param shell: set the 'shell' options for subprocess.Popen()
+    :param timeout: seconds until the command is killed.
+    :return: executed result with subprocess.CompletedProcess, or CommandTimeout.
+    """
+
+    if timeout <= 0:
+        return make_timeout(args=args, timeout=timeout)
+
+    with subprocess.Popen(args=args, stdout=stdout, stderr=stderr, shell=shell, start_new_session=True) as process:
+        try:
+            out, err = process.communicate(timeout=timeout)
+
+        except subprocess.TimeoutExpired:
+            kill_process_group(pid=process.pid)
+            out, err = process.communicate()
+            return make_timeout(args=args, timeout=timeout, stdout=out, stderr=err)
+
+    return subprocess.CompletedProcess(args=args, returncode=process.returncode, stdout=out, stderr=err)
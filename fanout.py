@@ -0,0 +1,222 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from .deadline import deadline
+from .transport import ssh_transport, use_transport
+
+
+class HostResult:
+
+    """
+    class HostResult is the result of one call on one host.
+    an exception raised by the call is stored in 'error' instead of being raised, so one broken host
+    does not stop the others.
+    """
+
+    __slots__ = ("host", "value", "error", "elapsed")
+
+    def __init__(self, host: str, value=None, error: BaseException = None, elapsed: float = 0.0) -> None:
+        self.host: str = host
+        self.value = value
+        self.error: BaseException | None = error
+        self.elapsed: float = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f"HostResult(host={self.host!r}, error={self.error!r}, elapsed={self.elapsed:.3f})"
+
+        return f"HostResult(host={self.host!r}, value={self.value!r}, elapsed={self.elapsed:.3f})"
+
+
+class FanOutExecutor:
+
+    """
+    class FanOutExecutor runs wrapper calls such as Service.is_running() on many hosts in parallel.
+    each call is executed in a worker thread with the transport of its host, so the wrapper classes
+    work without any change.
+
+    - max_workers limits the number of calls running at once over all hosts.
+    - per_host_limit limits the number of calls running at once on one host. calls over the limit wait
+      in the queue of the host without holding a worker thread.
+
+    e.g.
+        with FanOutExecutor(max_workers=32) as executor:
+            for result in executor.map(hosts, Service.is_running, service="sshd"):
+                print(result.host, result.value if result.ok else result.error)
+    """
+
+    def __init__(self, max_workers: int = 16, per_host_limit: int = 1, transport_factory=ssh_transport,
+                 timeout: float = None) -> None:
+
+        """
+        :param max_workers: number of calls running at once over all hosts.
+        :param per_host_limit: number of calls running at once on one host.
+        :param transport_factory: callable(host) returning the transport of the host. default is ssh_transport().
+                                  a transport object given as a host is used as it is.
+        :param timeout: time budget of one call in seconds. it works as 'with deadline(timeout)'.
+        """
+
+        self.max_workers: int = max_workers
+        self.per_host_limit: int = max(1, per_host_limit)
+        self.transport_factory = transport_factory
+        self.timeout: float | None = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="linux_cmd_fanout")
+        self._lock = threading.Lock()
+        self._pending: dict = {}
+        self._active: dict = {}
+        self._closed: bool = False
+
+    def submit(self, host, func, *args, **kwargs) -> Future:
+
+        """
+        schedule func(*args, **kwargs) on host.
+
+        :param host: host name, or transport object.
+        :param func: function or static method of the wrapper classes.
+        :return: Future which is resolved with HostResult. it never raises the exception of func.
+                 a call which is not started before close() is resolved with CancelledError as its error.
+        """
+
+        future: Future = Future()
+        transport = host if hasattr(host, "wrap") else self.transport_factory(host)
+
+        # the call may be started later from another worker thread, so the context of the caller,
+        # e.g. its deadline, is captured here.
+        context: contextvars.Context = contextvars.copy_context()
+
+        with self._lock:
+            if self._closed:
+                future.set_result(HostResult(host=transport.name, error=CancelledError()))
+                return future
+
+            self._pending.setdefault(transport.name, deque()).append((context, future, transport, func, args, kwargs))
+
+        self._pump(name=transport.name)
+        return future
+
+    def map(self, hosts: list, func, *args, **kwargs):
+
+        """
+        run func(*args, **kwargs) on every host and yield HostResult in the order of completion.
+
+        :param hosts: list of host names or transport objects.
+        :param func: function or static method of the wrapper classes.
+        :return: generator of HostResult.
+        """
+
+        done: deque = deque()
+        ready = threading.Condition()
+
+        def notify(future: Future) -> None:
+            with ready:
+                done.append(future.result())
+                ready.notify()
+
+        futures: list = [self.submit(host, func, *args, **kwargs) for host in hosts]
+        for future in futures:
+            future.add_done_callback(notify)
+
+        for _ in range(len(futures)):
+            with ready:
+                while not done:
+                    ready.wait()
+                result: HostResult = done.popleft()
+
+            yield result
+
+    def close(self) -> None:
+
+        """
+        cancel the queued calls, wait for the running calls and stop the worker threads.
+        the futures of the cancelled calls are resolved with CancelledError as their error.
+
+        :return: None
+        """
+
+        with self._lock:
+            self._closed = True
+            cancelled: list = [entry for queued in self._pending.values() for entry in queued]
+            self._pending.clear()
+
+        for context, future, transport, func, args, kwargs in cancelled:
+            future.set_result(HostResult(host=transport.name, error=CancelledError()))
+
+        self._executor.shutdown(wait=True)
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _pump(self, name: str) -> None:
+        with self._lock:
+            # after close() the queues are cancelled and the executor does not accept new calls.
+            if self._closed:
+                return None
+
+            queued: deque = self._pending.get(name)
+            while queued and self._active.get(name, 0) < self.per_host_limit:
+                self._active[name] = self._active.get(name, 0) + 1
+                context, future, transport, func, args, kwargs = queued.popleft()
+                self._executor.submit(context.run, self._call, future, transport, func, args, kwargs)
+
+            if not queued:
+                self._pending.pop(name, None)
+
+        return None
+
+    def _call(self, future: Future, transport, func, args: tuple, kwargs: dict) -> None:
+        started: float = time.perf_counter()
+
+        try:
+            with use_transport(transport):
+                if self.timeout is None:
+                    value = func(*args, **kwargs)
+
+                else:
+                    with deadline(self.timeout):
+                        value = func(*args, **kwargs)
+
+            result: HostResult = HostResult(host=transport.name, value=value, elapsed=time.perf_counter() - started)
+
+        except Exception as e:
+            result: HostResult = HostResult(host=transport.name, error=e, elapsed=time.perf_counter() - started)
+
+        with self._lock:
+            self._active[transport.name] -= 1
+
+        # the result is set first, so the caller gets it even if the next call of the host cannot be started.
+        future.set_result(result)
+        self._pump(name=transport.name)
+
+
+def fan_out(hosts: list, func, *args, max_workers: int = 16, per_host_limit: int = 1,
+            transport_factory=ssh_transport, timeout: float = None, **kwargs):
+
+    """
+    run func(*args, **kwargs) on every host and yield HostResult in the order of completion.
+
+    e.g.
+        for result in fan_out(["web1", "web2"], Apt.is_installed, package="nginx"):
+            ...
+
+    :param hosts: list of host names or transport objects.
+    :param func: function or static method of the wrapper classes.
+    :param max_workers: number of calls running at once over all hosts.
+    :param per_host_limit: number of calls running at once on one host.
+    :param transport_factory: callable(host) returning the transport of the host. default is ssh_transport().
+    :param timeout: time budget of one call in seconds.
+    :return: generator of HostResult.
+    """
+
+    with FanOutExecutor(max_workers=max_workers, per_host_limit=per_host_limit,
+                        transport_factory=transport_factory, timeout=timeout) as executor:
+        yield from executor.map(hosts, func, *args, **kwargs)
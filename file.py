@@ -1,4 +1,79 @@
-from .__init__ import ENCODING, execute_command_run
+import os
+import shlex
+import stat
+from . import ENCODING, execute_command_run, execute_command_stream
+from .transport import get_transport
+
+
+# type names of get_path_type() by the file type bits of st_mode.
+PATH_TYPES: dict = {
+    stat.S_IFREG: "file",
+    stat.S_IFDIR: "directory",
+    stat.S_IFLNK: "link",
+}
+
+# 'tar' options of the compressions.
+TAR_FLAGS: dict = {
+    None: "-c",
+    "gzip": "-cz",
+    "xz": "-cJ",
+    "zstd": "--zstd -c",
+}
+
+# 'find -type' letters of the path types.
+FIND_TYPES: dict = {
+    "file": "f",
+    "directory": "d",
+    "link": "l",
+}
+
+
+def _is_native(sudo_password: str = None) -> bool:
+
+    """
+    return bool whether the file operation can be done in this process or not.
+    without sudo on this host, os functions are used instead of executing commands.
+    """
+
+    return sudo_password is None and not get_transport().remote
+
+
+def _build_find_command(path: str, name: str, regex: str, file_type: str, exclude, prune, max_depth: int,
+                        xdev: bool) -> str:
+
+    """
+    build the 'find' command which works as FileSystem.search() for sudo or remote hosts.
+    """
+
+    def globs(patterns) -> str:
+        patterns = [patterns] if isinstance(patterns, str) else patterns
+        tests: list = [f"-{'path' if '/' in pattern else 'name'} {shlex.quote(pattern.rstrip('/') or '/')}"
+                       for pattern in patterns]
+        return "\\( " + " -o ".join(tests) + " \\)"
+
+    command_str: str = f"find {shlex.quote(path)}"
+    if max_depth is not None:
+        command_str += f" -maxdepth {int(max_depth)}"
+
+    if xdev:
+        command_str += " -xdev"
+
+    if exclude:
+        command_str += f" {globs(exclude)} -prune -o"
+
+    if prune:
+        command_str += f" \\( -type d {globs(prune)} -prune -o -true \\)"
+
+    if file_type is not None:
+        command_str += f" -type {FIND_TYPES.get(file_type, file_type)}"
+
+    if name is not None:
+        command_str += f" -name {shlex.quote(name)}"
+
+    if regex is not None:
+        command_str += f" -regextype posix-extended -regex {shlex.quote(f'.*({regex}).*')}"
+
+    return command_str + " -print"
 
 
 class FileSystem:
@@ -21,6 +96,18 @@ class FileSystem:
         :return: bool whether symlink is created successfully or not.
         """
 
+        if _is_native(sudo_password=sudo_password):
+            # same as 'ln -s', the link is created in link_path if it is a folder.
+            if os.path.isdir(link_path):
+                link_path = os.path.join(link_path, os.path.basename(target_path.rstrip("/")))
+
+            try:
+                os.symlink(target_path, link_path)
+                return True
+
+            except OSError:
+                return FileSystem.is_path_exist(path=link_path)
+
         command_str: str = f"ln -s {target_path} {link_path}"
         cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
 
@@ -40,6 +127,14 @@ class FileSystem:
         :return: bool whether the path exist or not.
         """
 
+        if _is_native(sudo_password=sudo_password):
+            try:
+                os.lstat(path)
+                return True
+
+            except (OSError, ValueError):
+                return False
+
         command_str: str = f"ls -lhd {path}"
         cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
 
@@ -53,6 +148,7 @@ class FileSystem:
 
         """
         return file contents in string format.
+        for a large file, see read_bytes(), iter_lines() and tail() which do not read the whole file.
 
         :param path: set the file path.
         :param sudo_password: if you need sudo, set the sudo password.
@@ -62,14 +158,35 @@ class FileSystem:
         if FileSystem.get_path_type(path=path) != "file":
             return None
 
-        command_str: str = f"cat {path}"
-        cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
+        if _is_native(sudo_password=sudo_password):
+            try:
+                with open(path, "rb") as f:
+                    return f.read().decode(ENCODING).rstrip("\n")
 
-        if cp.returncode == 0:
-            return cp.stdout.decode(ENCODING).rstrip("\n")
+            except OSError:
+                return None
+
+        contents: bytes | None = FileSystem.read_bytes(path=path, sudo_password=sudo_password)
+        if contents is not None:
+            return contents.decode(ENCODING).rstrip("\n")
 
         return None
 
+    @staticmethod
+    def build_index(path: str = "/", index_dir: str = None) -> bool:
+
+        """
+        build or refresh the filename index of path, which is used by get_path_with_name() with max_age.
+        only the folders changed since the last refresh are read again.
+
+        :param path: root of the index. default value is '/'.
+        :param index_dir: directory of the index file. default is '~/.cache/linux_cmd'.
+        :return: bool whether the index is built or not.
+        """
+
+        from .index import get_index
+        return get_index(root=path, index_dir=index_dir).refresh()
+
     @staticmethod
     def get_list_on_path(path: str, sudo_password: str = None) -> list | None:
 
@@ -107,6 +224,13 @@ class FileSystem:
             "": "non-file"
         }
 
+        if _is_native(sudo_password=sudo_password):
+            try:
+                return PATH_TYPES.get(stat.S_IFMT(os.lstat(path).st_mode))
+
+            except (OSError, ValueError):
+                return None
+
         command_str: str = f"ls -lhd {path}"
         cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
 
@@ -123,18 +247,42 @@ class FileSystem:
         return None
 
     @staticmethod
-    def get_path_with_name(name: str, path: str = "/", sudo_password: str = None) -> list | None:
+    def get_path_with_name(name: str, path: str = "/", sudo_password: str = None, max_age: float = None) -> list | None:
 
         """
-        find specific file or folder name and get the file's path with 'find' command and option '-name'.
+        find specific file or folder name and get the file's path, same as 'find' command with option '-name'.
+        without sudo on this host, the directories are read in parallel threads instead of executing 'find',
+        and '/proc', '/sys' and '/dev' are not searched. unreadable folders are skipped.
         if you want to get an absolute path, please set the search_path as absolute.
 
+        with max_age, the filename index of path is used instead of searching the tree. see index.FileIndex.
+        the index is built on the first call, and it is refreshed when it is older than max_age seconds.
+        if the index cannot be built, the tree is searched.
+
         :param name: set file or folder name.
         :param path: set the path of file or folder with name. default value is '/'.
         :param sudo_password: if you need sudo, set the sudo password.
+        :param max_age: seconds the result of the index can be stale. default is None, which does not use the index.
         :return: list value which contains the result of 'find' command.
         """
 
+        if _is_native(sudo_password=sudo_password):
+            if not os.path.lexists(path):
+                return None
+
+            if max_age is not None:
+                from .index import get_index
+                paths: list | None = get_index(root=path).lookup(name=name, max_age=max_age)
+                if paths is not None:
+                    # the index keeps absolute paths. they are given back under the prefix of the caller,
+                    # as the search does.
+                    root: str = os.path.abspath(path)
+                    start: int = len(root.rstrip("/")) + 1
+                    return [path if found == root else os.path.join(path, found[start:]) for found in paths]
+
+            from .walk import Walker
+            return list(Walker(path=path, name=name))
+
         command_str: str = f"find {path} -name {name}"
         cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
 
@@ -143,6 +291,106 @@ class FileSystem:
 
         return None
 
+    @staticmethod
+    def iter_list_on_path(path: str, limit: int = None, sudo_password: str = None):
+
+        """
+        generator version of get_list_on_path(). yield the file and folder names in specific path as they arrive.
+
+        :param path: set the path you want to get a file or folder list.
+        :param limit: stop after 'limit' names. default is no limit.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: generator of file and folder names in path.
+        """
+
+        command_str: str = f"ls {path}"
+        yield from execute_command_stream(command_str=command_str,
+                                          sudo_password=sudo_password,
+                                          parser=lambda a: a if a != '' else None,
+                                          limit=limit)
+
+    @staticmethod
+    def iter_path_with_name(name: str, path: str = "/", limit: int = None, sudo_password: str = None):
+
+        """
+        generator version of get_path_with_name(). yield the paths as they are found.
+        the search is stopped as soon as the iteration stops, e.g. with limit=1 to get only the first match.
+
+        :param name: set file or folder name.
+        :param path: set the path of file or folder with name. default value is '/'.
+        :param limit: stop after 'limit' paths. default is no limit.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: generator of paths found by 'find' command.
+        """
+
+        if _is_native(sudo_password=sudo_password):
+            from .walk import Walker
+            yield from Walker(path=path, name=name).iter(limit=limit)
+            return
+
+        command_str: str = f"find {path} -name {name}"
+        yield from execute_command_stream(command_str=command_str,
+                                          sudo_password=sudo_password,
+                                          parser=lambda a: a if a != '' else None,
+                                          limit=limit)
+
+    @staticmethod
+    def iter_chunks(path: str, chunk_size: int = 1 << 20, offset: int = 0, length: int = None,
+                    sudo_password: str = None):
+
+        """
+        yield the file contents in bytes chunks, so only one chunk is held in memory at once.
+        with sudo or on a remote host, the chunks are read from the stdout of 'dd' as they arrive.
+
+        :param path: set the file path.
+        :param chunk_size: size of a chunk in bytes. default is 1MiB.
+        :param offset: start position in bytes.
+        :param length: number of bytes to read. default is until the end of the file.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: generator of bytes.
+        """
+
+        from .reader import iter_command_chunks, iter_file_chunks
+
+        if _is_native(sudo_password=sudo_password):
+            try:
+                yield from iter_file_chunks(path=path, offset=offset, length=length, chunk_size=chunk_size)
+
+            except OSError:
+                pass
+
+            return
+
+        yield from iter_command_chunks(path=path, offset=offset, length=length, chunk_size=chunk_size,
+                                       sudo_password=sudo_password)
+
+    @staticmethod
+    def iter_lines(path: str, binary: bool = False, limit: int = None, sudo_password: str = None):
+
+        """
+        yield the lines of the file without line feed. the file is read in chunks, so the memory does not grow
+        with the size of the file. a line longer than 64KiB is yielded in pieces.
+
+        :param path: set the file path.
+        :param binary: yield bytes instead of string.
+        :param limit: stop after 'limit' lines. default is no limit.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: generator of lines.
+        """
+
+        if limit is not None and limit <= 0:
+            return
+
+        from .reader import split_lines
+
+        count: int = 0
+        for line in split_lines(chunks=FileSystem.iter_chunks(path=path, sudo_password=sudo_password)):
+            yield line if binary else line.decode(ENCODING, errors="replace")
+
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
     @staticmethod
     def make_folder(path: str, parents: bool = False, sudo_password: str = None) -> bool:
 
@@ -155,6 +403,18 @@ class FileSystem:
         :return: bool whether the folder is successfully created or not.
         """
 
+        if _is_native(sudo_password=sudo_password):
+            try:
+                if parents:
+                    os.makedirs(path, exist_ok=True)
+                else:
+                    os.mkdir(path)
+
+            except (OSError, ValueError):
+                return False
+
+            return True
+
         command_str = "mkdir "
         if parents:
             command_str += "-p "
@@ -169,48 +429,214 @@ class FileSystem:
         return False
 
     @staticmethod
-    def set_file_contents(path: str, contents: str, sudo_password: str = None) -> bool:
+    def read_bytes(path: str, offset: int = 0, length: int = None, sudo_password: str = None) -> bytes | None:
+
+        """
+        return the bytes of a range of the file. only the range is read, e.g. read_bytes(path, offset=1 << 30,
+        length=4096) reads 4KiB at 1GiB. the contents are not decoded, so it is safe for binary files.
+
+        :param path: set the file path.
+        :param offset: start position in bytes.
+        :param length: number of bytes to read. default is until the end of the file.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: bytes of the range, or None if the file cannot be read.
+        """
+
+        from .reader import iter_command_chunks, read_range
+
+        if _is_native(sudo_password=sudo_password):
+            try:
+                return read_range(path=path, offset=offset, length=length)
+
+            except (OSError, ValueError):
+                return None
+
+        chunks: list = []
+        reader = iter_command_chunks(path=path, offset=offset, length=length, sudo_password=sudo_password)
+
+        while True:
+            try:
+                chunks.append(next(reader))
+
+            except StopIteration as stop:
+                return b"".join(chunks) if stop.value == 0 else None
+
+    @staticmethod
+    def search(path: str,
+               name: str = None,
+               regex: str = None,
+               file_type: str = None,
+               exclude: list = None,
+               prune: list = None,
+               max_depth: int = None,
+               xdev: bool = False,
+               limit: int = None,
+               sudo_password: str = None):
+
+        """
+        search files and folders under path and yield the matched paths as they are found.
+        without sudo on this host, the directories are read in parallel threads. otherwise 'find' is executed.
+
+        e.g.
+            FileSystem.search("/var", name="*.log", prune=["/var/lib/docker"], max_depth=4, limit=10)
+
+        :param path: set the path where the search starts.
+        :param name: glob pattern of file or folder name, same as 'find -name'.
+        :param regex: regular expression searched in the full path. with 'find' it is a POSIX extended one.
+        :param file_type: 'file', 'directory' or 'link'. default is all types.
+        :param exclude: glob patterns of names, or of full paths if they contain '/', which are neither yielded nor searched.
+        :param prune: glob patterns of names or full paths of folders which are not searched. they can be yielded.
+                      default is ['/proc', '/sys', '/dev']. set an empty list to search everything.
+        :param max_depth: depth limit. files in path have depth 1.
+        :param xdev: bool for not searching folders on other filesystems.
+        :param limit: stop after 'limit' paths. default is no limit.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: generator of paths.
+        """
+
+        if prune is None:
+            from .walk import DEFAULT_PRUNE
+            prune = list(DEFAULT_PRUNE)
+
+        if _is_native(sudo_password=sudo_password):
+            from .walk import Walker
+            yield from Walker(path=path, name=name, regex=regex, file_type=file_type, exclude=exclude, prune=prune,
+                              max_depth=max_depth, xdev=xdev).iter(limit=limit)
+            return
+
+        command_str: str = _build_find_command(path=path, name=name, regex=regex, file_type=file_type,
+                                               exclude=exclude, prune=prune, max_depth=max_depth, xdev=xdev)
+        yield from execute_command_stream(command_str=command_str,
+                                          shell=True,
+                                          sudo_password=sudo_password,
+                                          parser=lambda a: a if a != '' else None,
+                                          limit=limit)
+
+    @staticmethod
+    def set_file_contents(path: str, contents: str | bytes, sudo_password: str = None, skip_unchanged: bool = False,
+                          mode: int = None) -> bool:
 
         """
         write the contents on the specific file. if file is not exist, file will be created automatically.
+        the contents are written into a temporary file which is synced and renamed over the file,
+        so a reader never sees a half-written file. a line feed is added to string contents, as 'echo' did.
+        bytes contents are written as they are.
 
         :param path: target file's path. absolute path is recommended.
-        :param contents: contents in string you want to write down in a target file.
-        :param sudo_password: if you need sudo, set the sudo password.
+        :param contents: contents in string or bytes you want to write down in a target file.
+        :param sudo_password: if you need sudo, set the sudo password. the contents are sent over stdin of sudo.
+        :param skip_unchanged: do not write the file if it already has the contents.
+        :param mode: mode of the file, e.g. 0o600. default keeps the mode of an existing file.
         :return: bool whether contents are written down on the target file well or not.
         """
 
-        command_str: str = f"echo {contents} > {path}"
-        cp = execute_command_run(command_str=command_str, sudo_password=sudo_password, shell=True)
+        return FileSystem.set_files_contents(files={path: contents},
+                                             sudo_password=sudo_password,
+                                             skip_unchanged=skip_unchanged,
+                                             mode=mode)[path]
 
-        if cp.returncode == 0:
-            return True
+    @staticmethod
+    def set_files_contents(files: dict, sudo_password: str = None, skip_unchanged: bool = False,
+                           mode: int = None) -> dict:
 
-        return False
+        """
+        write many files atomically at once, e.g. the config files of a host.
+        without sudo on this host, the files are written natively and synced in one batch.
+        with sudo or on a remote host, all files are streamed over stdin of one command.
+
+        :param files: dict of {path: contents in string or bytes}. see set_file_contents().
+        :param sudo_password: if you need sudo, set the sudo password.
+        :param skip_unchanged: do not write the files which already have the contents. they are compared by sha256.
+        :param mode: mode of the files, e.g. 0o600. default keeps the mode of existing files.
+        :return: dict of {path: bool whether contents are written down on the file well or not}
+        """
+
+        data: dict = {path: contents if isinstance(contents, bytes) else f"{contents}\n".encode(ENCODING)
+                      for path, contents in files.items()}
+
+        from .writer import write_files, write_files_privileged
+
+        if _is_native(sudo_password=sudo_password):
+            return write_files(files=data, mode=mode, skip_unchanged=skip_unchanged)
+
+        return write_files_privileged(files=data, sudo_password=sudo_password, mode=mode,
+                                      skip_unchanged=skip_unchanged)
+
+    @staticmethod
+    def tail(path: str, n: int = 10, binary: bool = False, sudo_password: str = None) -> list | None:
+
+        """
+        return the last n lines of the file without line feed, same as 'tail -n'.
+        the file is scanned backwards from its end, so a multi-GB log costs no more than a small one.
+
+        :param path: set the file path.
+        :param n: number of lines.
+        :param binary: return bytes instead of string.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: list of lines, or None if the file cannot be read.
+        """
+
+        if _is_native(sudo_password=sudo_password):
+            from .reader import tail_file
+
+            try:
+                lines: list = tail_file(path=path, n=n)
+
+            except (OSError, ValueError):
+                return None
+
+        else:
+            command_str: str = f"tail -n {int(n)} {path}"
+            cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
+
+            if cp.returncode != 0:
+                return None
+
+            lines = cp.stdout.split(b"\n")
+            if lines[-1] == b"":
+                lines.pop()
+
+        return lines if binary else [line.decode(ENCODING, errors="replace") for line in lines]
 
     @staticmethod
-    def tar_unzip(tarball_path: str, save_path: str = None, sudo_password: str = None) -> bool:
+    def tar_unzip(tarball_path: str, save_path: str = None, sudo_password: str = None, include: list = None,
+                  exclude: list = None, trusted: bool = False, progress=None) -> bool:
 
         """
-        extract tarball.
+        extract tarball. gzip, xz, bzip2 and zstd tarballs are detected automatically.
+        without sudo on this host, the tarball is extracted in this process member by member as it is read,
+        and unsafe members (outside save_path, links pointing outside, device files) stop the extraction
+        unless trusted is set. see archive.extract_archive().
 
         :param tarball_path: tarball path which you want to extract.
         :param save_path: set a path where extracted folder will be located.
                           if the path not exist, new folder will be created.
         :param sudo_password: if you need sudo, set the sudo password.
+        :param include: glob patterns of member names to extract. default is all members.
+        :param exclude: glob patterns of member names not to extract.
+        :param trusted: extract owners, special mode bits and links as they are.
+        :param progress: callable(ArchiveProgress) which receives the progress and the throughput.
         :result: bool whether the tarball is extracted successfully or not.
         """
 
-        command_str: str = f"tar -xf {tarball_path} "
-        if save_path is not None:
-            command_str += f"-C {save_path}"
-            
-            if not FileSystem.is_path_exist(path=save_path):
-                FileSystem.make_folder(path=save_path)
+        if save_path is None:
+            save_path = os.path.dirname(tarball_path) or "."
 
-        else:
-            command_str += f"-C {'/'.join(tarball_path.split('/')[:-1])}"
+        if _is_native(sudo_password=sudo_password):
+            from .archive import extract_archive
+            return extract_archive(path=tarball_path, save_path=save_path, include=include, exclude=exclude,
+                                   trusted=trusted, progress=progress)
+
+        script: str = f"mkdir -p -- {shlex.quote(save_path)} && " \
+                      f"tar -xf {shlex.quote(tarball_path)} -C {shlex.quote(save_path)}"
+        for pattern in exclude or ():
+            script += f" --exclude={shlex.quote(pattern)}"
 
+        if include:
+            script += " --wildcards " + " ".join(shlex.quote(pattern) for pattern in include)
+
+        # the whole script is given to one shell, so both mkdir and tar run with sudo.
+        command_str: str = f"sh -c {shlex.quote(script)}"
         cp = execute_command_run(command_str=command_str, sudo_password=sudo_password, shell=True)
 
         if cp.returncode == 0:
@@ -219,20 +645,49 @@ class FileSystem:
         return False
 
     @staticmethod
-    def tar_zip(list_target_file: list, save_as: str, sudo_password: str = None) -> bool:
+    def tar_zip(list_target_file: list, save_as: str, sudo_password: str = None, compression: str = None,
+                level: int = None, workers: int = None, progress=None) -> bool:
 
         """
-        create tarball.
+        create tarball. with compression, the tarball is compressed with 'gzip', 'xz' or 'zstd'.
+        without compression, it follows the suffix of save_as, e.g. '.tar.gz', or it is a plain '.tar'.
+        without sudo on this host, the tarball is created in this process and compressed in blocks on all cores.
+        see archive.create_archive(). zstd needs the optional package 'zstandard' in this case.
 
         :param list_target_file: list contains files which will be in tarball.
         :param save_as: set a path where created tarball will be located.
+                        the suffix of the compression is added if save_as does not have it,
+                        and the suffix of another compression is replaced with it.
         :param sudo_password: if you need sudo, set the sudo password.
+        :param compression: 'gzip', 'xz', 'zstd' or None.
+        :param level: compression level. default is 6 for gzip and xz, 3 for zstd.
+        :param workers: number of compressing threads. default is the number of cores.
+        :param progress: callable(ArchiveProgress) which receives the progress and the throughput.
         :result: bool whether the tarball is created successfully or not.
         """
-        if not save_as.endswith(".tar"):
-            save_as += ".tar"
 
-        command_str: str = f"tar -cvf {save_as} {' '.join(list_target_file)}"
+        from .archive import COMPRESSIONS, DEFAULT_SUFFIXES, SUFFIXES, compression_of, create_archive
+
+        if compression is None:
+            compression = compression_of(path=save_as)
+
+        if compression not in COMPRESSIONS and compression is not None:
+            return False
+
+        if compression_of(path=save_as) != compression or not save_as.endswith(tuple(SUFFIXES)):
+            # the suffix of another compression is replaced, e.g. 'q.tar.gz' with xz is saved as 'q.tar.xz'.
+            for suffix in SUFFIXES:
+                if save_as.endswith(suffix):
+                    save_as = save_as[:-len(suffix)]
+                    break
+
+            save_as += DEFAULT_SUFFIXES[compression]
+
+        if _is_native(sudo_password=sudo_password):
+            return create_archive(paths=list_target_file, save_as=save_as, compression=compression, level=level,
+                                  workers=workers, progress=progress)
+
+        command_str: str = f"tar {TAR_FLAGS[compression]}f {save_as} {' '.join(list_target_file)}"
         cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
 
         if cp.returncode == 0:
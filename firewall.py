@@ -1,5 +1,5 @@
-from .__init__ import execute_command_run, printf_colorlog, ENCODING, get_linux_dist
-from .centos.nmcli import NetworkManager
+from . import execute_command_run, printf_colorlog, ENCODING, get_linux_dist
+from .cache import cached, invalidates
 
 
 class Firewall:
@@ -11,10 +11,12 @@ class Firewall:
     """
 
     @staticmethod
+    @cached("firewall", ttl=0)
     def is_running(sudo_password: str = None) -> bool:
 
         """
         return bool whether the firewalld is running or not
+        the result is not cached unless a TTL is set with set_cache_ttl().
 
         :param sudo_password: if you need sudo, set the sudo password
         :return : bool whether the firewalld is running or not
@@ -31,6 +33,7 @@ class Firewall:
         return False
 
     @staticmethod
+    @cached("firewall", ttl=10.0)
     def get_active_zone_names(sudo_password: str = None) -> list | None:
 
         """
@@ -49,6 +52,7 @@ class Firewall:
         return None
 
     @staticmethod
+    @cached("firewall", ttl=60.0)
     def get_all_zones(sudo_password: str = None) -> list | None:
 
         """
@@ -67,6 +71,7 @@ class Firewall:
         return None
 
     @staticmethod
+    @cached("firewall", ttl=10.0)
     def get_default_zone(sudo_password: str = None) -> str | None:
 
         """
@@ -86,6 +91,7 @@ class Firewall:
         return None
 
     @staticmethod
+    @cached("firewall", ttl=10.0)
     def get_zone_interfaces(zone: str, sudo_password: str = None) -> list | None:
 
         """
@@ -105,6 +111,7 @@ class Firewall:
         return None
 
     @staticmethod
+    @invalidates("firewall")
     def rich_rule(action: str,
                   rule_action: str,
                   family: str = "ipv4",
@@ -174,6 +181,7 @@ class Firewall:
         return False
 
     @staticmethod
+    @invalidates("firewall", "nmcli")
     def rule_object(action: str,
                     obj_type: list,
                     value: str,
@@ -204,6 +212,7 @@ class Firewall:
         # removing interface with firewall-cmd command and --permanent option can not be allowed due to the SELINUX.
         if obj_type == "interface" and get_linux_dist() == "CentOS Stream 8" and permanent:
             if action == "add":
+                from .centos.nmcli import NetworkManager
                 return NetworkManager.set_interface_zone(ifc=value, zone=zone, sudo_password=sudo_password)
             return False
 
@@ -228,6 +237,7 @@ class Firewall:
         return False
 
     @staticmethod
+    @invalidates("firewall")
     def set_default_zone(zone: str, sudo_password: str = None) -> bool:
 
         """
@@ -251,6 +261,7 @@ class Firewall:
         return False
 
     @staticmethod
+    @invalidates("firewall")
     def reload(sudo_password: str = None) -> bool:
 
         """
@@ -0,0 +1,281 @@
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from .walk import DEFAULT_PRUNE
+
+
+# version 2 indexes /run, which version 1 pruned.
+INDEX_VERSION: int = 2
+
+
+def default_index_dir() -> str:
+
+    """
+    return the directory of the index files, '$XDG_CACHE_HOME/linux_cmd' or '~/.cache/linux_cmd'.
+
+    :return: path of the directory.
+    """
+
+    cache_home: str = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "linux_cmd")
+
+
+class FileIndex:
+
+    """
+    class FileIndex keeps the names of all files and folders under one root, like 'locate'.
+    the index is saved in a compressed file, so it is built only once and shared by later runs.
+
+    refresh() is incremental. the directories are stat()-ed, and only the ones whose mtime changed are read again.
+    lookup() refreshes the index first if it is older than max_age seconds, so the result is never staler than that.
+
+    e.g.
+        index = get_index("/etc")
+        index.lookup("*.conf", max_age=60)
+    """
+
+    def __init__(self, root: str, index_dir: str = None, prune: tuple = DEFAULT_PRUNE) -> None:
+
+        """
+        :param root: root of the indexed tree.
+        :param index_dir: directory of the index file. default is default_index_dir().
+        :param prune: paths which are not indexed. default is the same as Walker, so a lookup finds what a search does.
+        """
+
+        self.root: str = os.path.abspath(root)
+        self.index_dir: str = index_dir or default_index_dir()
+        self.prune: frozenset = frozenset(os.path.abspath(path) for path in prune)
+        self.built_at: float | None = None
+        self.file_path: str = os.path.join(self.index_dir,
+                                           hashlib.sha1(self.root.encode()).hexdigest() + ".json.z")
+        self._lock = threading.RLock()
+        # directory -> [mtime_ns, names of entries, names of subdirectories]
+        self._directories: dict = {}
+        # name -> set of directories which have it
+        self._names: dict = {}
+        self._loaded: bool = False
+
+    @property
+    def age(self) -> float | None:
+
+        """
+        :return: seconds since the last refresh, or None if the index is not built.
+        """
+
+        return None if self.built_at is None else time.time() - self.built_at
+
+    def lookup(self, name: str, max_age: float = None) -> list | None:
+
+        """
+        return the paths of files and folders with name. glob patterns such as '*.conf' are also available.
+
+        :param name: file or folder name, or its glob pattern.
+        :param max_age: refresh the index first if it is older than max_age seconds. None means no refresh
+                        once the index is built.
+        :return: list of paths, or None if the index cannot be built.
+        """
+
+        with self._lock:
+            self.load()
+            if self.built_at is None or (max_age is not None and self.age > max_age):
+                if not self.refresh():
+                    return None
+
+            if any(char in name for char in "*?["):
+                names: list = fnmatch.filter(self._names, name)
+            else:
+                names = [name] if name in self._names else []
+
+            paths: list = [os.path.join(directory, found) for found in names for directory in self._names[found]]
+            if fnmatch.fnmatchcase(os.path.basename(self.root) or self.root, name):
+                paths.insert(0, self.root)
+
+            return paths
+
+    def refresh(self) -> bool:
+
+        """
+        update the index with the current tree and save it. only the directories whose mtime changed are read.
+
+        :return: bool whether the index is updated or not.
+        """
+
+        with self._lock:
+            self.load()
+            if not os.path.isdir(self.root):
+                return False
+
+            started_at: float = time.time()
+            previous: dict = self._directories
+            directories: dict = {}
+            changed: bool = False
+            stack: list = [self.root]
+
+            while stack:
+                directory: str = stack.pop()
+                try:
+                    mtime: int = os.lstat(directory).st_mtime_ns
+
+                except OSError:
+                    continue
+
+                record: list | None = previous.get(directory)
+                if record is None or record[0] != mtime:
+                    names, subdirectories = self._read(directory=directory)
+                    self._update_names(directory=directory,
+                                       old=() if record is None else record[1],
+                                       new=names)
+                    record = [mtime, names, subdirectories]
+                    changed = True
+
+                directories[directory] = record
+                stack.extend(os.path.join(directory, name) for name in record[2])
+
+            for directory in previous.keys() - directories.keys():
+                self._update_names(directory=directory, old=previous[directory][1], new=())
+                changed = True
+
+            self._directories = directories
+            self.built_at = started_at
+            if changed or not self._touch():
+                self.save()
+
+            return True
+
+    def load(self) -> bool:
+
+        """
+        load the index file once. a missing or broken file is ignored and the index is built again.
+
+        :return: bool whether the index file is loaded or not.
+        """
+
+        with self._lock:
+            if self._loaded:
+                return self.built_at is not None
+
+            self._loaded = True
+            try:
+                with open(self.file_path, "rb") as file:
+                    data: dict = json.loads(zlib.decompress(file.read()))
+                    built_at: float = os.fstat(file.fileno()).st_mtime
+
+            except (OSError, ValueError, zlib.error):
+                return False
+
+            if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+                return False
+
+            self._directories = data["directories"]
+            self._names = {}
+            for directory, record in self._directories.items():
+                self._update_names(directory=directory, old=(), new=record[1])
+
+            self.built_at = built_at
+            return True
+
+    def save(self) -> bool:
+
+        """
+        write the index file. the file is replaced atomically, so a reader never sees a half-written index.
+        the time of the last refresh is kept as the mtime of the file.
+
+        :return: bool whether the index file is written or not.
+        """
+
+        with self._lock:
+            data: bytes = zlib.compress(json.dumps({"version": INDEX_VERSION,
+                                                    "root": self.root,
+                                                    "directories": self._directories},
+                                                   separators=(",", ":")).encode())
+            temp_path: str = f"{self.file_path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(self.index_dir, mode=0o700, exist_ok=True)
+                with open(temp_path, "wb") as file:
+                    file.write(data)
+
+                os.utime(temp_path, (self.built_at, self.built_at))
+                os.replace(temp_path, self.file_path)
+
+            except OSError:
+                try:
+                    os.unlink(temp_path)
+
+                except OSError:
+                    pass
+
+                return False
+
+            return True
+
+    def _touch(self) -> bool:
+
+        # nothing changed, so only the time of the refresh is saved instead of writing the whole index again.
+        try:
+            os.utime(self.file_path, (self.built_at, self.built_at))
+
+        except OSError:
+            return False
+
+        return True
+
+    def _read(self, directory: str) -> tuple:
+        names: list = []
+        subdirectories: list = []
+
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    names.append(entry.name)
+                    try:
+                        if entry.is_dir(follow_symlinks=False) and entry.path not in self.prune:
+                            subdirectories.append(entry.name)
+
+                    except OSError:
+                        continue
+
+        except OSError:
+            pass
+
+        return names, subdirectories
+
+    def _update_names(self, directory: str, old, new) -> None:
+        new_names: set = set(new)
+        for name in old:
+            if name not in new_names:
+                directories: set | None = self._names.get(name)
+                if directories is not None:
+                    directories.discard(directory)
+                    if not directories:
+                        del self._names[name]
+
+        for name in new_names:
+            self._names.setdefault(name, set()).add(directory)
+
+
+_indexes: dict = {}
+_lock = threading.Lock()
+
+
+def get_index(root: str, index_dir: str = None) -> FileIndex:
+
+    """
+    return the shared FileIndex of root. the index is loaded or built on its first lookup.
+
+    :param root: root of the indexed tree.
+    :param index_dir: directory of the index file. default is default_index_dir().
+    :return: FileIndex.
+    """
+
+    key: tuple = (os.path.abspath(root), index_dir)
+    with _lock:
+        index: FileIndex | None = _indexes.get(key)
+        if index is None:
+            index = FileIndex(root=root, index_dir=index_dir)
+            _indexes[key] = index
+
+    return index
@@ -0,0 +1,318 @@
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+
+
+COLOR_CODE: dict = {
+    "white": "\033[0m",
+    "gray": "\033[30m",
+    "red": "\033[31m",
+    "b_red": "\033[1;31m",
+    "green": "\033[32m",
+    "b_green": "\033[1;32m",
+    "yellow": "\033[33m",
+    "b_yellow": "\033[1;33m",
+    "blue": "\033[34m",
+    "b_blue": "\033[1;34m",
+    "purple": "\033[35m",
+    "b_purple": "\033[1;35m",
+    "turquoise": "\033[36m",
+    "b_turquoise": "\033[36m"
+}
+
+
+def render(text: str, color: str = "white", use_color: bool = True) -> str:
+
+    """
+    render the color markup of printf_colorlog(). the part between '<' and '>' is highlighted with color.
+    if '>' is missing, the highlight lasts until the end of the text.
+
+    :param text: text with '<' and '>' markup.
+    :param color: color name in COLOR_CODE.
+    :param use_color: if it is False, the markup is removed without adding color codes.
+    :return: rendered text.
+    """
+
+    if "<" in text and ">" not in text:
+        text += ">"
+
+    if not use_color:
+        return text.replace("<", "").replace(">", "")
+
+    return text.replace("<", COLOR_CODE[color]).replace(">", COLOR_CODE["white"])
+
+
+class LogRecord:
+
+    """
+    class LogRecord holds one log line before it is written by sinks.
+    """
+
+    __slots__ = ("created", "text", "color", "end")
+
+    def __init__(self, text: str, color: str = "white", end: str = "\n") -> None:
+        self.created: float = time.time()
+        self.text: str = text
+        self.color: str = color
+        self.end: str = end
+
+
+class TTYSink:
+
+    """
+    class TTYSink writes records to a terminal stream with color.
+    color is used only when the stream is a terminal, unless 'color' is set explicitly.
+    """
+
+    def __init__(self, stream=None, color: bool = None) -> None:
+        self.stream = stream
+        self.color: bool | None = color
+
+    def write(self, records: list) -> None:
+        stream = self.stream if self.stream is not None else sys.stdout
+        use_color: bool = self.color if self.color is not None else stream.isatty()
+
+        stream.write("".join(render(text=record.text, color=record.color, use_color=use_color) + record.end
+                             for record in records))
+        stream.flush()
+
+    def close(self) -> None:
+        return None
+
+
+class FileSink:
+
+    """
+    class FileSink appends records to a file as plain text without color codes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, records: list) -> None:
+        self._file.write("".join(render(text=record.text, use_color=False) + record.end for record in records))
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JSONLinesSink:
+
+    """
+    class JSONLinesSink appends records to a file as JSON lines, e.g. {"time": ..., "color": ..., "message": ...}
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, records: list) -> None:
+        import json
+
+        self._file.write("".join(json.dumps({"time": record.created,
+                                             "color": record.color,
+                                             "message": render(text=record.text, use_color=False).rstrip("\n")},
+                                            ensure_ascii=False) + "\n"
+                                 for record in records))
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Logger:
+
+    """
+    class Logger renders log lines in-process and writes them to sinks.
+
+    - unbuffered (default): every line is written immediately.
+    - buffered: lines are kept in memory and written when 'buffer_size' lines are collected or flush() is called.
+    - background: lines are handed over to a writer thread, so the caller never waits for the sinks.
+    """
+
+    def __init__(self, sinks: list = None, buffered: bool = False, buffer_size: int = 64,
+                 background: bool = False) -> None:
+
+        """
+        :param sinks: list of sinks which have write(records) and close(). default is [TTYSink()].
+        :param buffered: keep lines in memory until 'buffer_size' lines are collected.
+        :param buffer_size: number of lines written at once in buffered or background mode.
+        :param background: write lines in a daemon thread.
+        """
+
+        self.sinks: list = sinks if sinks is not None else [TTYSink()]
+        self.buffered: bool = buffered
+        self.buffer_size: int = buffer_size
+        self._buffer: list = []
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+
+        if background:
+            self._queue = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._consume, name="linux_cmd_log", daemon=True)
+            self._thread.start()
+
+    def log(self, text: str, color: str = "white", end: str = "\n") -> None:
+
+        """
+        write one log line with color markup.
+
+        :param text: text with '<' and '>' markup.
+        :param color: color name in COLOR_CODE.
+        :param end: string appended after the text. default is line feed.
+        :return: None
+        """
+
+        record: LogRecord = LogRecord(text=text, color=color, end=end)
+
+        if self._queue is not None:
+            self._queue.put(record)
+            return None
+
+        if not self.buffered:
+            self._write(records=[record])
+            return None
+
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) < self.buffer_size:
+                return None
+
+            records, self._buffer = self._buffer, []
+
+        self._write(records=records)
+        return None
+
+    def flush(self) -> None:
+
+        """
+        write all buffered lines. in background mode, wait until the writer thread writes them.
+
+        :return: None
+        """
+
+        if self._queue is not None:
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait(timeout=5)
+            return None
+
+        with self._lock:
+            records, self._buffer = self._buffer, []
+
+        if records:
+            self._write(records=records)
+
+        return None
+
+    def close(self) -> None:
+
+        """
+        flush lines, stop the writer thread and close sinks.
+
+        :return: None
+        """
+
+        self.flush()
+
+        if self._queue is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._queue = None
+
+        for sink in self.sinks:
+            sink.close()
+
+        return None
+
+    def _write(self, records: list) -> None:
+        for sink in self.sinks:
+            try:
+                sink.write(records)
+
+            except (OSError, ValueError):
+                # a broken sink must not break the command which is logging.
+                pass
+
+    def _consume(self) -> None:
+        while True:
+            item = self._queue.get()
+            records: list = []
+
+            while item is not None and not isinstance(item, threading.Event):
+                records.append(item)
+                if len(records) >= self.buffer_size:
+                    break
+
+                try:
+                    item = self._queue.get_nowait()
+
+                except queue.Empty:
+                    item = False
+                    break
+
+            if records:
+                self._write(records=records)
+
+            if isinstance(item, threading.Event):
+                item.set()
+
+            elif item is None:
+                return None
+
+
+_logger: Logger = Logger()
+
+
+def get_logger() -> Logger:
+
+    """
+    return the logger used by printf_colorlog() and print_wo_change_line().
+
+    :return: Logger in use.
+    """
+
+    return _logger
+
+
+def configure_logging(sinks: list = None, buffered: bool = False, buffer_size: int = 64,
+                      background: bool = False, path: str = None, json_path: str = None) -> Logger:
+
+    """
+    replace the logger used by printf_colorlog() and print_wo_change_line().
+
+    :param sinks: list of sinks. default is [TTYSink()] plus sinks made from 'path' and 'json_path'.
+    :param buffered: keep lines in memory until 'buffer_size' lines are collected.
+    :param buffer_size: number of lines written at once in buffered or background mode.
+    :param background: write lines in a daemon thread.
+    :param path: if it is set, also write plain text lines to this file.
+    :param json_path: if it is set, also write JSON lines to this file.
+    :return: new Logger.
+    """
+
+    global _logger
+
+    if sinks is None:
+        sinks = [TTYSink()]
+        if path is not None:
+            sinks.append(FileSink(path=os.path.expanduser(path)))
+        if json_path is not None:
+            sinks.append(JSONLinesSink(path=os.path.expanduser(json_path)))
+
+    previous: Logger = _logger
+    _logger = Logger(sinks=sinks, buffered=buffered, buffer_size=buffer_size, background=background)
+    previous.close()
+    return _logger
+
+
+def _close_logger() -> None:
+    _logger.close()
+
+
+atexit.register(_close_logger)
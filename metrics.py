@@ -0,0 +1,293 @@
+import bisect
+import contextvars
+import functools
+import os
+import sys
+import threading
+
+
+# upper bounds of the latency histogram in seconds. the last bucket is +Inf.
+BUCKETS: tuple = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIX: str = "linux_cmd"
+
+# functions of the execution core. the first frame outside of these is reported as the calling method.
+_INTERNAL: set = {
+    "execute_command_run",
+    "execute_command_popen",
+    "execute_command_stream",
+    "execute_command_run_async",
+    "record_command",
+}
+
+# qualified name of the outermost running method marked with entry_point().
+_entry = contextvars.ContextVar("linux_cmd_entry_point", default=None)
+
+
+class CommandStats:
+
+    """
+    class CommandStats holds counters and a latency histogram of one label set
+    (calling method, kind of execution, sudo, shell).
+    """
+
+    __slots__ = ("calls", "failures", "seconds", "stdout_bytes", "stderr_bytes", "buckets")
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.failures: int = 0
+        self.seconds: float = 0.0
+        self.stdout_bytes: int = 0
+        self.stderr_bytes: int = 0
+        self.buckets: list = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, elapsed: float, returncode: int | None, stdout_bytes: int, stderr_bytes: int) -> None:
+        self.calls += 1
+        self.seconds += elapsed
+        self.stdout_bytes += stdout_bytes
+        self.stderr_bytes += stderr_bytes
+        self.buckets[bisect.bisect_left(BUCKETS, elapsed)] += 1
+
+        if returncode not in (0, None):
+            self.failures += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "seconds": self.seconds,
+            "stdout_bytes": self.stdout_bytes,
+            "stderr_bytes": self.stderr_bytes,
+            "buckets": dict(zip(BUCKETS + (float("inf"),), self.buckets)),
+        }
+
+
+_stats: dict = {}
+_lock = threading.Lock()
+_enabled: bool = True
+
+
+def set_metrics_enabled(enabled: bool) -> None:
+
+    """
+    turn on or off the collection of per-command metrics.
+
+    :param enabled: bool whether metrics are collected or not.
+    :return: None
+    """
+
+    global _enabled
+
+    _enabled = enabled
+    return None
+
+
+def caller_name() -> str:
+
+    """
+    return the qualified name of the method which executed the os command, e.g. 'Service.is_running'.
+    under a method marked with entry_point(), the outermost of them is returned.
+
+    :return: qualified name of the calling method, or '<unknown>'.
+    """
+
+    method: str | None = _entry.get()
+    if method is not None:
+        return method
+
+    frame = sys._getframe(1)
+
+    while frame is not None:
+        if frame.f_code.co_name not in _INTERNAL:
+            return frame.f_code.co_qualname
+
+        frame = frame.f_back
+
+    return "<unknown>"
+
+
+def entry_point(func):
+
+    """
+    decorator for a public method which executes its commands through other methods,
+    e.g. Service.is_running() through Service.get_states(). the commands are recorded as this method.
+    when marked methods call each other, the one called first is recorded.
+
+    :param func: function of the method.
+    :return: wrapped function.
+    """
+
+    name: str = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _entry.get() is not None:
+            return func(*args, **kwargs)
+
+        token = _entry.set(name)
+        try:
+            return func(*args, **kwargs)
+
+        finally:
+            _entry.reset(token)
+
+    return wrapper
+
+
+def record_command(kind: str,
+                   elapsed: float,
+                   returncode: int | None = None,
+                   stdout: bytes | int | None = None,
+                   stderr: bytes | int | None = None,
+                   sudo: bool = False,
+                   shell: bool = False,
+                   method: str = None) -> None:
+
+    """
+    record one execution of os command.
+
+    :param kind: how the command was executed. ['run', 'popen', 'stream']
+    :param elapsed: wall time in seconds. for 'popen', the time to spawn the process.
+    :param returncode: exit code of the command, or None if it is not known yet.
+    :param stdout: captured stdout or its length, or None if it was not captured.
+    :param stderr: captured stderr or its length, or None if it was not captured.
+    :param sudo: bool whether the command was executed with sudo or not.
+    :param shell: bool whether the command was executed with shell or not.
+    :param method: name of the calling method. default is found from the call stack.
+    :return: None
+    """
+
+    if not _enabled:
+        return None
+
+    if method is None:
+        method = caller_name()
+
+    key: tuple = (method, kind, sudo, shell)
+    stdout_bytes: int = _length(stdout)
+    stderr_bytes: int = _length(stderr)
+
+    with _lock:
+        stats: CommandStats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = CommandStats()
+
+        stats.observe(elapsed=elapsed, returncode=returncode, stdout_bytes=stdout_bytes, stderr_bytes=stderr_bytes)
+
+    return None
+
+
+def _length(output: bytes | int | None) -> int:
+    if isinstance(output, int):
+        return output
+
+    return len(output) if isinstance(output, bytes) else 0
+
+
+def get_metrics() -> list:
+
+    """
+    return the snapshot of collected metrics.
+
+    :return: list of dict which has 'method', 'kind', 'sudo', 'shell' and the counters, sorted by total seconds.
+    """
+
+    with _lock:
+        rows: list = [{"method": method, "kind": kind, "sudo": sudo, "shell": shell, **stats.to_dict()}
+                      for (method, kind, sudo, shell), stats in _stats.items()]
+
+    return sorted(rows, key=lambda a: a["seconds"], reverse=True)
+
+
+def reset_metrics() -> None:
+
+    """
+    remove all collected metrics.
+
+    :return: None
+    """
+
+    with _lock:
+        _stats.clear()
+
+    return None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+
+def render_prometheus() -> str:
+
+    """
+    render collected metrics in the prometheus text exposition format.
+
+    :return: metrics in string.
+    """
+
+    lines: list = [
+        f"# HELP {PREFIX}_command_duration_seconds Wall time of os commands executed by linux_cmd.",
+        f"# TYPE {PREFIX}_command_duration_seconds histogram",
+    ]
+    counters: dict = {
+        "failures": ("command_failures_total", "Commands which exited with non-zero code."),
+        "stdout_bytes": ("command_stdout_bytes_total", "Bytes of captured stdout."),
+        "stderr_bytes": ("command_stderr_bytes_total", "Bytes of captured stderr."),
+    }
+    counter_lines: dict = {name: [] for name in counters}
+
+    for row in get_metrics():
+        labels: str = (f"method=\"{_escape(row['method'])}\",kind=\"{row['kind']}\","
+                       f"sudo=\"{str(row['sudo']).lower()}\",shell=\"{str(row['shell']).lower()}\"")
+        cumulative: int = 0
+
+        for bound, count in row["buckets"].items():
+            cumulative += count
+            le: str = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{PREFIX}_command_duration_seconds_bucket{{{labels},le=\"{le}\"}} {cumulative}")
+
+        lines.append(f"{PREFIX}_command_duration_seconds_sum{{{labels}}} {row['seconds']}")
+        lines.append(f"{PREFIX}_command_duration_seconds_count{{{labels}}} {row['calls']}")
+
+        for name in counters:
+            counter_lines[name].append(f"{PREFIX}_{counters[name][0]}{{{labels}}} {row[name]}")
+
+    for name, (metric, help_text) in counters.items():
+        lines.append(f"# HELP {PREFIX}_{metric} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{metric} counter")
+        lines.extend(counter_lines[name])
+
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_textfile(path: str) -> bool:
+
+    """
+    write collected metrics to a file for the textfile collector of node_exporter.
+    the file is replaced atomically, so the collector never reads a half-written file.
+
+    :param path: path of '.prom' file, e.g. '/var/lib/node_exporter/textfile_collector/linux_cmd.prom'.
+    :return: bool whether the file is written successfully or not.
+    """
+
+    import tempfile
+
+    directory: str = os.path.dirname(os.path.abspath(path))
+
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".linux_cmd.", suffix=".prom.tmp")
+
+    except OSError:
+        return False
+
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(render_prometheus())
+
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+    except OSError:
+        os.unlink(tmp_path)
+        return False
+
+    return True
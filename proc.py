@@ -0,0 +1,828 @@
+import heapq
+import os
+import signal
+import threading
+import time
+from collections import deque
+
+
+PROC_PATH: str = "/proc"
+CLOCK_TICKS: int = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE: int = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_boot_time: float | None = None
+_mem_total: int | None = None
+_user_names: dict = {}
+
+
+def is_available() -> bool:
+
+    """
+    return bool whether /proc of this host can be read or not.
+
+    :return: bool whether /proc is available or not.
+    """
+
+    return os.path.isdir(os.path.join(PROC_PATH, "self"))
+
+
+def boot_time() -> float:
+
+    """
+    :return: boot time of this host in seconds since the epoch, from 'btime' of /proc/stat.
+    """
+
+    global _boot_time
+
+    if _boot_time is None:
+        with open(os.path.join(PROC_PATH, "stat"), "rb") as f:
+            for line in f:
+                if line.startswith(b"btime "):
+                    _boot_time = float(line.split()[1])
+                    break
+
+    return _boot_time
+
+
+def mem_total() -> int:
+
+    """
+    :return: total memory of this host in bytes, from 'MemTotal' of /proc/meminfo.
+    """
+
+    global _mem_total
+
+    if _mem_total is None:
+        with open(os.path.join(PROC_PATH, "meminfo"), "rb") as f:
+            for line in f:
+                if line.startswith(b"MemTotal:"):
+                    _mem_total = int(line.split()[1]) * 1024
+                    break
+
+    return _mem_total
+
+
+def user_name(uid: int) -> str:
+
+    """
+    :param uid: user id.
+    :return: login name of uid, or uid as string if it has no name.
+    """
+
+    name: str | None = _user_names.get(uid)
+    if name is None:
+        import pwd
+
+        try:
+            name = pwd.getpwuid(uid).pw_name
+
+        except KeyError:
+            name = str(uid)
+
+        _user_names[uid] = name
+
+    return name
+
+
+class ProcessRecord:
+
+    """
+    class ProcessRecord holds one process read from /proc/<pid>.
+    cpu times are in clock ticks, memory sizes are in bytes.
+    """
+
+    __slots__ = ("pid", "ppid", "uid", "real_uid", "comm", "state", "pgrp", "session", "tty_nr", "tpgid",
+                 "utime", "stime", "nice", "num_threads", "starttime", "vsize", "rss", "cmdline")
+
+    def __init__(self, pid: int) -> None:
+        self.pid: int = pid
+        self.ppid: int = 0
+        self.uid: int = -1
+        self.real_uid: int = -1
+        self.comm: str = ""
+        self.state: str = ""
+        self.pgrp: int = 0
+        self.session: int = 0
+        self.tty_nr: int = 0
+        self.tpgid: int = -1
+        self.utime: int = 0
+        self.stime: int = 0
+        self.nice: int = 0
+        self.num_threads: int = 1
+        self.starttime: int = 0
+        self.vsize: int = 0
+        self.rss: int = 0
+        self.cmdline: list | None = None
+
+    @property
+    def user(self) -> str:
+        return user_name(uid=self.uid)
+
+    @property
+    def cpu_time(self) -> float:
+
+        """
+        :return: user and system cpu time in seconds.
+        """
+
+        return (self.utime + self.stime) / CLOCK_TICKS
+
+    @property
+    def started_at(self) -> float:
+
+        """
+        :return: start time in seconds since the epoch.
+        """
+
+        return boot_time() + self.starttime / CLOCK_TICKS
+
+    @property
+    def command(self) -> str:
+        return " ".join(self.cmdline) if self.cmdline else f"[{self.comm}]"
+
+    @property
+    def tty(self) -> str:
+        major: int = (self.tty_nr >> 8) & 0xfff
+        minor: int = (self.tty_nr & 0xff) | ((self.tty_nr >> 12) & 0xfff00)
+
+        if 136 <= major <= 143:
+            return f"pts/{(major - 136) * 256 + minor}"
+
+        if major == 4 and minor < 64:
+            return f"tty{minor}"
+
+        return "?"
+
+    @property
+    def stat(self) -> str:
+        flags: str = self.state
+        if self.nice < 0:
+            flags += "<"
+        elif self.nice > 0:
+            flags += "N"
+        if self.session == self.pid:
+            flags += "s"
+        if self.num_threads > 1:
+            flags += "l"
+        if self.tpgid == self.pgrp:
+            flags += "+"
+
+        return flags
+
+    def to_ps_fields(self, now: float = None) -> list:
+
+        """
+        return the process in the format of 'ps -aux'.
+
+        :param now: current time in seconds since the epoch. default is time.time().
+        :return: list [USER, PID, %CPU, %MEM, VSZ, RSS, TTY, STAT, START, TIME, COMMAND]
+        """
+
+        now = time.time() if now is None else now
+        started_at: float = self.started_at
+        cpu_time: float = self.cpu_time
+        running: float = now - started_at
+        cpu_percent: float = cpu_time / running * 100 if running > 0 else 0.0
+
+        start: str = time.strftime("%H:%M" if now - started_at < 86400 else "%b%d", time.localtime(started_at))
+        minutes, seconds = divmod(int(cpu_time), 60)
+
+        # 'ps' truncates the percentages, it does not round them.
+        return [self.user,
+                str(self.pid),
+                f"{int(cpu_percent * 10) / 10:.1f}",
+                f"{int(self.rss * 1000 / mem_total()) / 10:.1f}",
+                str(self.vsize // 1024),
+                str(self.rss // 1024),
+                self.tty,
+                self.stat,
+                start,
+                f"{minutes}:{seconds:02d}",
+                self.command]
+
+    def to_ps_line(self, now: float = None) -> str:
+
+        """
+        return the process as a line of 'ps -aux'.
+        """
+
+        user, pid, cpu, mem, vsz, rss, tty, stat, start, cpu_time, command = self.to_ps_fields(now=now)
+        return (f"{user:<8} {pid:>7} {cpu:>4} {mem:>4} {vsz:>7} {rss:>6} {tty:<8} {stat:<4} "
+                f"{start:>5} {cpu_time:>6} {command}")
+
+    def __repr__(self) -> str:
+        return f"ProcessRecord(pid={self.pid}, ppid={self.ppid}, comm={self.comm!r}, state={self.state!r})"
+
+
+def read_process(pid: int, cmdline: bool = True) -> ProcessRecord | None:
+
+    """
+    read one process from /proc/<pid>/stat, /proc/<pid>/status, and /proc/<pid>/cmdline if 'cmdline' is set.
+    'uid' is the effective uid, which 'ps' shows as USER, and 'real_uid' is the real uid.
+    both are read from the 'Uid:' line of status, which is right for setuid processes as well.
+
+    :param pid: process id.
+    :param cmdline: read the command line as well.
+    :return: ProcessRecord, or None if there is no such process.
+    """
+
+    path: str = os.path.join(PROC_PATH, str(pid))
+
+    try:
+        with open(os.path.join(path, "stat"), "rb") as f:
+            data: bytes = f.read()
+
+        with open(os.path.join(path, "status"), "rb") as f:
+            real_uid, uid = _parse_uids(data=f.read())
+
+        arguments: list | None = None
+        if cmdline:
+            with open(os.path.join(path, "cmdline"), "rb") as f:
+                raw: bytes = f.read()
+            arguments = [argument.decode(errors="replace") for argument in raw.rstrip(b"\0").split(b"\0")] \
+                if raw else []
+
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+
+    record: ProcessRecord | None = _parse_stat(pid=pid, data=data, uid=uid, cmdline=arguments)
+    if record is not None:
+        record.real_uid = real_uid
+
+    return record
+
+
+def _parse_uids(data: bytes) -> tuple:
+
+    # 'Uid:' is followed by the real, effective, saved and filesystem uids.
+    start: int = data.find(b"\nUid:")
+    if start < 0:
+        return -1, -1
+
+    fields: list = data[start + 5:data.find(b"\n", start + 1)].split()
+    return int(fields[0]), int(fields[1])
+
+
+def _parse_stat(pid: int, data: bytes, uid: int, cmdline: list | None) -> ProcessRecord | None:
+
+    # comm is between the first '(' and the last ')', and it can contain spaces and parentheses.
+    start: int = data.find(b"(")
+    end: int = data.rfind(b")")
+    if start < 0 or end < 0:
+        return None
+
+    fields: list = data[end + 2:].split()
+    record: ProcessRecord = ProcessRecord(pid=pid)
+    record.comm = data[start + 1:end].decode(errors="replace")
+    record.uid = uid
+    record.state = fields[0].decode()
+    record.ppid = int(fields[1])
+    record.pgrp = int(fields[2])
+    record.session = int(fields[3])
+    record.tty_nr = int(fields[4])
+    record.tpgid = int(fields[5])
+    record.utime = int(fields[11])
+    record.stime = int(fields[12])
+    record.nice = int(fields[16])
+    record.num_threads = int(fields[17])
+    record.starttime = int(fields[19])
+    record.vsize = int(fields[20])
+    record.rss = int(fields[21]) * PAGE_SIZE
+    record.cmdline = cmdline
+    return record
+
+
+def iter_pids():
+
+    """
+    yield process ids in /proc.
+
+    :return: generator of int.
+    """
+
+    with os.scandir(PROC_PATH) as entries:
+        for entry in entries:
+            if entry.name.isdigit():
+                yield int(entry.name)
+
+
+class ProcessSet:
+
+    """
+    class ProcessSet is a result set of process queries. signals are delivered to all processes at once.
+    """
+
+    def __init__(self, records: list) -> None:
+        self.records: list = records
+
+    @property
+    def pids(self) -> list:
+        return [record.pid for record in self.records]
+
+    def filter(self, predicate) -> "ProcessSet":
+
+        """
+        :param predicate: callable(ProcessRecord) returning bool.
+        :return: ProcessSet of the processes for which predicate is True.
+        """
+
+        return ProcessSet(records=[record for record in self.records if predicate(record)])
+
+    def signal(self, sig: int, sudo_password: str = None) -> dict:
+
+        """
+        send a signal to all processes of the set.
+        a process is signalled only if it still has the same start time, so a pid reused by another process
+        after the snapshot is never signalled. signals are sent with os.kill() without executing 'kill',
+        and processes which need privilege are signalled by one 'sudo kill' if sudo_password is set.
+
+        :param sig: signal number, e.g. signal.SIGTERM.
+        :param sudo_password: if you need sudo for processes of other users, set the sudo password.
+        :return: dict of {pid: bool whether the signal was delivered or not}
+        """
+
+        delivered: dict = {}
+        denied: list = []
+
+        for record in self.records:
+            current: ProcessRecord | None = read_process(pid=record.pid, cmdline=False)
+            if current is None or current.starttime != record.starttime:
+                delivered[record.pid] = False
+                continue
+
+            try:
+                os.kill(record.pid, sig)
+                delivered[record.pid] = True
+
+            except ProcessLookupError:
+                delivered[record.pid] = False
+
+            except PermissionError:
+                delivered[record.pid] = False
+                denied.append(record.pid)
+
+        if denied and sudo_password is not None:
+            from . import execute_command_run
+
+            command_str: str = f"kill -s {int(sig)} {' '.join(str(pid) for pid in denied)}"
+            cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
+            if cp.returncode == 0:
+                delivered.update(dict.fromkeys(denied, True))
+
+        return delivered
+
+    def terminate(self, sudo_password: str = None) -> dict:
+
+        """
+        send SIGTERM to all processes of the set. see signal().
+        """
+
+        return self.signal(sig=signal.SIGTERM, sudo_password=sudo_password)
+
+    def kill(self, sudo_password: str = None) -> dict:
+
+        """
+        send SIGKILL to all processes of the set. see signal().
+        """
+
+        return self.signal(sig=signal.SIGKILL, sudo_password=sudo_password)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __bool__(self) -> bool:
+        return bool(self.records)
+
+    def __repr__(self) -> str:
+        return f"ProcessSet(pids={self.pids!r})"
+
+
+class ProcessSnapshot:
+
+    """
+    class ProcessSnapshot is the process table read from /proc at one moment, indexed by pid.
+    indexes by parent pid, uid and comm are built on first use, so any number of queries need only one scan.
+    """
+
+    def __init__(self, records: dict, taken_at: float) -> None:
+        self.records: dict = records
+        self.taken_at: float = taken_at
+        self._indexes: dict = {}
+
+    @classmethod
+    def take(cls, cmdline: bool = True) -> "ProcessSnapshot":
+
+        """
+        read all processes from /proc. processes which exit while reading are skipped.
+
+        :param cmdline: read the command lines as well.
+        :return: ProcessSnapshot.
+        """
+
+        taken_at: float = time.monotonic()
+        records: dict = {}
+        for pid in iter_pids():
+            record: ProcessRecord | None = read_process(pid=pid, cmdline=cmdline)
+            if record is not None:
+                records[pid] = record
+
+        return cls(records=records, taken_at=taken_at)
+
+    def get(self, pid: int) -> ProcessRecord | None:
+        return self.records.get(pid)
+
+    def by_parent(self, ppid: int) -> ProcessSet:
+
+        """
+        :param ppid: parent process id.
+        :return: ProcessSet of the direct children.
+        """
+
+        return self._lookup(attribute="ppid", value=ppid)
+
+    def by_user(self, user: str | int) -> ProcessSet:
+
+        """
+        :param user: login name or uid.
+        :return: ProcessSet of the processes of the user.
+        """
+
+        if isinstance(user, str) and not user.isdigit():
+            import pwd
+
+            try:
+                user = pwd.getpwnam(user).pw_uid
+
+            except KeyError:
+                return ProcessSet(records=[])
+
+        return self._lookup(attribute="uid", value=int(user))
+
+    def by_name(self, name: str) -> ProcessSet:
+
+        """
+        :param name: process name (comm), such as 'sshd'. the kernel keeps only the first 15 characters of it.
+        :return: ProcessSet of the processes with the name.
+        """
+
+        return self._lookup(attribute="comm", value=name[:15])
+
+    def matching(self, pattern: str) -> ProcessSet:
+
+        """
+        :param pattern: regular expression searched in the command line.
+        :return: ProcessSet of the processes whose command line matches the pattern.
+        """
+
+        return ProcessSet(records=list(self.records.values())).filter(_search(pattern=pattern))
+
+    def children(self, pid: int) -> ProcessSet:
+
+        """
+        :param pid: process id.
+        :return: ProcessSet of the direct children of the process.
+        """
+
+        return self.by_parent(ppid=pid)
+
+    def descendants(self, pid: int, include_self: bool = False) -> ProcessSet:
+
+        """
+        :param pid: process id, e.g. the main pid of a service.
+        :param include_self: put the process itself at the head of the result.
+        :return: ProcessSet of all children, grandchildren and so on, in breadth-first order.
+        """
+
+        index: dict = self._index(attribute="ppid")
+        found: list = [pid] if include_self and pid in self.records else []
+        queue: deque = deque([pid])
+        seen: set = {pid}
+
+        while queue:
+            for child in index.get(queue.popleft(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    found.append(child)
+                    queue.append(child)
+
+        return ProcessSet(records=[self.records[child] for child in found])
+
+    def ancestors(self, pid: int) -> ProcessSet:
+
+        """
+        :param pid: process id.
+        :return: ProcessSet of the parent, grandparent and so on up to pid 1.
+        """
+
+        found: list = []
+        record: ProcessRecord | None = self.records.get(pid)
+
+        while record is not None and record.ppid in self.records and len(found) < len(self.records):
+            record = self.records[record.ppid]
+            found.append(record)
+
+        return ProcessSet(records=found)
+
+    def query(self, name: str = None, user: str | int = None, cmdline: str = None, parent: int = None,
+              descendant_of: int = None) -> ProcessSet:
+
+        """
+        return the processes which match all given conditions.
+
+        e.g. snapshot.query(user="www-data", cmdline=r"worker")
+
+        :param name: process name (comm).
+        :param user: login name or uid.
+        :param cmdline: regular expression searched in the command line.
+        :param parent: parent process id.
+        :param descendant_of: process id of an ancestor.
+        :return: ProcessSet sorted by pid.
+        """
+
+        sets: list = []
+        if name is not None:
+            sets.append(self.by_name(name=name))
+        if user is not None:
+            sets.append(self.by_user(user=user))
+        if parent is not None:
+            sets.append(self.by_parent(ppid=parent))
+        if descendant_of is not None:
+            sets.append(self.descendants(pid=descendant_of))
+
+        pids: set = set(self.records) if not sets else set.intersection(*(set(found.pids) for found in sets))
+        records: list = [self.records[pid] for pid in sorted(pids)]
+
+        if cmdline is not None:
+            return ProcessSet(records=records).filter(_search(pattern=cmdline))
+
+        return ProcessSet(records=records)
+
+    def _index(self, attribute: str) -> dict:
+        index: dict | None = self._indexes.get(attribute)
+        if index is None:
+            index = {}
+            for record in self.records.values():
+                index.setdefault(getattr(record, attribute), []).append(record.pid)
+            self._indexes[attribute] = index
+
+        return index
+
+    def _lookup(self, attribute: str, value) -> ProcessSet:
+        return ProcessSet(records=[self.records[pid] for pid in self._index(attribute=attribute).get(value, ())])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, pid: int) -> bool:
+        return pid in self.records
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+
+def _search(pattern: str):
+    import re
+
+    regex = re.compile(pattern)
+    return lambda record: regex.search(record.command) is not None
+
+
+def read_cpu_ticks() -> tuple:
+
+    """
+    read the first line of /proc/stat.
+
+    :return: tuple of (total clock ticks of all cpus, idle clock ticks of all cpus)
+    """
+
+    with open(os.path.join(PROC_PATH, "stat"), "rb") as f:
+        fields: list = f.readline().split()[1:]
+
+    ticks: list = [int(field) for field in fields]
+    # guest times are already counted in user and nice.
+    total: int = sum(ticks[:8])
+    return total, ticks[3] + (ticks[4] if len(ticks) > 4 else 0)
+
+
+class ProcessSample:
+
+    """
+    class ProcessSample is one sample of one process taken by ProcessSampler.
+    'cpu_percent' is the cpu usage since the previous sample, where 100 means one full cpu, as 'top' shows it.
+    'rss_delta' is the change of rss in bytes since the previous sample.
+    """
+
+    __slots__ = ("pid", "comm", "at", "cpu_percent", "rss", "rss_delta")
+
+    def __init__(self, pid: int, comm: str, at: float, cpu_percent: float, rss: int, rss_delta: int) -> None:
+        self.pid: int = pid
+        self.comm: str = comm
+        self.at: float = at
+        self.cpu_percent: float = cpu_percent
+        self.rss: int = rss
+        self.rss_delta: int = rss_delta
+
+    def __repr__(self) -> str:
+        return (f"ProcessSample(pid={self.pid}, comm={self.comm!r}, cpu_percent={self.cpu_percent:.1f}, "
+                f"rss={self.rss}, rss_delta={self.rss_delta})")
+
+
+# order of the values of one sample in the history of ProcessSampler.
+_SAMPLE_FIELDS: tuple = ("at", "cpu_percent", "rss", "rss_delta")
+
+
+class ProcessSampler:
+
+    """
+    class ProcessSampler samples all processes of this host periodically, like 'top', without executing 'ps'.
+    one sample reads /proc/stat and /proc/<pid>/stat of every process, nothing else.
+
+    cost budget: the sampler uses at most 'budget' of one cpu (default 5%). the cpu time of each sample is measured,
+    and if 'cost / interval' exceeds the budget, the next sample is delayed until it does not.
+    a sample costs 15-20 us of cpu time per process (about 85 ms with 5,000 processes on a 1 vcpu VM),
+    so the default interval of 1 second is kept up to about 2,500 processes and stretched to about 1.7 seconds
+    with 5,000. 'last_cost' and 'mean_cost' show the measured cost.
+    """
+
+    def __init__(self, interval: float = 1.0, history: int = 60, budget: float = 0.05) -> None:
+
+        """
+        :param interval: seconds between samples in the background.
+        :param history: number of samples kept per process.
+        :param budget: share of one cpu which sampling may use.
+        """
+
+        self.interval: float = interval
+        self.history: int = history
+        self.budget: float = budget
+        self.samples: int = 0
+        self.last_cost: float = 0.0
+        self.total_cost: float = 0.0
+        self.system_cpu_percent: float = 0.0
+        self._last: dict = {}
+        self._histories: dict = {}
+        self._last_at: float | None = None
+        self._cpu_ticks: tuple | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def mean_cost(self) -> float:
+        return self.total_cost / self.samples if self.samples else 0.0
+
+    @property
+    def next_interval(self) -> float:
+
+        """
+        :return: seconds until the next sample, stretched to keep the cost within the budget.
+        """
+
+        return max(self.interval, self.last_cost / self.budget) if self.budget > 0 else self.interval
+
+    def sample(self) -> float:
+
+        """
+        take one sample of all processes.
+
+        :return: cpu time used by the sample in seconds.
+        """
+
+        started: float = time.thread_time()
+        now: float = time.monotonic()
+        cpu_ticks: tuple = read_cpu_ticks()
+        last: dict = self._last
+        current: dict = {}
+        ticks_per_percent: float = CLOCK_TICKS / 100
+
+        with self._lock:
+            histories: dict = self._histories
+
+            with os.scandir(PROC_PATH.encode()) as entries:
+                for entry in entries:
+                    if not entry.name.isdigit():
+                        continue
+
+                    try:
+                        fd: int = os.open(entry.path + b"/stat", os.O_RDONLY)
+                        try:
+                            data: bytes = os.read(fd, 4096)
+                        finally:
+                            os.close(fd)
+
+                    except (FileNotFoundError, ProcessLookupError):
+                        continue
+
+                    pid: int = int(entry.name)
+                    end: int = data.rfind(b")")
+                    fields: list = data[end + 2:].split(None, 22)
+                    ticks: int = int(fields[11]) + int(fields[12])
+                    starttime: int = int(fields[19])
+                    rss: int = int(fields[21]) * PAGE_SIZE
+
+                    previous: tuple | None = last.get(pid)
+                    # a pid which was reused by a new process has another start time.
+                    if previous is not None and previous[1] == starttime:
+                        elapsed: float = now - previous[3]
+                        cpu_percent: float = (ticks - previous[0]) / ticks_per_percent / elapsed if elapsed > 0 else 0.0
+                        history: deque = histories[pid]
+                        history.append((now, cpu_percent, rss, rss - previous[2]))
+                        current[pid] = (ticks, starttime, rss, now, previous[4])
+
+                    else:
+                        history = deque(maxlen=self.history)
+                        history.append((now, 0.0, rss, 0))
+                        histories[pid] = history
+                        current[pid] = (ticks, starttime, rss, now, data[data.find(b"(") + 1:end])
+
+            for pid in [pid for pid in histories if pid not in current]:
+                del histories[pid]
+
+            if self._cpu_ticks is not None:
+                total: int = cpu_ticks[0] - self._cpu_ticks[0]
+                idle: int = cpu_ticks[1] - self._cpu_ticks[1]
+                self.system_cpu_percent = (total - idle) / total * 100 if total > 0 else 0.0
+
+            self._last = current
+            self._last_at = now
+            self._cpu_ticks = cpu_ticks
+
+        self.last_cost = time.thread_time() - started
+        self.total_cost += self.last_cost
+        self.samples += 1
+        return self.last_cost
+
+    def top(self, n: int = 10, key: str = "cpu_percent") -> list:
+
+        """
+        return the processes with the largest values in the latest sample.
+
+        :param n: number of processes.
+        :param key: 'cpu_percent', 'rss' or 'rss_delta'.
+        :return: list of ProcessSample in descending order.
+        """
+
+        index: int = _SAMPLE_FIELDS.index(key)
+        with self._lock:
+            latest: list = [(pid, history[-1]) for pid, history in self._histories.items()
+                            if history[-1][0] == self._last_at]
+            found: list = heapq.nlargest(n, latest, key=lambda item: item[1][index])
+            return [self._make_sample(pid=pid, row=row) for pid, row in found]
+
+    def get_history(self, pid: int) -> list:
+
+        """
+        :param pid: process id.
+        :return: list of ProcessSample of the process, oldest first. empty if the process is not sampled.
+        """
+
+        with self._lock:
+            return [self._make_sample(pid=pid, row=row) for row in self._histories.get(pid, ())]
+
+    def _make_sample(self, pid: int, row: tuple) -> ProcessSample:
+        return ProcessSample(pid=pid, comm=self._last[pid][4].decode(errors="replace"), at=row[0],
+                             cpu_percent=row[1], rss=row[2], rss_delta=row[3])
+
+    def start(self) -> "ProcessSampler":
+
+        """
+        start sampling in a daemon thread.
+
+        :return: this sampler.
+        """
+
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="linux_cmd_sampler", daemon=True)
+            self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+
+        """
+        stop sampling in the background.
+
+        :return: None
+        """
+
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+        return None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            cost: float = self.sample()
+            self._stop.wait(max(0.0, self.next_interval - cost))
@@ -1,4 +1,7 @@
-from .__init__ import execute_command_run, ENCODING
+import time
+from . import execute_command_run, execute_command_stream, ENCODING
+from .transport import get_transport
+from . import proc
 
 
 class ProcessMonitor:
@@ -8,16 +11,139 @@ class ProcessMonitor:
 
         """
         get process information by process id.
+        on this host, the process is read from /proc/<pid> directly, without executing 'ps'.
 
         :param pid: process id which you want to see.
         :param sudo_password: if you need sudo, set the sudo password
-        :return: return the result of command 'ps -aux | grep {PSID}'
+        :return: list of the line of 'ps -aux' of the process, or None if there is no such process.
         """
 
-        command_str: str = f"ps -aux | grep {pid}"
+        if proc.is_available() and not get_transport().remote:
+            record: proc.ProcessRecord | None = proc.read_process(pid=pid)
+            return None if record is None else [record.to_ps_line()]
+
+        command_str: str = f"ps u -p {int(pid)}"
         cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
 
         if cp.returncode == 0:
-            return list(filter(lambda a: a != '', cp.stdout.decode(ENCODING).split("\n")))[:-1]
+            return list(filter(lambda a: a != '', cp.stdout.decode(ENCODING).split("\n")))[1:]
 
         return None
+
+    @staticmethod
+    def get_process(pid: int, cmdline: bool = True) -> proc.ProcessRecord | None:
+
+        """
+        read the process from /proc/<pid> of this host.
+
+        :param pid: process id which you want to see.
+        :param cmdline: read the command line as well.
+        :return: ProcessRecord, or None if there is no such process.
+        """
+
+        return proc.read_process(pid=pid, cmdline=cmdline)
+
+    @staticmethod
+    def snapshot(cmdline: bool = True) -> proc.ProcessSnapshot:
+
+        """
+        read all processes from /proc of this host at once, for bulk queries.
+
+        :param cmdline: read the command lines as well. set False to make it faster.
+        :return: ProcessSnapshot indexed by pid.
+        """
+
+        return proc.ProcessSnapshot.take(cmdline=cmdline)
+
+    @staticmethod
+    def find(name: str = None, user: str | int = None, cmdline: str = None, parent: int = None,
+             descendant_of: int = None) -> proc.ProcessSet:
+
+        """
+        find processes of this host with one scan of /proc. all given conditions have to match.
+
+        e.g.
+            ProcessMonitor.find(user="www-data", cmdline=r"php-fpm: pool").terminate()
+
+        :param name: process name (comm), such as 'nginx'.
+        :param user: login name or uid.
+        :param cmdline: regular expression searched in the command line.
+        :param parent: parent process id.
+        :param descendant_of: process id of an ancestor, e.g. the main pid of a service.
+        :return: ProcessSet which can signal all processes at once.
+        """
+
+        return proc.ProcessSnapshot.take(cmdline=cmdline is not None).query(name=name,
+                                                                           user=user,
+                                                                           cmdline=cmdline,
+                                                                           parent=parent,
+                                                                           descendant_of=descendant_of)
+
+    @staticmethod
+    def get_children(pid: int, recursive: bool = True) -> proc.ProcessSet:
+
+        """
+        return the children of the process, read from /proc without executing 'ps'.
+
+        :param pid: process id, e.g. the main pid of a service.
+        :param recursive: include grandchildren and so on.
+        :return: ProcessSet of the children.
+        """
+
+        snapshot: proc.ProcessSnapshot = proc.ProcessSnapshot.take(cmdline=False)
+        return snapshot.descendants(pid=pid) if recursive else snapshot.children(pid=pid)
+
+    @staticmethod
+    def sampler(interval: float = 1.0, history: int = 60, budget: float = 0.05) -> proc.ProcessSampler:
+
+        """
+        return a sampler which computes cpu% and rss deltas of all processes from /proc, like 'top'.
+        call start() to sample in the background, or sample() to take one sample at a time.
+
+        e.g.
+            with ProcessMonitor.sampler(interval=1.0) as sampler:
+                time.sleep(5)
+                busiest: list = sampler.top(n=5)
+
+        :param interval: seconds between samples in the background.
+        :param history: number of samples kept per process.
+        :param budget: share of one cpu which sampling may use. the interval is stretched to keep it.
+        :return: ProcessSampler.
+        """
+
+        return proc.ProcessSampler(interval=interval, history=history, budget=budget)
+
+    @staticmethod
+    def top(n: int = 10, key: str = "cpu_percent", interval: float = 0.5) -> list:
+
+        """
+        return the processes which used the most cpu (or memory) during 'interval' seconds.
+
+        :param n: number of processes.
+        :param key: 'cpu_percent', 'rss' or 'rss_delta'.
+        :param interval: seconds between the two samples.
+        :return: list of ProcessSample in descending order.
+        """
+
+        sampler: proc.ProcessSampler = proc.ProcessSampler(history=1)
+        sampler.sample()
+        time.sleep(interval)
+        sampler.sample()
+        return sampler.top(n=n, key=key)
+
+    @staticmethod
+    def iter_processes(limit: int = None, sudo_password: str = None):
+
+        """
+        yield processes from 'ps -aux' as they arrive, without buffering the whole process table.
+
+        :param limit: stop after 'limit' processes. default is no limit.
+        :param sudo_password: if you need sudo, set the sudo password
+        :return: generator of list [USER, PID, %CPU, %MEM, VSZ, RSS, TTY, STAT, START, TIME, COMMAND]
+        """
+
+        command_str: str = "ps -aux"
+        yield from execute_command_stream(command_str=command_str,
+                                          sudo_password=sudo_password,
+                                          parser=lambda a: a.split(None, 10) if not a.startswith("USER") else None,
+                                          limit=limit)
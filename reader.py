@@ -0,0 +1,214 @@
+import contextlib
+import mmap
+import shlex
+import subprocess
+import threading
+from . import execute_command_popen
+from .deadline import effective_timeout, kill_process_group
+
+
+CHUNK_SIZE: int = 1 << 20
+MAX_LINE_LENGTH: int = 65536
+
+
+@contextlib.contextmanager
+def map_file(path: str):
+
+    """
+    map the file into memory read-only. the pages are read by the kernel when they are touched,
+    so only the parts in use take memory, and they can be dropped under memory pressure.
+
+    e.g.
+        with map_file("/var/log/syslog") as data:
+            data.rfind(b"error")
+
+    :param path: file path.
+    :return: mmap, or empty bytes for an empty file which cannot be mapped.
+    """
+
+    with open(path, "rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        except ValueError:
+            yield b""
+            return
+
+        try:
+            yield data
+
+        finally:
+            data.close()
+
+
+def read_range(path: str, offset: int = 0, length: int = None) -> bytes:
+
+    """
+    read 'length' bytes from 'offset' of the file. only the range is read.
+
+    :param path: file path.
+    :param offset: start position in bytes.
+    :param length: number of bytes. None means until the end of the file.
+    :return: bytes of the range.
+    """
+
+    with open(path, "rb", buffering=0) as file:
+        file.seek(offset)
+        return file.read(-1 if length is None else length)
+
+
+def iter_file_chunks(path: str, offset: int = 0, length: int = None, chunk_size: int = CHUNK_SIZE):
+
+    """
+    yield the file in chunks of chunk_size bytes, so only one chunk is held in memory at once.
+
+    :param path: file path.
+    :param offset: start position in bytes.
+    :param length: number of bytes. None means until the end of the file.
+    :param chunk_size: size of a chunk in bytes.
+    :return: generator of bytes.
+    """
+
+    with open(path, "rb", buffering=0) as file:
+        file.seek(offset)
+        remaining: int | None = length
+
+        while remaining is None or remaining > 0:
+            chunk: bytes = file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if chunk == b"":
+                return
+
+            if remaining is not None:
+                remaining -= len(chunk)
+
+            yield chunk
+
+
+def iter_command_chunks(path: str, offset: int = 0, length: int = None, chunk_size: int = CHUNK_SIZE,
+                        sudo_password: str = None, timeout: float = None):
+
+    """
+    yield the file in chunks read from the stdout of 'dd', for sudo or remote hosts.
+    the output is consumed as it arrives instead of being buffered, and 'dd' is killed as soon as the iteration stops.
+    the generator returns the exit status of 'dd', e.g. 'status = yield from iter_command_chunks(...)'.
+
+    :param path: file path.
+    :param offset: start position in bytes.
+    :param length: number of bytes. None means until the end of the file.
+    :param chunk_size: size of a chunk in bytes.
+    :param sudo_password: if you need sudo, set the sudo password.
+    :param timeout: seconds until 'dd' is killed. default is no limit except the current deadline.
+    :return: generator of bytes.
+    """
+
+    timeout = effective_timeout(timeout)
+    if timeout is not None and timeout <= 0:
+        return None
+
+    command_str: str = f"dd if={shlex.quote(path)} bs={chunk_size} iflag=skip_bytes,count_bytes skip={offset} status=none"
+    if length is not None:
+        command_str += f" count={length}"
+
+    process = execute_command_popen(command_str=command_str,
+                                    stderr=subprocess.DEVNULL,
+                                    shell=True,
+                                    sudo_password=sudo_password,
+                                    new_session=True)
+    finished: bool = False
+    timer = None
+
+    if timeout is not None:
+        timer = threading.Timer(interval=timeout, function=kill_process_group, kwargs={"pid": process.pid})
+        timer.daemon = True
+        timer.start()
+
+    try:
+        while True:
+            chunk: bytes = process.stdout.read(chunk_size)
+            if chunk == b"":
+                finished = True
+                break
+
+            yield chunk
+
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+        if not finished and process.poll() is None:
+            kill_process_group(pid=process.pid)
+
+        process.stdout.close()
+        process.wait()
+
+    return process.returncode
+
+
+def split_lines(chunks, max_line_length: int = MAX_LINE_LENGTH):
+
+    """
+    split a stream of chunks into lines without line feed. a longer line than max_line_length is yielded in pieces,
+    so the memory stays bounded by chunk size and max_line_length whatever the file is.
+
+    :param chunks: iterable of bytes.
+    :param max_line_length: longer lines are yielded in pieces of this length.
+    :return: generator of bytes.
+    """
+
+    pending: bytes = b""
+
+    for chunk in chunks:
+        data: bytes = pending + chunk if pending else chunk
+        start: int = 0
+
+        while True:
+            end: int = data.find(b"\n", start)
+            if end == -1:
+                break
+
+            while end - start > max_line_length:
+                yield data[start:start + max_line_length]
+                start += max_line_length
+
+            yield data[start:end]
+            start = end + 1
+
+        pending = data[start:]
+        while len(pending) > max_line_length:
+            yield pending[:max_line_length]
+            pending = pending[max_line_length:]
+
+    if pending:
+        yield pending
+
+
+def tail_file(path: str, n: int = 10) -> list:
+
+    """
+    return the last n lines of the file. the file is mapped and scanned backwards from its end,
+    so the time and memory depend on the size of the lines, not of the file.
+
+    :param path: file path.
+    :param n: number of lines.
+    :return: list of bytes without line feed.
+    """
+
+    if n <= 0:
+        return []
+
+    with map_file(path) as data:
+        end: int = len(data)
+        if end == 0:
+            return []
+
+        # a line feed at the end of the file closes the last line and does not start a new one.
+        if data[end - 1:end] == b"\n":
+            end -= 1
+
+        position: int = end
+        for _ in range(n):
+            position = data.rfind(b"\n", 0, position)
+            if position == -1:
+                break
+
+        return data[position + 1:end].split(b"\n")
@@ -1,4 +1,18 @@
-from .__init__ import ENCODING, execute_command_run, printf_colorlog
+import contextvars
+import time
+from . import ENCODING, execute_command_run, execute_command_stream, printf_colorlog
+from .cache import cached, invalidate_cache, invalidates
+from .deadline import effective_timeout
+from .metrics import entry_point
+from .systemd_bus import get_dbus_backend, unit_name
+from .transport import get_transport, use_transport
+
+
+# number of units given to one 'systemctl' command of the bulk queries.
+CHUNK_SIZE: int = 200
+
+# properties read by 'systemctl show' for ServiceSnapshot.
+SNAPSHOT_PROPERTIES: tuple = ("MainPID", "UnitFileState", "StateChangeTimestampMonotonic")
 
 
 class Service:
@@ -10,46 +24,307 @@ class Service:
     """
 
     @staticmethod
+    @cached("service", ttl=0)
+    @entry_point
     def is_enabled(service: str, sudo_password: str = None) -> bool:
 
         """
         return bool whether the service is enabled or not.
+        the result is not cached unless a TTL is set with set_cache_ttl().
 
         :param service: set the linux service name which you want to see enabled or not.
         :param sudo_password: if you need sudo, set the sudo password.
         :return: bool whether the service is enabled or not.
         """
 
-        command_str: str = f"systemctl is-enabled {service}"
-        cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
-
-        if cp.returncode == 0:
-            if cp.stdout.decode(ENCODING) == "enabled\n":
-                return True
-
-        return False
+        return Service.are_enabled(services=[service], sudo_password=sudo_password)[service]
 
     @staticmethod
+    @cached("service", ttl=0)
+    @entry_point
     def is_running(service: str, sudo_password: str = None) -> bool:
 
         """
         return bool whether the service is running or not.
+        the result is not cached unless a TTL is set with set_cache_ttl().
 
         :param service: set the linux service name which you want to see running or not.
         :param sudo_password: if you need sudo, set the sudo password.
         :return: bool whether the service is running or not.
         """
 
-        command_str: str = f"systemctl is-active {service}"
-        cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
+        return Service.are_running(services=[service], sudo_password=sudo_password)[service]
 
-        if cp.returncode == 0:
-            if cp.stdout.decode(ENCODING) == "active\n":
-                return True
+    @staticmethod
+    @cached("service", ttl=0)
+    @entry_point
+    def are_enabled(services: list, sudo_password: str = None, chunk_size: int = CHUNK_SIZE) -> dict:
 
-        return False
+        """
+        return whether each service is enabled or not. the services are queried with as few
+        'systemctl is-enabled' as possible, 'chunk_size' services per command.
+        the result is not cached unless a TTL is set with set_cache_ttl().
+
+        :param services: list of the linux service names.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :param chunk_size: number of services given to one command.
+        :return: dict of {service: bool whether the service is enabled or not}
+        """
+
+        states: dict = Service.get_states(verb="is-enabled", services=services,
+                                          sudo_password=sudo_password, chunk_size=chunk_size)
+        return {service: state == "enabled" for service, state in states.items()}
 
     @staticmethod
+    @cached("service", ttl=0)
+    @entry_point
+    def are_running(services: list, sudo_password: str = None, chunk_size: int = CHUNK_SIZE) -> dict:
+
+        """
+        return whether each service is running or not. the services are queried with as few
+        'systemctl is-active' as possible, 'chunk_size' services per command.
+        the result is not cached unless a TTL is set with set_cache_ttl().
+
+        :param services: list of the linux service names.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :param chunk_size: number of services given to one command.
+        :return: dict of {service: bool whether the service is running or not}
+        """
+
+        states: dict = Service.get_states(verb="is-active", services=services,
+                                          sudo_password=sudo_password, chunk_size=chunk_size)
+        return {service: state == "active" for service, state in states.items()}
+
+    @staticmethod
+    @entry_point
+    def get_states(verb: str, services: list, sudo_password: str = None, chunk_size: int = CHUNK_SIZE) -> dict:
+
+        """
+        return the state of each service printed by 'systemctl is-active' or 'systemctl is-enabled'.
+        systemctl prints one line per unit in the given order. when it stops at a unit it cannot read
+        (e.g. 'is-enabled' of a missing unit), the state of the unit is set to None and the query goes on
+        with the next one. if systemctl cannot run at all, e.g. sudo failed, all states are None.
+
+        :param verb: 'is-active' or 'is-enabled'.
+        :param services: list of the linux service names.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :param chunk_size: number of services given to one command.
+        :return: dict of {service: state string such as 'active', 'inactive', 'enabled', or None}
+        """
+
+        states: dict = {}
+        pending: list = list(dict.fromkeys(services))
+
+        # D-Bus backend: one round trip per unit on the open connection, no process is started.
+        bus = get_dbus_backend()
+        if bus is not None and verb in ("is-active", "is-enabled"):
+            query = bus.get_active_state if verb == "is-active" else bus.get_unit_file_state
+            for service in pending:
+                states[service] = query(service)
+
+            pending = [service for service in pending if states[service] is None]
+
+        while pending:
+            chunk: list = pending[:chunk_size]
+            command_str: str = f"systemctl {verb} {' '.join(chunk)}"
+            cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
+
+            lines: list = cp.stdout.decode(ENCODING).splitlines()[:len(chunk)]
+            for service, line in zip(chunk, lines):
+                states[service] = line.strip()
+
+            if len(lines) == len(chunk) or getattr(cp, "timed_out", False):
+                for service in chunk[len(lines):]:
+                    states[service] = None
+                pending = pending[len(chunk):]
+                continue
+
+            # without any output and without a word about the first unit, systemctl itself could not run,
+            # e.g. sudo or ssh failed. the other units would fail the same way one by one, so the query stops.
+            if not lines and cp.returncode != 0 and chunk[0] not in cp.stderr.decode(ENCODING, errors="replace"):
+                for service in pending:
+                    states[service] = None
+                break
+
+            states[chunk[len(lines)]] = None
+            pending = pending[len(lines) + 1:]
+
+        return {service: states[service] for service in services}
+
+    @staticmethod
+    def plan_restart(services: list, sudo_password: str = None) -> list:
+
+        """
+        return the order in which restart_all() restarts the services.
+
+        :param services: list of the linux service names.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: list of waves. each wave is a list of services which can be restarted at the same time.
+        """
+
+        return _plan_waves(dependencies=_read_dependencies(services=services, sudo_password=sudo_password))
+
+    @staticmethod
+    def restart_all(services: list, parallelism: int = 8, skip_dependents: bool = True,
+                    sudo_password: str = None) -> "RestartReport":
+
+        """
+        restart many services in dependency order, in parallel where it is possible.
+        'After=' and 'Requires=' of the services are read at once, and the services are grouped into waves.
+        a wave starts after all services of the previous wave are restarted, and the services of one wave
+        are restarted in parallel, at most 'parallelism' at once.
+        a dependency cycle is restarted together in the last wave.
+
+        :param services: list of the linux service names.
+        :param parallelism: number of services restarted at once.
+        :param skip_dependents: do not restart services which depend on a service which failed to restart.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: RestartReport. it is True if all services were restarted.
+        """
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        started: float = time.monotonic()
+        dependencies: dict = _read_dependencies(services=services, sudo_password=sudo_password)
+        report: RestartReport = RestartReport(waves=_plan_waves(dependencies=dependencies))
+        transport = get_transport()
+        broken: set = set()
+
+        def restart(service: str, wave: int) -> UnitRestart:
+            unit_started: float = time.monotonic()
+            with use_transport(transport):
+                reason: str | None = _run_job(verb="restart", service=service, sudo_password=sudo_password)
+
+            return UnitRestart(unit=service, wave=wave, reason=reason, elapsed=time.monotonic() - unit_started)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="linux_cmd_restart") as pool:
+                for wave, targets in enumerate(report.waves):
+                    futures: list = []
+                    for service in targets:
+                        if skip_dependents and dependencies[service] & broken:
+                            report.results[service] = UnitRestart(unit=service, wave=wave, reason="dependency failed",
+                                                                  skipped=True)
+                            broken.add(service)
+                            continue
+
+                        # the deadline of the caller is also applied to the worker threads.
+                        futures.append(pool.submit(contextvars.copy_context().run, restart, service, wave))
+
+                    for future in futures:
+                        result: UnitRestart = future.result()
+                        report.results[result.unit] = result
+                        if not result.ok:
+                            broken.add(result.unit)
+                            printf_colorlog(text=f"<[ERROR] Service '{result.unit}' was not restarted.>",
+                                            color="b_red")
+                            printf_colorlog(text=f" * reason: {result.reason}", color="b_yellow")
+
+        finally:
+            invalidate_cache("service")
+
+        report.elapsed = time.monotonic() - started
+        return report
+
+    @staticmethod
+    def wait_for(service: str, state: str = "active", timeout: float = 30.0, fail_states: tuple = ("failed",),
+                 interval: float = 0.2, sudo_password: str = None) -> "WaitResult":
+
+        """
+        wait until the service reaches the active state, e.g. after Service.start().
+        see wait_for_all().
+
+        :param service: set the linux service name which you want to wait for.
+        :param state: active state to wait for, such as 'active' or 'inactive'.
+        :param timeout: seconds to wait.
+        :param fail_states: states which stop waiting at once, because the state will not be reached.
+        :param interval: seconds between polls when the D-Bus backend is not available.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: WaitResult. it is True if the state was reached.
+        """
+
+        return Service.wait_for_all(services=[service], state=state, timeout=timeout, fail_states=fail_states,
+                                    interval=interval, sudo_password=sudo_password)
+
+    @staticmethod
+    def wait_for_all(services: list, state: str = "active", timeout: float = 30.0, fail_states: tuple = ("failed",),
+                     interval: float = 0.2, sudo_password: str = None) -> "WaitResult":
+
+        """
+        wait until all services reach the active state and record every state change seen meanwhile.
+        it returns as soon as the last service reaches the state.
+
+        - with the D-Bus backend, the changes are notified by systemd, so there is no polling.
+        - otherwise it falls back to polling bounded by 'interval': one shell loop runs 'systemctl is-active'
+          for all services every 'interval' seconds and streams the states, so only one process is started
+          from python. a change is seen up to 'interval' seconds late, and a state which lasts shorter than
+          'interval' can be missed.
+
+        :param services: list of the linux service names.
+        :param state: active state to wait for, such as 'active' or 'inactive'.
+        :param timeout: seconds to wait.
+        :param fail_states: states which stop waiting at once, because the state will not be reached.
+        :param interval: seconds between polls when the D-Bus backend is not available.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: WaitResult. it is True if all services reached the state.
+        """
+
+        started: float = time.monotonic()
+        result: WaitResult = WaitResult(state=state, states=dict.fromkeys(services))
+        timeout = effective_timeout(timeout)
+
+        bus = get_dbus_backend()
+        events = None if bus is None else bus.watch_active_states(units=list(result.states), timeout=timeout)
+        if events is None:
+            events = _watch_with_systemctl(services=list(result.states), interval=interval, timeout=timeout,
+                                           sudo_password=sudo_password)
+
+        try:
+            for service, current in events:
+                if result.states[service] == current:
+                    continue
+
+                result.states[service] = current
+                result.timeline.append((round(time.monotonic() - started, 6), service, current))
+
+                if current in fail_states and current != state:
+                    break
+
+                if all(value == state for value in result.states.values()):
+                    result.reached = True
+                    break
+
+        finally:
+            events.close()
+
+        result.elapsed = time.monotonic() - started
+        return result
+
+    @staticmethod
+    def snapshot(unit_type: str = "service", properties: tuple = SNAPSHOT_PROPERTIES,
+                 sudo_password: str = None) -> "ServiceSnapshot":
+
+        """
+        load the state of all units at once and return it as ServiceSnapshot.
+        many questions such as 'all failed units' are answered in memory afterwards.
+
+        e.g.
+            snapshot = Service.snapshot()
+            failed: list = snapshot.failed()
+            snapshot.refresh()
+
+        :param unit_type: type of the units, such as 'service' or 'socket'. None means all types.
+        :param properties: properties of the loaded units read by 'systemctl show'. empty tuple skips it.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: ServiceSnapshot.
+        """
+
+        snapshot: ServiceSnapshot = ServiceSnapshot(unit_type=unit_type, properties=properties)
+        snapshot.refresh(unit_files=True, sudo_password=sudo_password)
+        return snapshot
+
+    @staticmethod
+    @invalidates("service", by="service")
     def set_disable(service: str, sudo_password: str = None) -> bool:
 
         """
@@ -60,6 +335,10 @@ class Service:
         :return: bool whether the service is disabled or not.
         """
 
+        bus = get_dbus_backend()
+        if bus is not None and bus.disable(unit=service):
+            return True
+
         command_str: str = f"systemctl disable {service}"
         cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
 
@@ -69,6 +348,7 @@ class Service:
         return False
 
     @staticmethod
+    @invalidates("service", by="service")
     def set_enable(service: str, sudo_password: str = None) -> bool:
 
         """
@@ -79,6 +359,10 @@ class Service:
         :return: bool whether the service is enabled or not.
         """
 
+        bus = get_dbus_backend()
+        if bus is not None and bus.enable(unit=service):
+            return True
+
         command_str: str = f"systemctl enable {service}"
         cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
 
@@ -88,6 +372,7 @@ class Service:
         return False
 
     @staticmethod
+    @invalidates("service", by="service")
     def start(service: str, sudo_password: str = None) -> bool:
 
         """
@@ -98,17 +383,16 @@ class Service:
         :return: bool whether the service is started successfully or not.
         """
 
-        command_str: str = f"systemctl start {service}"
-        cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
-
-        if cp.returncode == 0:
+        reason: str | None = _run_job(verb="start", service=service, sudo_password=sudo_password)
+        if reason is None:
             return True
 
         printf_colorlog(text=f"<[ERROR] Service '{service}' was not started.>", color="b_red")
-        printf_colorlog(text=f"<* reason: {cp.stderr.decode(ENCODING)}>", color="yellow")
+        printf_colorlog(text=f"<* reason: {reason}>", color="yellow")
         return False
 
     @staticmethod
+    @invalidates("service", by="service")
     def stop(service: str, sudo_password: str = None) -> bool:
 
         """
@@ -119,17 +403,16 @@ class Service:
         :return: bool whether the service is stopped successfully or not.
         """
 
-        command_str: str = f"systemctl stop {service}"
-        cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
-
-        if cp.returncode == 0:
+        reason: str | None = _run_job(verb="stop", service=service, sudo_password=sudo_password)
+        if reason is None:
             return True
 
         printf_colorlog(text=f"<[ERROR] Service '{service}' was stop but there is an error.>", color="b_red")
-        printf_colorlog(text=f"<* reason: {cp.stderr.decode(ENCODING)}>", color="b_yellow")
+        printf_colorlog(text=f"<* reason: {reason}>", color="b_yellow")
         return False
 
     @staticmethod
+    @invalidates("service", by="service")
     def restart(service: str, sudo_password: str = None) -> bool:
 
         """
@@ -140,12 +423,468 @@ class Service:
         :return: bool whether the service is restarted successfully or not.
         """
 
-        command_str: str = f"systemctl restart {service}"
-        cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
-
-        if cp.returncode == 0:
+        reason: str | None = _run_job(verb="restart", service=service, sudo_password=sudo_password)
+        if reason is None:
             return True
 
         printf_colorlog(text=f"<[ERROR] Service '{service}' was not restarted.>", color="b_red")
-        printf_colorlog(text=f" * reason: {cp.stderr.decode(ENCODING)}", color="b_yellow")
+        printf_colorlog(text=f" * reason: {reason}", color="b_yellow")
         return False
+
+
+def _run_job(verb: str, service: str, sudo_password: str = None) -> str | None:
+
+    """
+    start, stop or restart the service with the D-Bus backend, or with 'systemctl'.
+
+    :return: None if it succeeded, or the reason of the failure.
+    """
+
+    bus = get_dbus_backend()
+    result: str | None = None if bus is None else getattr(bus, verb)(unit=service)
+    if result is not None:
+        return None if result == "done" else f"job {result}"
+
+    command_str: str = f"systemctl {verb} {service}"
+    cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
+
+    if cp.returncode == 0:
+        return None
+
+    return cp.stderr.decode(ENCODING)
+
+
+class UnitRestart:
+
+    """
+    class UnitRestart is the result of one service in RestartReport.
+    """
+
+    __slots__ = ("unit", "wave", "reason", "elapsed", "skipped")
+
+    def __init__(self, unit: str, wave: int, reason: str = None, elapsed: float = 0.0, skipped: bool = False) -> None:
+        self.unit: str = unit
+        self.wave: int = wave
+        self.reason: str | None = reason
+        self.elapsed: float = elapsed
+        self.skipped: bool = skipped
+
+    @property
+    def ok(self) -> bool:
+        return self.reason is None
+
+    def __repr__(self) -> str:
+        return (f"UnitRestart(unit={self.unit!r}, wave={self.wave}, ok={self.ok}, "
+                f"elapsed={self.elapsed:.3f}, skipped={self.skipped})")
+
+
+class RestartReport:
+
+    """
+    class RestartReport is the result of Service.restart_all().
+    it is True if all services were restarted.
+    """
+
+    __slots__ = ("waves", "results", "elapsed")
+
+    def __init__(self, waves: list) -> None:
+        self.waves: list = waves
+        self.results: dict = {}
+        self.elapsed: float = 0.0
+
+    @property
+    def failed(self) -> list:
+        return [unit for unit, result in self.results.items() if not result.ok]
+
+    def __bool__(self) -> bool:
+        return not self.failed
+
+    def __repr__(self) -> str:
+        return f"RestartReport(waves={len(self.waves)}, failed={self.failed!r}, elapsed={self.elapsed:.3f})"
+
+
+class WaitResult:
+
+    """
+    class WaitResult is the result of Service.wait_for() and Service.wait_for_all().
+    it is True if the state was reached. 'timeline' is the list of (seconds since the start, service, state)
+    of every state change seen while waiting, starting with the state at the start.
+    """
+
+    __slots__ = ("state", "reached", "states", "timeline", "elapsed")
+
+    def __init__(self, state: str, states: dict) -> None:
+        self.state: str = state
+        self.reached: bool = False
+        self.states: dict = states
+        self.timeline: list = []
+        self.elapsed: float = 0.0
+
+    def __bool__(self) -> bool:
+        return self.reached
+
+    def __repr__(self) -> str:
+        return f"WaitResult(state={self.state!r}, reached={self.reached!r}, elapsed={self.elapsed:.3f})"
+
+
+class UnitRecord:
+
+    """
+    class UnitRecord holds the state of one unit in ServiceSnapshot.
+    'load' is None for a unit which has a unit file but is not loaded by systemd.
+    """
+
+    __slots__ = ("name", "load", "active", "sub", "enabled", "description", "properties")
+
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+        self.load: str | None = None
+        self.active: str = "inactive"
+        self.sub: str = "dead"
+        self.enabled: str | None = None
+        self.description: str = ""
+        self.properties: dict = {}
+
+    def __repr__(self) -> str:
+        return (f"UnitRecord(name={self.name!r}, load={self.load!r}, active={self.active!r}, "
+                f"sub={self.sub!r}, enabled={self.enabled!r})")
+
+
+class ServiceSnapshot:
+
+    """
+    class ServiceSnapshot is an in-memory index of all units, made by Service.snapshot().
+    units are indexed by name, and also by active state, sub state and enablement.
+
+    refresh() reads 'systemctl list-units' again and updates only the units whose state changed.
+    'systemctl show' is executed only for those units.
+    """
+
+    def __init__(self, unit_type: str = "service", properties: tuple = SNAPSHOT_PROPERTIES) -> None:
+        self.unit_type: str | None = unit_type
+        self.properties: tuple = tuple(properties)
+        self.records: dict = {}
+        self.by_active: dict = {}
+        self.by_sub: dict = {}
+        self.by_enabled: dict = {}
+        self.refreshed_at: float | None = None
+
+    def get(self, name: str) -> UnitRecord | None:
+
+        """
+        return the record of the unit. the suffix of the unit type can be omitted, e.g. 'sshd'.
+
+        :param name: unit name.
+        :return: UnitRecord, or None if there is no such unit.
+        """
+
+        record: UnitRecord | None = self.records.get(name)
+        if record is None and self.unit_type is not None and "." not in name:
+            record = self.records.get(f"{name}.{self.unit_type}")
+
+        return record
+
+    def with_active_state(self, state: str) -> list:
+
+        """
+        :param state: active state, such as 'active', 'inactive' or 'failed'.
+        :return: sorted list of unit names.
+        """
+
+        return sorted(self.by_active.get(state, ()))
+
+    def with_sub_state(self, state: str) -> list:
+
+        """
+        :param state: sub state, such as 'running', 'exited' or 'dead'.
+        :return: sorted list of unit names.
+        """
+
+        return sorted(self.by_sub.get(state, ()))
+
+    def with_enablement(self, state: str) -> list:
+
+        """
+        :param state: unit file state, such as 'enabled', 'disabled', 'static' or 'masked'.
+        :return: sorted list of unit names.
+        """
+
+        return sorted(self.by_enabled.get(state, ()))
+
+    def failed(self) -> list:
+
+        """
+        :return: sorted list of failed unit names.
+        """
+
+        return self.with_active_state("failed")
+
+    def enabled_but_inactive(self) -> list:
+
+        """
+        :return: sorted list of enabled units which are not active.
+        """
+
+        return sorted(self.by_enabled.get("enabled", set()) - self.by_active.get("active", set()))
+
+    def refresh(self, unit_files: bool = False, sudo_password: str = None) -> list:
+
+        """
+        read the state of the units again and update the records whose state changed.
+
+        :param unit_files: read 'systemctl list-unit-files' again to update enablement.
+        :param sudo_password: if you need sudo, set the sudo password.
+        :return: list of the unit names which were added or changed.
+        """
+
+        changed: set = set()
+
+        loaded: dict = _list_units(unit_type=self.unit_type, sudo_password=sudo_password)
+        for name, (load, active, sub, description) in loaded.items():
+            record: UnitRecord | None = self.records.get(name)
+            if record is None:
+                record = UnitRecord(name=name)
+                self.records[name] = record
+
+            elif (record.load, record.active, record.sub) == (load, active, sub):
+                continue
+
+            self._unindex(record=record)
+            record.load, record.active, record.sub, record.description = load, active, sub, description
+            self._index(record=record)
+            changed.add(name)
+
+        # units which were unloaded since the last refresh.
+        for record in self.records.values():
+            if record.load is not None and record.name not in loaded:
+                self._unindex(record=record)
+                record.load, record.active, record.sub = None, "inactive", "dead"
+                self._index(record=record)
+                changed.add(record.name)
+
+        if unit_files:
+            for name, enabled in _list_unit_files(unit_type=self.unit_type, sudo_password=sudo_password).items():
+                record: UnitRecord | None = self.records.get(name)
+                if record is None:
+                    record = UnitRecord(name=name)
+                    self.records[name] = record
+
+                elif record.enabled == enabled:
+                    continue
+
+                self._unindex(record=record)
+                record.enabled = enabled
+                self._index(record=record)
+                changed.add(name)
+
+        targets: list = sorted(name for name in changed if self.records[name].load is not None)
+        if self.properties and targets:
+            for name, values in _show(units=targets, properties=self.properties, sudo_password=sudo_password).items():
+                record: UnitRecord | None = self.records.get(name)
+                if record is None:
+                    continue
+
+                record.properties = values
+                # instances of template units have no line in 'list-unit-files'.
+                if record.enabled is None and values.get("UnitFileState"):
+                    self._unindex(record=record)
+                    record.enabled = values["UnitFileState"]
+                    self._index(record=record)
+
+        self.refreshed_at = time.monotonic()
+        return sorted(changed)
+
+    def _index(self, record: UnitRecord) -> None:
+        self.by_active.setdefault(record.active, set()).add(record.name)
+        self.by_sub.setdefault(record.sub, set()).add(record.name)
+        if record.enabled is not None:
+            self.by_enabled.setdefault(record.enabled, set()).add(record.name)
+
+    def _unindex(self, record: UnitRecord) -> None:
+        self.by_active.get(record.active, set()).discard(record.name)
+        self.by_sub.get(record.sub, set()).discard(record.name)
+        if record.enabled is not None:
+            self.by_enabled.get(record.enabled, set()).discard(record.name)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name=name) is not None
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+
+def _type_option(unit_type: str | None) -> str:
+    return "" if unit_type is None else f" --type={unit_type}"
+
+
+def _list_units(unit_type: str | None, sudo_password: str = None) -> dict:
+
+    """
+    parse 'systemctl list-units --all'.
+
+    :return: dict of {unit name: (load, active, sub, description)}
+    """
+
+    command_str: str = f"systemctl list-units --all --plain --no-legend --no-pager{_type_option(unit_type)}"
+    cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
+
+    units: dict = {}
+    if cp.returncode != 0:
+        return units
+
+    for line in cp.stdout.decode(ENCODING).splitlines():
+        fields: list = line.lstrip("\u25cf* ").split(None, 4)
+        if len(fields) < 4:
+            continue
+
+        units[fields[0]] = (fields[1], fields[2], fields[3], fields[4] if len(fields) == 5 else "")
+
+    return units
+
+
+def _list_unit_files(unit_type: str | None, sudo_password: str = None) -> dict:
+
+    """
+    parse 'systemctl list-unit-files'.
+
+    :return: dict of {unit name: unit file state}
+    """
+
+    command_str: str = f"systemctl list-unit-files --no-legend --no-pager{_type_option(unit_type)}"
+    cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
+
+    unit_files: dict = {}
+    if cp.returncode != 0:
+        return unit_files
+
+    for line in cp.stdout.decode(ENCODING).splitlines():
+        fields: list = line.split()
+        if len(fields) >= 2:
+            unit_files[fields[0]] = fields[1]
+
+    return unit_files
+
+
+def _show(units: list, properties: tuple, sudo_password: str = None) -> dict:
+
+    """
+    read properties of units with 'systemctl show', CHUNK_SIZE units per command.
+
+    :return: dict of {unit name: {property: value}}
+    """
+
+    result: dict = {}
+    option: str = ",".join(("Id",) + tuple(properties))
+
+    for i in range(0, len(units), CHUNK_SIZE):
+        command_str: str = f"systemctl show --property={option} {' '.join(units[i:i + CHUNK_SIZE])}"
+        cp = execute_command_run(command_str=command_str, sudo_password=sudo_password)
+
+        for block in cp.stdout.decode(ENCODING).split("\n\n"):
+            values: dict = dict(line.split("=", 1) for line in block.splitlines() if "=" in line)
+            name: str | None = values.pop("Id", None)
+            if name is not None:
+                result[name] = values
+
+    return result
+
+
+def _read_dependencies(services: list, sudo_password: str = None) -> dict:
+
+    """
+    read 'After=' and 'Requires=' of the services.
+    systemd answers with the primary names of the units, e.g. 'ssh.service' for 'sshd', so the units are matched
+    by all of their names.
+
+    :return: dict of {service: set of the services in 'services' which have to be restarted before it}
+    """
+
+    names: dict = {unit_name(service): service for service in services}
+    # every name of the units, including aliases, -> service
+    aliases: dict = dict(names)
+    values: dict = {}
+
+    bus = get_dbus_backend()
+    if bus is not None:
+        for name, service in names.items():
+            properties: list = [bus.get_property(unit=name, name=key) for key in ("Names", "After", "Requires")]
+            if None in properties:
+                values = {}
+                break
+
+            unit_names, after, requires = properties
+            values[service] = set(after) | set(requires)
+            aliases.update(dict.fromkeys(unit_names, service))
+
+    if not values:
+        for unit_id, properties in _show(units=list(names), properties=("Names", "After", "Requires"),
+                                         sudo_password=sudo_password).items():
+            unit_names: set = {unit_id, *properties.get("Names", "").split()}
+            service: str | None = next((names[name] for name in unit_names if name in names), None)
+            if service is None:
+                continue
+
+            values[service] = set(properties.get("After", "").split()) | set(properties.get("Requires", "").split())
+            aliases.update(dict.fromkeys(unit_names, service))
+
+    return {service: {aliases[dependency] for dependency in values.get(service, ()) if dependency in aliases}
+            - {service} for service in names.values()}
+
+
+def _plan_waves(dependencies: dict) -> list:
+
+    """
+    group services into waves in dependency order. services in a dependency cycle are put in the last wave.
+
+    :param dependencies: dict of {service: set of services which have to be restarted before it}
+    :return: list of sorted lists of services.
+    """
+
+    remaining: dict = {service: set(depends) for service, depends in dependencies.items()}
+    waves: list = []
+
+    while remaining:
+        wave: list = sorted(service for service, depends in remaining.items() if not depends)
+        if not wave:
+            wave = sorted(remaining)
+
+        waves.append(wave)
+        for service in wave:
+            del remaining[service]
+
+        for depends in remaining.values():
+            depends.difference_update(wave)
+
+    return waves
+
+
+def _watch_with_systemctl(services: list, interval: float, timeout: float | None, sudo_password: str = None):
+
+    """
+    poll the active states without the D-Bus backend, and yield (service, active state) of every service
+    once per 'interval' seconds. the polling runs in one shell loop, so no process is started per check,
+    but a change is only seen at the next poll, and a state shorter than 'interval' can be missed.
+    """
+
+    import shlex
+
+    script: str = f"while :; do systemctl is-active {' '.join(services)}; echo; sleep {interval}; done"
+    lines = execute_command_stream(command_str=f"sh -c {shlex.quote(script)}", shell=True,
+                                   sudo_password=sudo_password, timeout=timeout)
+    tick: list = []
+
+    try:
+        for line in lines:
+            if line:
+                tick.append(line.strip())
+                continue
+
+            for service, state in zip(services, tick):
+                yield service, state
+            tick = []
+
+    finally:
+        lines.close()
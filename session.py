@@ -0,0 +1,450 @@
+import atexit
+import contextlib
+import os
+import queue
+import selectors
+import subprocess
+import threading
+import time
+from .deadline import kill_process_group, make_timeout
+
+
+class ShellSession:
+
+    """
+    class ShellSession keeps one long-lived bash process and executes commands through its stdin.
+
+    every command runs in a subshell of the worker, so 'cd', 'exit' or variables do not leak between commands.
+    the result is framed with a unique sentinel and the exit code, and returned as subprocess.CompletedProcess.
+    """
+
+    READ_SIZE: int = 65536
+
+    def __init__(self, shell_path: str = "/bin/bash", sudo_password: str = None) -> None:
+
+        """
+        start a bash worker process.
+        with sudo_password, the worker is started as root with 'sudo -S'. the password is written
+        to the stdin of sudo only once, so it does not appear in the process table.
+
+        :param shell_path: path of the shell binary used as a worker. default is '/bin/bash'.
+        :param sudo_password: if you want a root worker, set the sudo password.
+        """
+
+        args: list = [shell_path, "--noprofile", "--norc"]
+        password_required: bool = False
+
+        if sudo_password is not None and os.geteuid() != 0:
+            args = ["sudo", "-S", "-p", "", "--"] + args
+            password_required = subprocess.run(args=["sudo", "-n", "true"],
+                                               stdout=subprocess.DEVNULL,
+                                               stderr=subprocess.DEVNULL).returncode != 0
+
+        self.shell_path: str = shell_path
+        self._sentinel: bytes = f"__CMDPROXIER_{os.urandom(16).hex()}__".encode()
+        self._lock = threading.Lock()
+        self._process = subprocess.Popen(args=args,
+                                         stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.PIPE,
+                                         start_new_session=True)
+
+        if sudo_password is not None:
+            if password_required:
+                self._process.stdin.write(f"{sudo_password}\n".encode())
+
+            # sudo consumes the following lines as retries of the password if authentication failed.
+            probe = self.run(command_str="id -u")
+            if probe.returncode != 0 or probe.stdout.strip() != b"0":
+                self.close()
+                raise PermissionError("sudo authentication for the root worker failed.")
+
+    def is_alive(self) -> bool:
+
+        """
+        return bool whether the worker process is still alive or not.
+
+        :return: bool whether the worker process is alive or not.
+        """
+
+        return self._process.poll() is None
+
+    def run(self, command_str: str | list, timeout: float = None) -> subprocess.CompletedProcess:
+
+        """
+        execute os command on the worker and return subprocess.CompletedProcess.
+        with timeout, the command is executed under coreutils 'timeout', which kills its process group.
+        if the worker itself does not answer in time, the worker is killed and replaced by the pool.
+
+        :param command_str: os command you want to execute. a list is treated as argv and quoted for the shell.
+        :param timeout: seconds until the command is killed. default is no limit.
+        :return: executed result with subprocess.CompletedProcess, or CommandTimeout.
+        """
+
+        import shlex
+
+        script: str = command_str if isinstance(command_str, str) else shlex.join(command_str)
+        if timeout is not None:
+            script = f"timeout -k 1 {timeout:.3f} {self.shell_path} -c {shlex.quote(script)}"
+
+        sentinel: str = self._sentinel.decode()
+        frame: str = (f"( {script}\n) < /dev/null\n"
+                      f"printf '%s %d\\n' '{sentinel}' $?\n"
+                      f"printf '%s\\n' '{sentinel}' >&2\n")
+        started: float = time.monotonic()
+
+        with self._lock:
+            try:
+                self._process.stdin.write(frame.encode())
+                self._process.stdin.flush()
+
+            except (BrokenPipeError, OSError):
+                return subprocess.CompletedProcess(args=command_str, returncode=-1, stdout=b"", stderr=b"")
+
+            # 'timeout' needs up to 1 more second to kill the command with SIGKILL.
+            stdout, stderr, returncode = self._read_frame(timeout=None if timeout is None else timeout + 2)
+
+        if timeout is not None and returncode in (124, 137, None) and time.monotonic() - started >= timeout:
+            return make_timeout(args=command_str, timeout=timeout, stdout=stdout, stderr=stderr)
+
+        return subprocess.CompletedProcess(args=command_str, returncode=returncode, stdout=stdout, stderr=stderr)
+
+    def close(self) -> None:
+
+        """
+        terminate the worker process.
+
+        :return: None
+        """
+
+        if self.is_alive():
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=1)
+
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+                self._process.wait()
+
+        for stream in (self._process.stdout, self._process.stderr):
+            stream.close()
+
+        return None
+
+    def _read_frame(self, timeout: float = None) -> tuple:
+
+        """
+        read stdout and stderr of the worker until both sentinels arrive.
+        if timeout expires, the worker is killed and returncode is None.
+
+        :param timeout: seconds to wait for the sentinels. default is no limit.
+        :return: tuple of (stdout, stderr, returncode).
+        """
+
+        expire_at: float | None = None if timeout is None else time.monotonic() + timeout
+
+        buffers: dict = {self._process.stdout: bytearray(), self._process.stderr: bytearray()}
+        found: dict = {self._process.stdout: False, self._process.stderr: False}
+        done: dict = {self._process.stdout: False, self._process.stderr: False}
+
+        with selectors.DefaultSelector() as selector:
+            for stream in buffers:
+                selector.register(stream, selectors.EVENT_READ)
+
+            while not all(done.values()):
+                events: list = selector.select(timeout=None if expire_at is None else
+                                               max(0.0, expire_at - time.monotonic()))
+
+                if not events and expire_at is not None and time.monotonic() >= expire_at:
+                    kill_process_group(pid=self._process.pid)
+                    self._process.wait()
+                    return bytes(buffers[self._process.stdout]), bytes(buffers[self._process.stderr]), None
+
+                for key, _ in events:
+                    chunk: bytes = os.read(key.fileobj.fileno(), self.READ_SIZE)
+
+                    if chunk == b"":
+                        # worker process died while executing the command. e.g. the command killed the shell.
+                        selector.unregister(key.fileobj)
+                        done[key.fileobj] = True
+                        continue
+
+                    buffer: bytearray = buffers[key.fileobj]
+                    start: int = max(0, len(buffer) - len(self._sentinel))
+                    buffer += chunk
+
+                    if not found[key.fileobj]:
+                        found[key.fileobj] = buffer.find(self._sentinel, start) != -1
+
+                    if found[key.fileobj] and buffer.endswith(b"\n"):
+                        selector.unregister(key.fileobj)
+                        done[key.fileobj] = True
+
+        stdout: bytes = bytes(buffers[self._process.stdout])
+        stderr: bytes = bytes(buffers[self._process.stderr])
+        stdout_idx: int = stdout.rfind(self._sentinel)
+        stderr_idx: int = stderr.rfind(self._sentinel)
+
+        if stderr_idx != -1:
+            stderr = stderr[:stderr_idx]
+
+        if stdout_idx == -1:
+            return stdout, stderr, self._process.wait()
+
+        returncode: int = int(stdout[stdout_idx + len(self._sentinel):].strip())
+        return stdout[:stdout_idx], stderr, returncode
+
+
+class SessionPool:
+
+    """
+    class SessionPool keeps a small number of ShellSession workers and lends them to concurrent callers.
+
+    dead workers are replaced automatically.
+    """
+
+    def __init__(self, size: int = 4, shell_path: str = "/bin/bash", sudo_password: str = None) -> None:
+
+        """
+        start the pool with 'size' workers.
+
+        :param size: number of bash workers in the pool.
+        :param shell_path: path of the shell binary used as a worker. default is '/bin/bash'.
+        :param sudo_password: if you want root workers, set the sudo password.
+        """
+
+        if size < 1:
+            raise ValueError("size of SessionPool must be 1 or more.")
+
+        self.size: int = size
+        self.shell_path: str = shell_path
+        self._sudo_password: str | None = sudo_password
+        self._idle = queue.Queue()
+        self._closed: bool = False
+
+        for _ in range(size):
+            self._idle.put(self._new_session())
+
+    def run(self, command_str: str | list, timeout: float = None) -> subprocess.CompletedProcess:
+
+        """
+        execute os command on an idle worker and return subprocess.CompletedProcess.
+
+        :param command_str: os command you want to execute. a list is treated as argv and quoted for the shell.
+        :param timeout: seconds until the command is killed. default is no limit.
+        :return: executed result with subprocess.CompletedProcess, or CommandTimeout.
+        """
+
+        session: ShellSession = self._idle.get()
+
+        try:
+            return session.run(command_str=command_str, timeout=timeout)
+
+        finally:
+            if self._closed:
+                session.close()
+
+            elif session.is_alive():
+                self._idle.put(session)
+
+            else:
+                session.close()
+                self._idle.put(self._new_session())
+
+    def close(self) -> None:
+
+        """
+        terminate all idle workers. workers in use are terminated when they are returned.
+
+        :return: None
+        """
+
+        self._closed = True
+
+        while True:
+            try:
+                self._idle.get_nowait().close()
+
+            except queue.Empty:
+                break
+
+        return None
+
+    def is_authorized(self, sudo_password: str) -> bool:
+
+        """
+        return bool whether sudo_password is the password which the root workers were started with.
+
+        :param sudo_password: sudo password given by the caller.
+        :return: bool whether the password matches or not.
+        """
+
+        if self._sudo_password is None or sudo_password is None:
+            return False
+
+        import hmac
+
+        return hmac.compare_digest(self._sudo_password.encode(), sudo_password.encode())
+
+    def _new_session(self) -> ShellSession:
+        return ShellSession(shell_path=self.shell_path, sudo_password=self._sudo_password)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+_pool: SessionPool | None = None
+_privileged: SessionPool | None = None
+_local = threading.local()
+
+
+def enable_session_pool(size: int = 4, shell_path: str = "/bin/bash") -> SessionPool:
+
+    """
+    turn on the session mode. after calling this function, execute_command_run() executes commands
+    on warm bash workers instead of forking a new process for each call.
+    commands which print the result on the screen (stdout or stderr is not subprocess.PIPE) are not affected.
+
+    :param size: number of bash workers in the pool.
+    :param shell_path: path of the shell binary used as a worker. default is '/bin/bash'.
+    :return: SessionPool which is used by execute_command_run().
+    """
+
+    global _pool
+
+    disable_session_pool()
+    _pool = SessionPool(size=size, shell_path=shell_path)
+    return _pool
+
+
+def disable_session_pool() -> None:
+
+    """
+    turn off the session mode and terminate all bash workers.
+
+    :return: None
+    """
+
+    global _pool
+
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+    return None
+
+
+def get_session_pool() -> SessionPool | None:
+
+    """
+    return the SessionPool in use, or None if the session mode is off.
+
+    :return: SessionPool in use.
+    """
+
+    return _pool
+
+
+def enable_privileged_session(sudo_password: str, size: int = 1, shell_path: str = "/bin/bash") -> SessionPool | None:
+
+    """
+    authenticate once and start long-lived root worker(s).
+    after calling this function, execute_command_run() with the same sudo_password executes
+    the command on the root worker instead of 'echo {sudo_password} | sudo -S {command}'.
+
+    :param sudo_password: sudo password of the current user.
+    :param size: number of root workers. default is 1.
+    :param shell_path: path of the shell binary used as a worker. default is '/bin/bash'.
+    :return: SessionPool of root workers, or None if sudo authentication failed.
+    """
+
+    global _privileged
+
+    disable_privileged_session()
+
+    try:
+        _privileged = SessionPool(size=size, shell_path=shell_path, sudo_password=sudo_password)
+
+    except PermissionError:
+        return None
+
+    return _privileged
+
+
+def disable_privileged_session() -> None:
+
+    """
+    terminate the root worker(s).
+
+    :return: None
+    """
+
+    global _privileged
+
+    if _privileged is not None:
+        _privileged.close()
+        _privileged = None
+
+    return None
+
+
+def get_privileged_session(sudo_password: str) -> SessionPool | None:
+
+    """
+    return the root workers which were started with sudo_password.
+
+    :param sudo_password: sudo password given by the caller.
+    :return: SessionPool of root workers, or None if there is no root worker for the password.
+    """
+
+    if _privileged is not None and _privileged.is_authorized(sudo_password=sudo_password):
+        return _privileged
+
+    return None
+
+
+def get_runner():
+
+    """
+    return the callable which executes captured commands in the current thread.
+    a runner bound with bind_runner() wins over the session pool.
+
+    :return: callable(command_str, timeout) returning subprocess.CompletedProcess, or None to use subprocess.run().
+    """
+
+    runner = getattr(_local, "runner", None)
+    if runner is not None:
+        return runner
+
+    if _pool is not None:
+        return _pool.run
+
+    return None
+
+
+@contextlib.contextmanager
+def bind_runner(runner):
+
+    """
+    bind a runner to the current thread while the 'with' block is executed.
+
+    :param runner: callable(command_str, timeout) returning subprocess.CompletedProcess.
+                   command_str is a list when the command has to be executed without shell.
+                   timeout is None or seconds until the command has to be killed.
+    """
+
+    previous = getattr(_local, "runner", None)
+    _local.runner = runner
+
+    try:
+        yield runner
+
+    finally:
+        _local.runner = previous
+
+
+atexit.register(disable_session_pool)
+atexit.register(disable_privileged_session)
@@ -0,0 +1,426 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from .deadline import effective_timeout
+from .transport import get_transport
+
+
+SYSTEMD_NAME: str = "org.freedesktop.systemd1"
+MANAGER_PATH: str = "/org/freedesktop/systemd1"
+MANAGER_INTERFACE: str = "org.freedesktop.systemd1.Manager"
+UNIT_INTERFACE: str = "org.freedesktop.systemd1.Unit"
+PROPERTIES_INTERFACE: str = "org.freedesktop.DBus.Properties"
+
+UNIT_SUFFIXES: tuple = (".service", ".socket", ".target", ".timer", ".mount", ".automount", ".swap", ".path",
+                        ".slice", ".scope", ".device")
+
+# results of finished jobs which were kept for a waiter that has not started waiting yet.
+_FINISHED_JOBS_LIMIT: int = 1024
+
+
+def unit_name(name: str) -> str:
+
+    """
+    return the full unit name. 'sshd' is 'sshd.service', as systemctl does.
+
+    :param name: unit name with or without its suffix.
+    :return: unit name with its suffix.
+    """
+
+    return name if name.endswith(UNIT_SUFFIXES) else f"{name}.service"
+
+
+class SystemdBus:
+
+    """
+    class SystemdBus talks to systemd (org.freedesktop.systemd1) over one persistent D-Bus connection.
+    it needs the optional package 'jeepney'. the connection is shared by all threads.
+
+    every method returns None when the bus cannot answer (not connected, access denied, no such unit and so on),
+    so the caller can fall back to 'systemctl'.
+    """
+
+    def __init__(self, bus: str = "SYSTEM", timeout: float = 30.0) -> None:
+
+        """
+        :param bus: 'SYSTEM', 'SESSION', or an address such as 'unix:path=/run/dbus/system_bus_socket'.
+        :param timeout: seconds to wait for a reply, or for a job of start/stop/restart.
+        """
+
+        self.bus: str = bus
+        self.timeout: float = timeout
+        self._conn = None
+        self._router = None
+        self._jobs = None
+        self._watcher = None
+        self._finished: OrderedDict = OrderedDict()
+        self._condition = threading.Condition()
+        self._unit_paths: dict = {}
+
+    @property
+    def connected(self) -> bool:
+        return self._router is not None
+
+    def connect(self) -> bool:
+
+        """
+        open the connection and subscribe to the job signals of systemd.
+
+        :return: bool whether the connection is ready or not.
+        """
+
+        try:
+            from jeepney import MatchRule
+            from jeepney.bus_messages import message_bus
+            from jeepney.io.threading import DBusRouter, open_dbus_connection
+
+        except ImportError:
+            return False
+
+        try:
+            self._conn = open_dbus_connection(bus=self.bus)
+            self._router = DBusRouter(self._conn)
+
+            # the sender of a signal is the unique name of systemd, so it is not a part of the rule.
+            rule = MatchRule(type="signal", interface=MANAGER_INTERFACE, member="JobRemoved", path=MANAGER_PATH)
+            self._jobs = self._router.filter(rule, bufsize=0)
+            self._router.send_and_get_reply(message_bus.AddMatch(rule), timeout=self.timeout)
+            self._call(MANAGER_PATH, MANAGER_INTERFACE, "Subscribe", "", ())
+
+        except Exception:
+            self.close()
+            return False
+
+        self._watcher = threading.Thread(target=self._watch_jobs, name="linux_cmd_systemd_bus", daemon=True)
+        self._watcher.start()
+        return True
+
+    def close(self) -> None:
+
+        """
+        close the connection.
+
+        :return: None
+        """
+
+        if self._jobs is not None:
+            self._jobs.queue.put(None)
+            self._jobs.close()
+            self._jobs = None
+
+        if self._router is not None:
+            self._router.close()
+            self._router = None
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+        return None
+
+    def start(self, unit: str, mode: str = "replace", timeout: float = None) -> str | None:
+
+        """
+        start the unit and wait until the job finishes.
+
+        :param unit: unit name.
+        :param mode: job mode, such as 'replace' or 'fail'.
+        :param timeout: seconds to wait for the job. default is the timeout of this object.
+        :return: job result, such as 'done', 'failed', 'dependency' or 'timeout'. None if the bus cannot answer.
+        """
+
+        return self._run_job(method="StartUnit", unit=unit, mode=mode, timeout=timeout)
+
+    def stop(self, unit: str, mode: str = "replace", timeout: float = None) -> str | None:
+
+        """
+        stop the unit and wait until the job finishes. see start().
+        """
+
+        return self._run_job(method="StopUnit", unit=unit, mode=mode, timeout=timeout)
+
+    def restart(self, unit: str, mode: str = "replace", timeout: float = None) -> str | None:
+
+        """
+        restart the unit and wait until the job finishes. see start().
+        """
+
+        return self._run_job(method="RestartUnit", unit=unit, mode=mode, timeout=timeout)
+
+    def enable(self, unit: str) -> bool | None:
+
+        """
+        enable the unit file and reload systemd.
+
+        :param unit: unit name.
+        :return: True if it is enabled. None if the bus cannot answer.
+        """
+
+        if self._call(MANAGER_PATH, MANAGER_INTERFACE, "EnableUnitFiles", "asbb",
+                      ([unit_name(unit)], False, False)) is None:
+            return None
+
+        if self._call(MANAGER_PATH, MANAGER_INTERFACE, "Reload", "", ()) is None:
+            return None
+
+        return True
+
+    def disable(self, unit: str) -> bool | None:
+
+        """
+        disable the unit file and reload systemd.
+
+        :param unit: unit name.
+        :return: True if it is disabled. None if the bus cannot answer.
+        """
+
+        if self._call(MANAGER_PATH, MANAGER_INTERFACE, "DisableUnitFiles", "asb",
+                      ([unit_name(unit)], False)) is None:
+            return None
+
+        if self._call(MANAGER_PATH, MANAGER_INTERFACE, "Reload", "", ()) is None:
+            return None
+
+        return True
+
+    def get_unit_path(self, unit: str) -> str | None:
+
+        """
+        return the object path of the unit. the unit is loaded if it is not loaded yet.
+
+        :param unit: unit name.
+        :return: object path, or None if the bus cannot answer.
+        """
+
+        name: str = unit_name(unit)
+        path: str | None = self._unit_paths.get(name)
+        if path is not None:
+            return path
+
+        body: tuple | None = self._call(MANAGER_PATH, MANAGER_INTERFACE, "LoadUnit", "s", (name,))
+        if body is None:
+            return None
+
+        self._unit_paths[name] = body[0]
+        return body[0]
+
+    def get_property(self, unit: str, name: str, interface: str = UNIT_INTERFACE):
+
+        """
+        return a property of the unit, e.g. get_property("sshd", "ActiveState")
+
+        :param unit: unit name.
+        :param name: property name.
+        :param interface: interface of the property.
+        :return: value of the property, or None if the bus cannot answer.
+        """
+
+        path: str | None = self.get_unit_path(unit=unit)
+        if path is None:
+            return None
+
+        body: tuple | None = self._call(path, PROPERTIES_INTERFACE, "Get", "ss", (interface, name))
+        if body is None:
+            return None
+
+        return body[0][1]
+
+    def get_active_state(self, unit: str) -> str | None:
+
+        """
+        :param unit: unit name.
+        :return: active state, such as 'active' or 'inactive'. None if the bus cannot answer.
+        """
+
+        return self.get_property(unit=unit, name="ActiveState")
+
+    def get_unit_file_state(self, unit: str) -> str | None:
+
+        """
+        :param unit: unit name.
+        :return: unit file state, such as 'enabled' or 'disabled'. None if the bus cannot answer.
+        """
+
+        body: tuple | None = self._call(MANAGER_PATH, MANAGER_INTERFACE, "GetUnitFileState", "s", (unit_name(unit),))
+        return None if body is None else body[0]
+
+    def watch_active_states(self, units: list, timeout: float = None):
+
+        """
+        yield (unit, active state) of the units, first the current states and then every change
+        notified by the PropertiesChanged signals of systemd. no polling is done.
+        the iteration stops when timeout expires.
+
+        :param units: list of unit names.
+        :param timeout: seconds to watch. None means no limit.
+        :return: generator of tuple (unit, active state), or None if the bus cannot answer.
+        """
+
+        from queue import Empty, Queue
+        from jeepney import HeaderFields, MatchRule
+        from jeepney.bus_messages import message_bus
+
+        paths: dict = {}
+        for unit in units:
+            path: str | None = self.get_unit_path(unit=unit)
+            if path is None:
+                return None
+            paths[path] = unit
+
+        router = self._router
+        queue: Queue = Queue()
+        rules: list = [MatchRule(type="signal", interface=PROPERTIES_INTERFACE, member="PropertiesChanged", path=path)
+                       for path in paths]
+        handles: list = [router.filter(rule, queue=queue) for rule in rules]
+
+        def generate():
+            try:
+                for rule in rules:
+                    router.send_and_get_reply(message_bus.AddMatch(rule), timeout=self.timeout)
+
+                # the current states are read after subscribing, so a change between them is not lost.
+                for path, unit in paths.items():
+                    yield unit, self.get_active_state(unit=unit)
+
+                expire_at: float | None = None if timeout is None else time.monotonic() + timeout
+                while True:
+                    wait: float | None = None if expire_at is None else expire_at - time.monotonic()
+                    if wait is not None and wait <= 0:
+                        return
+
+                    try:
+                        message = queue.get(timeout=wait)
+
+                    except Empty:
+                        return
+
+                    interface, changed, invalidated = message.body
+                    if interface != UNIT_INTERFACE:
+                        continue
+
+                    unit: str = paths[message.header.fields[HeaderFields.path]]
+                    if "ActiveState" in changed:
+                        yield unit, changed["ActiveState"][1]
+
+                    elif "ActiveState" in invalidated:
+                        yield unit, self.get_active_state(unit=unit)
+
+            finally:
+                for handle in handles:
+                    handle.close()
+
+                for rule in rules:
+                    try:
+                        router.send(message_bus.RemoveMatch(rule))
+
+                    except OSError:
+                        pass
+
+        return generate()
+
+    def _call(self, path: str, interface: str, method: str, signature: str, body: tuple) -> tuple | None:
+        from jeepney import DBusAddress, DBusErrorResponse, new_method_call
+        from jeepney.wrappers import unwrap_msg
+
+        router = self._router
+        if router is None:
+            return None
+
+        message = new_method_call(DBusAddress(path, bus_name=SYSTEMD_NAME, interface=interface),
+                                  method, signature or None, body)
+        try:
+            return unwrap_msg(router.send_and_get_reply(message, timeout=effective_timeout(self.timeout)))
+
+        except (DBusErrorResponse, TimeoutError, OSError, RuntimeError):
+            return None
+
+    def _run_job(self, method: str, unit: str, mode: str, timeout: float | None) -> str | None:
+        body: tuple | None = self._call(MANAGER_PATH, MANAGER_INTERFACE, method, "ss", (unit_name(unit), mode))
+        if body is None:
+            return None
+
+        job: str = body[0]
+        wait: float | None = effective_timeout(self.timeout if timeout is None else timeout)
+
+        with self._condition:
+            if not self._condition.wait_for(lambda: job in self._finished, timeout=wait):
+                return "timeout"
+
+            return self._finished.pop(job)
+
+    def _watch_jobs(self) -> None:
+        jobs = self._jobs
+        while True:
+            message = jobs.queue.get()
+            if message is None:
+                return None
+
+            # JobRemoved(u id, o job, s unit, s result)
+            _, job, _, result = message.body
+            with self._condition:
+                self._finished[job] = result
+                while len(self._finished) > _FINISHED_JOBS_LIMIT:
+                    self._finished.popitem(last=False)
+
+                self._condition.notify_all()
+
+
+_backend: SystemdBus | None = None
+
+
+def enable_dbus_backend(bus: str = "SYSTEM", timeout: float = 30.0) -> SystemdBus | None:
+
+    """
+    let Service talk to systemd over D-Bus instead of executing 'systemctl'.
+    Service falls back to 'systemctl' for each call the bus cannot answer, and for remote transports.
+
+    :param bus: 'SYSTEM', 'SESSION', or an address of the bus.
+    :param timeout: seconds to wait for a reply, or for a job of start/stop/restart.
+    :return: SystemdBus, or None if 'jeepney' is not installed or the bus is not available.
+    """
+
+    global _backend
+
+    disable_dbus_backend()
+
+    backend: SystemdBus = SystemdBus(bus=bus, timeout=timeout)
+    if not backend.connect():
+        return None
+
+    _backend = backend
+    return _backend
+
+
+def disable_dbus_backend() -> None:
+
+    """
+    close the D-Bus connection and let Service execute 'systemctl' again.
+
+    :return: None
+    """
+
+    global _backend
+
+    if _backend is not None:
+        _backend.close()
+        _backend = None
+
+    return None
+
+
+def get_dbus_backend() -> SystemdBus | None:
+
+    """
+    return the D-Bus backend which can be used by the current thread.
+
+    :return: SystemdBus, or None if the backend is off or the commands go to a remote host.
+    """
+
+    if _backend is None or get_transport().remote:
+        return None
+
+    return _backend
+
+
+atexit.register(disable_dbus_backend)
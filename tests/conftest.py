@@ -0,0 +1,28 @@
+import os
+import pytest
+
+
+# stands in for sudo: it checks the password on stdin like 'sudo -S' and executes the command as the current user.
+_FAKE_SUDO: str = """#!/bin/sh
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -p) shift 2 ;;
+        --) shift; break ;;
+        -*) shift ;;
+        *) break ;;
+    esac
+done
+IFS= read -r password || exit 1
+[ "$password" = secret ] || exit 1
+exec "$@"
+"""
+
+
+@pytest.fixture
+def fake_sudo(tmp_path, monkeypatch):
+    directory = tmp_path / "bin"
+    directory.mkdir()
+    sudo = directory / "sudo"
+    sudo.write_text(_FAKE_SUDO)
+    sudo.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{directory}{os.pathsep}{os.environ.get('PATH', '')}")
@@ -0,0 +1,105 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from .. import execute_command_run
+from ..aio import execute_command_run_async, make_async_class
+from ..deadline import CommandTimeout, deadline
+
+
+def _passthrough(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+class Tools:
+
+    @staticmethod
+    def echo(text: str) -> tuple:
+        cp = execute_command_run(f"echo {text}")
+        return cp.stdout, threading.current_thread().name
+
+    @staticmethod
+    def sleep(seconds: float):
+        return execute_command_run(f"sleep {seconds}")
+
+    @staticmethod
+    @_passthrough
+    def count(number: int):
+        for i in range(number):
+            yield i
+
+
+AsyncTools = make_async_class(Tools)
+
+
+def _gone(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as file:
+            return file.read().rsplit(b")", 1)[1].split()[0] == b"Z"
+
+    except FileNotFoundError:
+        return True
+
+
+def test_execute_command_run_async():
+    cp = asyncio.run(execute_command_run_async("echo hello"))
+    assert cp.returncode == 0 and cp.stdout == b"hello\n"
+
+
+def test_execute_command_run_async_timeout():
+    started: float = time.monotonic()
+    cp = asyncio.run(execute_command_run_async("sleep 5", timeout=0.2))
+    assert isinstance(cp, CommandTimeout)
+    assert time.monotonic() - started < 3
+
+
+def test_cancel_kills_the_process_group(tmp_path):
+    pid_file: str = str(tmp_path / "pid")
+
+    async def main() -> int:
+        task = asyncio.ensure_future(execute_command_run_async(f"sleep 30 & echo $! > {pid_file}; wait", shell=True))
+        while not os.path.exists(pid_file) or not open(pid_file).read().strip():
+            await asyncio.sleep(0.01)
+
+        task.cancel()
+        try:
+            await task
+
+        except asyncio.CancelledError:
+            pass
+
+        return int(open(pid_file).read())
+
+    pid: int = asyncio.run(main())
+    for _ in range(100):
+        if _gone(pid):
+            break
+
+        time.sleep(0.02)
+
+    assert _gone(pid)
+
+
+def test_twin_runs_commands_through_the_event_loop():
+    stdout, thread_name = asyncio.run(AsyncTools.echo(text="twin"))
+    assert stdout == b"twin\n"
+    assert thread_name.startswith("linux_cmd_aio")
+
+
+def test_twin_consumes_wrapped_generators():
+    assert asyncio.run(AsyncTools.count(number=3)) == [0, 1, 2]
+
+
+def test_twin_keeps_the_deadline_of_the_caller():
+    async def main():
+        with deadline(0.2):
+            return await AsyncTools.sleep(seconds=5)
+
+    started: float = time.monotonic()
+    assert isinstance(asyncio.run(main()), CommandTimeout)
+    assert time.monotonic() - started < 3
@@ -0,0 +1,132 @@
+import gzip
+import io
+import lzma
+import os
+import tarfile
+import pytest
+from ..archive import ParallelCompressor, compression_of, create_archive, extract_archive, is_zstd_available
+
+
+COMPRESSIONS: list = [
+    None,
+    "gzip",
+    "xz",
+    pytest.param("zstd", marks=pytest.mark.skipif(not is_zstd_available(), reason="zstandard is not installed")),
+]
+
+MAGICS: dict = {None: b"", "gzip": b"\x1f\x8b", "xz": b"\xfd7zXZ", "zstd": b"\x28\xb5\x2f\xfd"}
+
+
+def _make_tree(root) -> dict:
+    contents: dict = {
+        "tree/small.txt": b"small\n",
+        "tree/sub/random.bin": os.urandom(300000),
+        "tree/sub/repeated.log": b"repeated line\n" * 50000,
+        "tree/empty": b"",
+    }
+
+    for name, data in contents.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    return contents
+
+
+def _read_tree(root) -> dict:
+    found: dict = {}
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path: str = os.path.join(directory, name)
+            with open(path, "rb") as file:
+                found[os.path.relpath(path, root)] = file.read()
+
+    return found
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_round_trip(tmp_path, monkeypatch, compression):
+    contents: dict = _make_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    archive: str = str(tmp_path / "archive.tar")
+
+    assert create_archive(paths=["tree"], save_as=archive, compression=compression, workers=2)
+    with open(archive, "rb") as file:
+        head: bytes = file.read(512)
+    assert head.startswith(MAGICS[compression])
+    assert compression is not None or head[257:262] == b"ustar"
+    assert extract_archive(path=archive, save_path=str(tmp_path / "out"))
+    assert _read_tree(tmp_path / "out") == contents
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".part")] == []
+
+
+@pytest.mark.parametrize("compression", ["gzip", "xz"])
+def test_blocks_are_readable_by_the_standard_decompressors(compression):
+    data: bytes = b"".join(f"line {i}\n".encode() for i in range(200000))
+    output: io.BytesIO = io.BytesIO()
+
+    writer: ParallelCompressor = ParallelCompressor(fileobj=output, compression=compression, workers=4,
+                                                    block_size=65536)
+    for i in range(0, len(data), 10000):
+        writer.write(data[i:i + 10000])
+    writer.close()
+
+    decompress = gzip.decompress if compression == "gzip" else lzma.decompress
+    assert decompress(output.getvalue()) == data
+    assert writer.bytes_in == len(data)
+    assert writer.bytes_out == len(output.getvalue())
+
+
+def test_include_and_exclude(tmp_path, monkeypatch):
+    _make_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    archive: str = str(tmp_path / "archive.tar.gz")
+    assert create_archive(paths=["tree"], save_as=archive, compression="gzip")
+
+    assert extract_archive(path=archive, save_path=str(tmp_path / "only"), include=["tree/sub/*"],
+                           exclude=["*.bin"])
+    assert set(_read_tree(tmp_path / "only")) == {"tree/sub/repeated.log"}
+
+
+def test_progress_is_reported(tmp_path, monkeypatch):
+    contents: dict = _make_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    created: list = []
+    extracted: list = []
+
+    assert create_archive(paths=["tree"], save_as=str(tmp_path / "a.tar.xz"), compression="xz",
+                          progress=created.append, interval=0)
+    assert extract_archive(path=str(tmp_path / "a.tar.xz"), save_path=str(tmp_path / "out"),
+                           progress=extracted.append, interval=0)
+
+    assert created[-1].bytes_in >= sum(len(data) for data in contents.values())
+    assert created[-1].bytes_out == os.path.getsize(tmp_path / "a.tar.xz")
+    assert extracted[-1].files == len(contents) + 2
+    assert extracted[-1].bytes_out == sum(len(data) for data in contents.values())
+
+
+def test_member_outside_the_destination_is_rejected(tmp_path):
+    archive: str = str(tmp_path / "evil.tar")
+    with tarfile.open(archive, "w") as tar:
+        member: tarfile.TarInfo = tarfile.TarInfo(name="../evil.txt")
+        member.size = 4
+        tar.addfile(member, io.BytesIO(b"evil"))
+
+    assert not extract_archive(path=archive, save_path=str(tmp_path / "out"))
+    assert not (tmp_path / "evil.txt").exists()
+
+
+def test_failures_return_false(tmp_path):
+    assert not create_archive(paths=[str(tmp_path / "missing")], save_as=str(tmp_path / "a.tar"))
+    assert os.listdir(tmp_path) == []
+
+    (tmp_path / "not.tar").write_bytes(b"not an archive")
+    assert not extract_archive(path=str(tmp_path / "not.tar"), save_path=str(tmp_path / "out"))
+
+
+def test_compression_of():
+    assert compression_of(path="a.tar.gz") == "gzip"
+    assert compression_of(path="a.tgz") == "gzip"
+    assert compression_of(path="a.tar.xz") == "xz"
+    assert compression_of(path="a.tar.zst") == "zstd"
+    assert compression_of(path="a.tar") is None
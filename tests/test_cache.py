@@ -0,0 +1,105 @@
+import subprocess
+import pytest
+from .. import account as account_module
+from .. import cache as cache_module
+from ..account import Account
+from ..cache import TTLCache, cached, get_cache, invalidate_cache, invalidates
+
+
+class FakeTime:
+
+    def __init__(self) -> None:
+        self.now: float = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeTime:
+    fake: FakeTime = FakeTime()
+    monkeypatch.setattr(cache_module, "time", fake)
+    get_cache().invalidate()
+    yield fake
+    get_cache().invalidate()
+
+
+calls: list = []
+
+
+@cached("test", ttl=5.0)
+def lookup(name: str, options=None) -> str:
+    calls.append(name)
+    return name.upper()
+
+
+@invalidates("test", by="name")
+def change(name: str) -> None:
+    return None
+
+
+@pytest.fixture(autouse=True)
+def reset_calls() -> None:
+    calls.clear()
+
+
+def test_result_expires_after_ttl(clock):
+    assert lookup(name="a") == "A"
+    clock.now += 4.9
+    assert lookup(name="a") == "A"
+    assert calls == ["a"]
+
+    clock.now += 0.2
+    assert lookup(name="a") == "A"
+    assert calls == ["a", "a"]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache: TTLCache = TTLCache(maxsize=2)
+    cache.set(("ns", "q", (("x", 1),), "local"), 1)
+    cache.set(("ns", "q", (("x", 2),), "local"), 2)
+    assert cache.get(("ns", "q", (("x", 1),), "local")) == (True, 1)
+
+    cache.set(("ns", "q", (("x", 3),), "local"), 3)
+    assert len(cache) == 2
+    assert cache.get(("ns", "q", (("x", 2),), "local")) == (False, None)
+    assert cache.get(("ns", "q", (("x", 1),), "local")) == (True, 1)
+
+
+def test_mutator_invalidates_only_its_argument(clock):
+    lookup(name="a")
+    lookup(name="b")
+    change(name="a")
+    lookup(name="a")
+    lookup(name="b")
+    assert calls == ["a", "b", "a"]
+
+    assert invalidate_cache("test") == 2
+    lookup(name="b")
+    assert calls == ["a", "b", "a", "b"]
+
+
+def test_unhashable_argument_is_not_cached(clock):
+    assert lookup(name="a", options={"verbose": True}) == "A"
+    assert lookup(name="a", options={"verbose": True}) == "A"
+    assert lookup(name="a", options=[1, 2]) == "A"
+    assert lookup(name="a", options=[1, 2]) == "A"
+    assert calls == ["a", "a", "a"]
+
+
+def test_account_queries_expire(clock, monkeypatch):
+    users: list = ["alice", "bob"]
+    commands: list = []
+
+    def fake(command_str: str, **kwargs) -> subprocess.CompletedProcess:
+        commands.append(command_str)
+        return subprocess.CompletedProcess(args=command_str, returncode=0, stdout=f"{users[0]}\n".encode(), stderr=b"")
+
+    monkeypatch.setattr(account_module, "execute_command_run", fake)
+    assert Account.get_current_username() == "alice"
+    users.pop(0)
+    assert Account.get_current_username() == "alice"
+
+    clock.now += 61
+    assert Account.get_current_username() == "bob"
+    assert commands == ["whoami", "whoami"]
@@ -0,0 +1,79 @@
+import signal
+import time
+from .. import execute_command_run
+from ..cache import cached, invalidate_cache
+from ..deadline import CommandTimeout, deadline, effective_timeout, remaining_time
+
+
+def _is_gone(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as file:
+            return file.read().rsplit(b")", 1)[1].split()[0] == b"Z"
+
+    except FileNotFoundError:
+        return True
+
+
+def test_timeout_returns_command_timeout():
+    started: float = time.monotonic()
+    cp = execute_command_run("sleep 5", timeout=0.2)
+
+    assert isinstance(cp, CommandTimeout)
+    assert cp.returncode == -signal.SIGKILL
+    assert time.monotonic() - started < 3
+
+
+def test_timeout_kills_the_process_group():
+    cp = execute_command_run("sleep 30 & echo $!; wait", shell=True, timeout=0.3)
+    pid: int = int(cp.stdout)
+
+    assert isinstance(cp, CommandTimeout)
+    for _ in range(100):
+        if _is_gone(pid):
+            break
+
+        time.sleep(0.02)
+
+    assert _is_gone(pid)
+
+
+def test_deadline_is_shared_by_the_commands_of_the_block():
+    started: float = time.monotonic()
+    with deadline(0.6):
+        first = execute_command_run("sleep 0.4")
+        second = execute_command_run("sleep 0.4")
+        third = execute_command_run("echo never")
+
+    assert first.returncode == 0
+    assert isinstance(second, CommandTimeout)
+    assert isinstance(third, CommandTimeout) and third.stdout == b""
+    assert time.monotonic() - started < 3
+
+
+def test_nested_deadline_does_not_extend_the_outer_one():
+    assert remaining_time() is None
+    assert effective_timeout(5.0) == 5.0
+
+    with deadline(0.5):
+        with deadline(10):
+            assert remaining_time() <= 0.5
+            assert effective_timeout(None) <= 0.5
+            assert effective_timeout(0.1) == 0.1
+
+    assert remaining_time() is None
+
+
+calls: list = []
+
+
+@cached("test")
+def slow_query() -> int:
+    calls.append(1)
+    return execute_command_run("sleep 5", timeout=0.05).returncode
+
+
+def test_timed_out_result_is_not_cached():
+    invalidate_cache("test")
+    slow_query()
+    slow_query()
+    assert len(calls) == 2
@@ -0,0 +1,102 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+from ..fanout import FanOutExecutor, fan_out
+from ..transport import get_transport
+
+
+class FakeTransport:
+
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+
+    def wrap(self, command_str: str | list, shell: bool) -> tuple:
+        return command_str, shell
+
+
+def test_per_host_limit():
+    lock = threading.Lock()
+    running: dict = {}
+    peak: dict = {}
+
+    def call() -> str:
+        name: str = get_transport().name
+        with lock:
+            running[name] = running.get(name, 0) + 1
+            peak[name] = max(peak.get(name, 0), running[name])
+
+        time.sleep(0.02)
+        with lock:
+            running[name] -= 1
+
+        return name
+
+    hosts: list = [FakeTransport("a"), FakeTransport("b")]
+    with FanOutExecutor(max_workers=8, per_host_limit=2) as executor:
+        futures: list = [executor.submit(host, call) for host in hosts for _ in range(6)]
+        results: list = [future.result(timeout=10) for future in futures]
+
+    assert [result.value for result in results] == ["a"] * 6 + ["b"] * 6
+    assert peak == {"a": 2, "b": 2}
+
+
+def test_error_of_one_host_does_not_stop_the_others():
+    def call() -> str:
+        if get_transport().name == "broken":
+            raise ValueError("broken host")
+
+        return "ok"
+
+    hosts: list = [FakeTransport("web1"), FakeTransport("broken"), FakeTransport("web2")]
+    results: dict = {result.host: result for result in fan_out(hosts, call, max_workers=3)}
+
+    assert sorted(results) == ["broken", "web1", "web2"]
+    assert results["web1"].ok and results["web1"].value == "ok"
+    assert results["web2"].ok and results["web2"].value == "ok"
+    assert not results["broken"].ok and isinstance(results["broken"].error, ValueError)
+
+
+def test_close_cancels_queued_calls():
+    started = threading.Event()
+    release = threading.Event()
+
+    def call() -> str:
+        started.set()
+        release.wait(10)
+        return "done"
+
+    host: FakeTransport = FakeTransport("web1")
+    executor: FanOutExecutor = FanOutExecutor(max_workers=2, per_host_limit=1)
+    futures: list = [executor.submit(host, call) for _ in range(3)]
+    assert started.wait(10)
+
+    closer = threading.Thread(target=executor.close)
+    closer.start()
+    # the queued calls are resolved before close() waits for the running one.
+    assert isinstance(futures[1].result(timeout=10).error, CancelledError)
+    assert isinstance(futures[2].result(timeout=10).error, CancelledError)
+
+    release.set()
+    closer.join(10)
+    assert not closer.is_alive()
+    assert futures[0].result(timeout=10).value == "done"
+    assert isinstance(executor.submit(host, call).result(timeout=1).error, CancelledError)
+
+
+def test_breaking_out_of_fan_out_does_not_hang():
+    def call() -> str:
+        time.sleep(0.05)
+        return get_transport().name
+
+    hosts: list = [FakeTransport("web1")] * 5
+    finished = threading.Event()
+
+    def consume() -> None:
+        for _ in fan_out(hosts, call, max_workers=2):
+            break
+
+        finished.set()
+
+    thread = threading.Thread(target=consume, daemon=True)
+    thread.start()
+    assert finished.wait(10)
@@ -0,0 +1,52 @@
+import os
+import pytest
+from .. import file as file_module
+from ..file import FileSystem
+
+
+@pytest.fixture
+def tree(tmp_path) -> dict:
+    (tmp_path / "file.txt").write_text("contents\n")
+    (tmp_path / "folder").mkdir()
+    os.symlink(tmp_path / "file.txt", tmp_path / "link")
+    os.symlink(tmp_path / "missing", tmp_path / "broken")
+    return {name: str(tmp_path / name) for name in ("file.txt", "folder", "link", "broken", "missing")}
+
+
+@pytest.fixture
+def no_commands(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("a command was executed on the native path.")
+
+    monkeypatch.setattr(file_module, "execute_command_run", fail)
+
+
+def test_native_path_checks_do_not_execute_commands(tree, no_commands):
+    assert [FileSystem.is_path_exist(path=path) for path in tree.values()] == [True, True, True, True, False]
+    assert [FileSystem.get_path_type(path=path) for path in tree.values()] == \
+           ["file", "directory", "link", "link", None]
+    assert FileSystem.get_file_contents(path=tree["file.txt"]) == "contents"
+    assert FileSystem.get_file_contents(path=tree["folder"]) is None
+
+
+def test_native_path_checks_match_the_commands(tree, fake_sudo):
+    # with sudo_password the checks run 'ls' through the fake sudo, as the current user.
+    for path in tree.values():
+        assert FileSystem.is_path_exist(path=path) == FileSystem.is_path_exist(path=path, sudo_password="secret")
+        assert FileSystem.get_path_type(path=path) == FileSystem.get_path_type(path=path, sudo_password="secret")
+
+
+def test_make_folder(tmp_path, no_commands):
+    nested: str = str(tmp_path / "a" / "b")
+    assert not FileSystem.make_folder(path=nested)
+    assert FileSystem.make_folder(path=nested, parents=True)
+    assert FileSystem.make_folder(path=nested, parents=True)
+    assert not FileSystem.make_folder(path=nested)
+    assert os.path.isdir(nested)
+
+
+def test_create_symlink_in_a_folder(tree, no_commands):
+    assert FileSystem.create_symlink(target_path=tree["file.txt"], link_path=tree["folder"])
+    assert os.readlink(os.path.join(tree["folder"], "file.txt")) == tree["file.txt"]
+    # the link exists already.
+    assert FileSystem.create_symlink(target_path=tree["file.txt"], link_path=tree["link"])
@@ -0,0 +1,93 @@
+import os
+from ..file import FileSystem
+from ..index import FileIndex
+from ..walk import DEFAULT_PRUNE, Walker
+
+
+def _make_tree(root) -> None:
+    for path in ("a/b/target.conf", "a/other.txt", "c/target.conf", "c/d/e/deep.txt"):
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(path)
+
+
+def _count_reads(index: FileIndex, monkeypatch) -> list:
+    read = index._read
+    directories: list = []
+
+    def counted(directory: str) -> tuple:
+        directories.append(directory)
+        return read(directory=directory)
+
+    monkeypatch.setattr(index, "_read", counted)
+    return directories
+
+
+def test_lookup(tmp_path):
+    _make_tree(tmp_path / "tree")
+    index: FileIndex = FileIndex(root=str(tmp_path / "tree"), index_dir=str(tmp_path / "index"))
+
+    assert sorted(index.lookup("target.conf")) == [str(tmp_path / "tree/a/b/target.conf"),
+                                                   str(tmp_path / "tree/c/target.conf")]
+    assert sorted(index.lookup("*.txt")) == [str(tmp_path / "tree/a/other.txt"), str(tmp_path / "tree/c/d/e/deep.txt")]
+    assert index.lookup("tree") == [str(tmp_path / "tree")]
+    assert index.lookup("missing") == []
+
+
+def test_refresh_reads_only_changed_directories(tmp_path, monkeypatch):
+    root = tmp_path / "tree"
+    _make_tree(root)
+    index: FileIndex = FileIndex(root=str(root), index_dir=str(tmp_path / "index"))
+    assert index.refresh()
+
+    reads: list = _count_reads(index=index, monkeypatch=monkeypatch)
+    (root / "c/d/new.conf").write_text("new")
+    assert index.refresh()
+
+    assert reads == [str(root / "c/d")]
+    assert index.lookup("new.conf") == [str(root / "c/d/new.conf")]
+
+
+def test_refresh_drops_removed_directories(tmp_path):
+    root = tmp_path / "tree"
+    _make_tree(root)
+    index: FileIndex = FileIndex(root=str(root), index_dir=str(tmp_path / "index"))
+    assert index.lookup("deep.txt") == [str(root / "c/d/e/deep.txt")]
+
+    (root / "c/d/e/deep.txt").unlink()
+    (root / "c/d/e").rmdir()
+    (root / "c/d").rename(root / "moved")
+
+    assert index.lookup("deep.txt") == [str(root / "c/d/e/deep.txt")]
+    assert index.lookup("deep.txt", max_age=0) == []
+    assert index.lookup("e") == []
+    assert index.lookup("moved") == [str(root / "moved")]
+    assert not any(directory.startswith(str(root / "c/d")) for directory in index._directories)
+
+
+def test_index_file_is_shared(tmp_path, monkeypatch):
+    root = tmp_path / "tree"
+    _make_tree(root)
+    assert FileIndex(root=str(root), index_dir=str(tmp_path / "index")).refresh()
+
+    index: FileIndex = FileIndex(root=str(root), index_dir=str(tmp_path / "index"))
+    reads: list = _count_reads(index=index, monkeypatch=monkeypatch)
+
+    assert len(index.lookup("target.conf", max_age=60)) == 2
+    assert reads == []
+
+
+def test_index_and_walker_agree(tmp_path, monkeypatch):
+    _make_tree(tmp_path / "tree")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    for path in ("tree", "./tree", "tree/", str(tmp_path / "tree")):
+        searched: list = FileSystem.get_path_with_name(name="target.conf", path=path)
+        indexed: list = FileSystem.get_path_with_name(name="target.conf", path=path, max_age=60)
+
+        assert sorted(indexed) == sorted(searched) == sorted(Walker(path=path, name="target.conf"))
+        assert FileSystem.get_path_with_name(name="tree", path=path, max_age=60) == [path]
+
+
+def test_prune_is_shared_with_walker(tmp_path):
+    assert FileIndex(root=str(tmp_path)).prune == frozenset(DEFAULT_PRUNE)
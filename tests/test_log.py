@@ -0,0 +1,102 @@
+import io
+import json
+import pytest
+from .. import print_wo_change_line, printf_colorlog
+from ..log import COLOR_CODE, LogRecord, Logger, TTYSink, configure_logging, render
+
+
+class ListSink:
+
+    def __init__(self) -> None:
+        self.writes: list = []
+
+    def write(self, records: list) -> None:
+        self.writes.append([record.text for record in records])
+
+    def close(self) -> None:
+        return None
+
+
+class BrokenSink(ListSink):
+
+    def write(self, records: list) -> None:
+        raise OSError("disk full")
+
+
+@pytest.fixture
+def restore_logger():
+    yield
+    configure_logging()
+
+
+def test_render():
+    assert render("a <b> c", color="red") == f"a {COLOR_CODE['red']}b{COLOR_CODE['white']} c"
+    assert render("a <b", color="green") == f"a {COLOR_CODE['green']}b{COLOR_CODE['white']}"
+    assert render("a <b> c", use_color=False) == "a b c"
+
+
+def test_printf_colorlog_writes_in_process(restore_logger):
+    stream: io.StringIO = io.StringIO()
+    configure_logging(sinks=[TTYSink(stream=stream, color=False)])
+
+    printf_colorlog("service <sshd> is running", color="green")
+    print_wo_change_line("waiting...")
+    print_wo_change_line(" done")
+    assert stream.getvalue() == "service sshd is running\nwaiting... done"
+
+
+def test_tty_sink_colors_only_a_terminal():
+    stream: io.StringIO = io.StringIO()
+    TTYSink(stream=stream).write(records=[LogRecord(text="<x>", color="red")])
+    assert stream.getvalue() == "x\n"
+
+    stream = io.StringIO()
+    TTYSink(stream=stream, color=True).write(records=[LogRecord(text="<x>", color="red")])
+    assert stream.getvalue() == f"{COLOR_CODE['red']}x{COLOR_CODE['white']}\n"
+
+
+def test_buffered_logger_writes_in_batches():
+    sink: ListSink = ListSink()
+    logger: Logger = Logger(sinks=[sink], buffered=True, buffer_size=3)
+
+    logger.log("1")
+    logger.log("2")
+    assert sink.writes == []
+
+    logger.log("3")
+    logger.log("4")
+    assert sink.writes == [["1", "2", "3"]]
+
+    logger.flush()
+    assert sink.writes == [["1", "2", "3"], ["4"]]
+
+
+def test_background_logger_keeps_the_order():
+    sink: ListSink = ListSink()
+    logger: Logger = Logger(sinks=[sink], background=True, buffer_size=8)
+
+    for i in range(100):
+        logger.log(str(i))
+
+    logger.flush()
+    assert [text for records in sink.writes for text in records] == [str(i) for i in range(100)]
+    assert all(len(records) <= 8 for records in sink.writes)
+    logger.close()
+
+
+def test_broken_sink_does_not_stop_the_others():
+    sink: ListSink = ListSink()
+    Logger(sinks=[BrokenSink(), sink]).log("kept")
+    assert sink.writes == [["kept"]]
+
+
+def test_file_and_json_sinks(tmp_path, restore_logger):
+    path = tmp_path / "log.txt"
+    json_path = tmp_path / "log.jsonl"
+    configure_logging(path=str(path), json_path=str(json_path)).sinks[0] = ListSink()
+
+    printf_colorlog("user <root> added", color="red")
+    configure_logging()
+
+    assert path.read_text() == "user root added\n"
+    assert [json.loads(line)["message"] for line in json_path.read_text().splitlines()] == ["user root added"]
@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from .. import execute_command_run
+from ..aio import execute_command_run_async
+from ..metrics import entry_point, get_metrics, reset_metrics, set_metrics_enabled
+from ..service import Service
+
+
+@pytest.fixture(autouse=True)
+def metrics():
+    set_metrics_enabled(True)
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+def _calls() -> dict:
+    return {row["method"]: row["calls"] for row in get_metrics()}
+
+
+class Queries:
+
+    @staticmethod
+    @entry_point
+    def outer() -> None:
+        Queries.inner()
+
+    @staticmethod
+    @entry_point
+    def inner() -> None:
+        execute_command_run(command_str="true")
+
+    @staticmethod
+    def plain() -> None:
+        execute_command_run(command_str="true")
+
+
+def test_command_is_recorded_as_the_calling_method():
+    Queries.plain()
+
+    assert _calls() == {"Queries.plain": 1}
+
+
+def test_delegating_methods_are_recorded_as_the_first_one():
+    Queries.outer()
+    Queries.inner()
+
+    assert _calls() == {"Queries.outer": 1, "Queries.inner": 1}
+
+
+def test_service_state_queries():
+    Service.is_running(service="linux-cmd-test")
+    Service.are_enabled(services=["linux-cmd-test"])
+
+    assert set(_calls()) == {"Service.is_running", "Service.are_enabled"}
+
+
+def test_async_commands_are_recorded():
+    async def caller():
+        return await execute_command_run_async(command_str="echo hello", shell=True)
+
+    cp = asyncio.run(caller())
+    rows: list = get_metrics()
+
+    assert cp.stdout == b"hello\n"
+    assert [(row["method"], row["kind"], row["calls"], row["stdout_bytes"]) for row in rows] == \
+        [("test_async_commands_are_recorded.<locals>.caller", "run", 1, 6)]
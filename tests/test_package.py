@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+
+PACKAGE: str = __package__.rsplit(".", 1)[0]
+PACKAGE_PARENT: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _run_python(code: str) -> str:
+    cp = subprocess.run([sys.executable, "-c", code], cwd=PACKAGE_PARENT, capture_output=True, check=True)
+    return cp.stdout.decode().strip()
+
+
+def test_import_does_not_pull_in_the_helper_modules():
+    code: str = (f"import sys, {PACKAGE}\n"
+                 f"print(' '.join(sorted(name for name in sys.modules if name.startswith('{PACKAGE}.'))))")
+    assert _run_python(code) == ""
+
+
+def test_helpers_are_resolved_on_first_access():
+    code: str = (f"import {PACKAGE}\n"
+                 f"from {PACKAGE} import deadline, get_transport, cached\n"
+                 f"import {PACKAGE}.deadline\n"
+                 f"print(callable(deadline), {PACKAGE}.deadline is deadline, get_transport().name,"
+                 f" cached.__module__)")
+    assert _run_python(code) == f"True True local {PACKAGE}.cache"
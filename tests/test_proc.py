@@ -0,0 +1,236 @@
+import os
+import shutil
+import subprocess
+import time
+import pytest
+from .. import proc
+from ..proc import ProcessSampler, ProcessSet, ProcessSnapshot, read_process
+
+
+def _stat_line(pid: int, comm: str, utime: int = 0, stime: int = 0, starttime: int = 1000, rss_pages: int = 10,
+               ppid: int = 1) -> bytes:
+    # pid (comm) state ppid pgrp session tty_nr tpgid flags minflt cminflt majflt cmajflt utime stime cutime cstime
+    # priority nice num_threads itrealvalue starttime vsize rss ...
+    fields: list = ["S", ppid, pid, pid, 0, -1, 0, 0, 0, 0, 0, utime, stime, 0, 0, 20, 0, 1, 0, starttime,
+                    4096000, rss_pages] + [0] * 30
+    return f"{pid} ({comm}) {' '.join(str(field) for field in fields)}\n".encode()
+
+
+def _status(real: int, effective: int) -> bytes:
+    return (f"Name:\tfake\nUmask:\t0022\nState:\tS (sleeping)\nTgid:\t1\nPid:\t1\nPPid:\t0\n"
+            f"Uid:\t{real}\t{effective}\t{effective}\t{effective}\nGid:\t0\t0\t0\t0\n").encode()
+
+
+@pytest.fixture
+def fake_proc(tmp_path, monkeypatch):
+    monkeypatch.setattr(proc, "PROC_PATH", str(tmp_path))
+
+    def write(pid: int, stat: bytes, status: bytes = None, cmdline: bytes = b"") -> None:
+        directory = tmp_path / str(pid)
+        directory.mkdir(exist_ok=True)
+        (directory / "stat").write_bytes(stat)
+        (directory / "status").write_bytes(status if status is not None else _status(real=0, effective=0))
+        (directory / "cmdline").write_bytes(cmdline)
+
+    def write_cpu(user: int, idle: int) -> None:
+        (tmp_path / "stat").write_text(f"cpu  {user} 0 0 {idle} 0 0 0 0 0 0\ncpu0 {user} 0 0 {idle} 0 0 0 0 0 0\n")
+
+    write.cpu = write_cpu
+    write_cpu(user=0, idle=0)
+    return write
+
+
+def test_comm_with_spaces_and_parentheses(fake_proc):
+    fake_proc(42, _stat_line(pid=42, comm="a) (b c)", utime=7, stime=3, ppid=5), cmdline=b"prog\0-x\0a b\0")
+
+    record = read_process(pid=42)
+
+    assert record.comm == "a) (b c)"
+    assert (record.ppid, record.utime, record.stime, record.starttime) == (5, 7, 3, 1000)
+    assert record.rss == 10 * proc.PAGE_SIZE
+    assert record.cmdline == ["prog", "-x", "a b"]
+
+
+def test_uids_are_read_from_status(fake_proc):
+    fake_proc(43, _stat_line(pid=43, comm="setuid"), status=_status(real=1000, effective=0))
+
+    record = read_process(pid=43)
+
+    assert (record.real_uid, record.uid) == (1000, 0)
+
+
+def test_missing_process(fake_proc):
+    assert read_process(pid=44) is None
+
+
+def test_real_process_with_a_strange_name(tmp_path):
+    binary = tmp_path / "x) (y z"
+    shutil.copy(shutil.which("sleep"), binary)
+    process = subprocess.Popen([str(binary), "5"])
+    try:
+        for _ in range(50):
+            record = read_process(pid=process.pid)
+            if record is not None and record.comm == "x) (y z" and record.cmdline:
+                break
+            time.sleep(0.01)
+
+    finally:
+        process.kill()
+        process.wait()
+
+    assert record.comm == "x) (y z"
+    assert record.ppid == os.getpid()
+    assert (record.uid, record.real_uid) == (os.geteuid(), os.getuid())
+    assert record.cmdline == [str(binary), "5"]
+
+
+def test_sampler_cpu_percent(fake_proc, monkeypatch):
+    clock: list = [100.0]
+    monkeypatch.setattr(proc.time, "monotonic", lambda: clock[0])
+    sampler: ProcessSampler = ProcessSampler(history=3)
+
+    fake_proc(10, _stat_line(pid=10, comm="busy", utime=0, rss_pages=10))
+    fake_proc(11, _stat_line(pid=11, comm="idle", utime=0, rss_pages=20))
+    sampler.sample()
+
+    # 2 seconds later: 'busy' used one cpu for 1 second (CLOCK_TICKS ticks), 'idle' used nothing.
+    clock[0] = 102.0
+    fake_proc(10, _stat_line(pid=10, comm="busy", utime=proc.CLOCK_TICKS // 2, stime=proc.CLOCK_TICKS // 2,
+                             rss_pages=15))
+    fake_proc.cpu(user=300, idle=100)
+    sampler.sample()
+
+    top: list = sampler.top(n=2)
+    assert [sample.comm for sample in top] == ["busy", "idle"]
+    assert top[0].cpu_percent == pytest.approx(50.0)
+    assert top[0].rss_delta == 5 * proc.PAGE_SIZE
+    assert top[1].cpu_percent == 0.0
+    assert sampler.system_cpu_percent == pytest.approx(75.0)
+    assert [sample.cpu_percent for sample in sampler.get_history(pid=10)] == [0.0, pytest.approx(50.0)]
+
+
+def test_sampler_ignores_a_reused_pid(fake_proc, monkeypatch):
+    clock: list = [100.0]
+    monkeypatch.setattr(proc.time, "monotonic", lambda: clock[0])
+    sampler: ProcessSampler = ProcessSampler()
+
+    fake_proc(10, _stat_line(pid=10, comm="old", utime=5000, starttime=1000))
+    sampler.sample()
+
+    clock[0] = 101.0
+    fake_proc(10, _stat_line(pid=10, comm="new", utime=10, starttime=2000))
+    sampler.sample()
+
+    assert [(sample.comm, sample.cpu_percent) for sample in sampler.get_history(pid=10)] == [("new", 0.0)]
+
+
+def test_sampler_stretches_the_interval_to_the_budget():
+    sampler: ProcessSampler = ProcessSampler(interval=1.0, budget=0.05)
+
+    sampler.last_cost = 0.01
+    assert sampler.next_interval == 1.0
+
+    sampler.last_cost = 0.1
+    assert sampler.next_interval == pytest.approx(2.0)
+
+
+def test_sampler_keeps_a_bounded_history_and_drops_exited_processes(fake_proc, monkeypatch):
+    clock: list = [100.0]
+    monkeypatch.setattr(proc.time, "monotonic", lambda: clock[0])
+    sampler: ProcessSampler = ProcessSampler(history=3)
+
+    fake_proc(10, _stat_line(pid=10, comm="kept"))
+    fake_proc(11, _stat_line(pid=11, comm="exits", rss_pages=50))
+    for i in range(5):
+        clock[0] += 1.0
+        fake_proc(10, _stat_line(pid=10, comm="kept", rss_pages=10 + i))
+        sampler.sample()
+
+    history: list = sampler.get_history(pid=10)
+    assert len(history) == 3
+    assert [sample.rss for sample in history] == [(10 + i) * proc.PAGE_SIZE for i in (2, 3, 4)]
+    assert [sample.comm for sample in sampler.top(n=2, key="rss")] == ["exits", "kept"]
+
+    shutil.rmtree(proc.PROC_PATH + "/11")
+    clock[0] += 1.0
+    sampler.sample()
+    assert sampler.get_history(pid=11) == []
+    assert [sample.pid for sample in sampler.top(n=5)] == [10]
+
+
+def test_sampler_runs_in_the_background():
+    with ProcessSampler(interval=0.05) as sampler:
+        deadline: float = time.monotonic() + 10
+        while sampler.samples < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    samples: int = sampler.samples
+    assert samples >= 3
+    assert sampler.get_history(pid=os.getpid())
+    assert sampler.mean_cost > 0
+
+    time.sleep(0.2)
+    assert sampler.samples == samples
+
+
+@pytest.fixture
+def process_tree(fake_proc) -> ProcessSnapshot:
+    # 1 init -> 10 nginx (root) -> 11, 12 nginx workers (uid 33) -> 13 helper (uid 33)
+    tree: dict = {1: (0, "init", 0, b"/sbin/init\0"),
+                  10: (1, "nginx", 0, b"nginx: master process\0"),
+                  11: (10, "nginx", 33, b"nginx: worker process\0"),
+                  12: (10, "nginx", 33, b"nginx: worker process\0"),
+                  13: (11, "helper", 33, b"/usr/bin/helper\0--worker\0")}
+    for pid, (ppid, comm, uid, cmdline) in tree.items():
+        fake_proc(pid, _stat_line(pid=pid, comm=comm, ppid=ppid), _status(real=uid, effective=uid), cmdline)
+
+    return ProcessSnapshot.take()
+
+
+def test_snapshot_tree_traversal(process_tree):
+    assert len(process_tree) == 5 and 13 in process_tree
+    assert sorted(process_tree.children(pid=10).pids) == [11, 12]
+    # breadth-first: the children come before the grandchild.
+    assert sorted(process_tree.descendants(pid=10).pids[:2]) == [11, 12]
+    assert process_tree.descendants(pid=10).pids[2:] == [13]
+    assert process_tree.descendants(pid=10, include_self=True).pids[0] == 10
+    assert process_tree.ancestors(pid=13).pids == [11, 10, 1]
+    assert process_tree.descendants(pid=99).pids == []
+
+
+def test_snapshot_queries(process_tree):
+    assert sorted(process_tree.by_name(name="nginx").pids) == [10, 11, 12]
+    assert sorted(process_tree.by_user(user=33).pids) == [11, 12, 13]
+    assert sorted(process_tree.by_user(user="33").pids) == [11, 12, 13]
+    assert process_tree.by_user(user="no-such-user-here").pids == []
+    assert process_tree.matching(pattern=r"--worker").pids == [13]
+    assert process_tree.query(name="nginx", user=33).pids == [11, 12]
+    assert process_tree.query(user=33, cmdline=r"^nginx").pids == [11, 12]
+    assert process_tree.query(descendant_of=10, parent=11).pids == [13]
+    assert len(process_tree.query()) == 5
+
+
+def test_process_set_signals_only_the_same_process():
+    process = subprocess.Popen(["sleep", "30"])
+    try:
+        for _ in range(100):
+            found: ProcessSet = ProcessSnapshot.take().query(parent=os.getpid(), name="sleep")
+            if found.pids == [process.pid]:
+                break
+
+            time.sleep(0.01)
+
+        record = found.records[0]
+        reused = read_process(pid=process.pid)
+        reused.starttime = record.starttime + 1
+
+        # a pid which now belongs to another process is not signalled.
+        assert ProcessSet(records=[reused]).terminate() == {process.pid: False}
+        assert process.poll() is None
+
+        assert found.terminate() == {process.pid: True}
+        assert process.wait(timeout=10) == -15
+
+    finally:
+        process.kill()
+        process.wait()
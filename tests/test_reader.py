@@ -0,0 +1,76 @@
+import pytest
+from ..reader import iter_command_chunks, iter_file_chunks, map_file, read_range, split_lines, tail_file
+
+
+@pytest.fixture
+def make_file(tmp_path):
+    def make(data: bytes) -> str:
+        path = tmp_path / "data"
+        path.write_bytes(data)
+        return str(path)
+
+    return make
+
+
+def test_tail_without_trailing_line_feed(make_file):
+    assert tail_file(make_file(b"a\nb\nc"), n=2) == [b"b", b"c"]
+    assert tail_file(make_file(b"a\nb\nc\n"), n=2) == [b"b", b"c"]
+
+
+def test_tail_of_empty_file(make_file):
+    path: str = make_file(b"")
+    assert tail_file(path, n=3) == []
+    with map_file(path) as data:
+        assert data == b""
+
+
+def test_tail_of_file_shorter_than_n(make_file):
+    assert tail_file(make_file(b"a\nb\n"), n=10) == [b"a", b"b"]
+    assert tail_file(make_file(b"only"), n=10) == [b"only"]
+    assert tail_file(make_file(b"a\nb\n"), n=0) == []
+
+
+def test_tail_keeps_empty_lines(make_file):
+    assert tail_file(make_file(b"a\n\n\nb\n"), n=3) == [b"", b"", b"b"]
+
+
+def test_tail_of_large_file(make_file):
+    lines: list = [f"line {i}".encode() for i in range(100000)]
+    assert tail_file(make_file(b"\n".join(lines) + b"\n"), n=3) == lines[-3:]
+
+
+def test_split_lines_across_chunk_boundaries(make_file):
+    path: str = make_file(b"abcdefgh\nij\n\nklm")
+    assert list(split_lines(iter_file_chunks(path, chunk_size=4))) == [b"abcdefgh", b"ij", b"", b"klm"]
+    assert list(split_lines(iter_file_chunks(path, chunk_size=1))) == [b"abcdefgh", b"ij", b"", b"klm"]
+
+
+def test_split_lines_of_empty_file(make_file):
+    assert list(split_lines(iter_file_chunks(make_file(b"")))) == []
+
+
+def test_split_lines_bounds_long_lines():
+    assert list(split_lines([b"abcde", b"fg\nhi"], max_line_length=3)) == [b"abc", b"def", b"g", b"hi"]
+
+
+def test_ranges(make_file):
+    path: str = make_file(b"0123456789")
+    assert read_range(path, offset=3, length=4) == b"3456"
+    assert read_range(path, offset=8) == b"89"
+    assert b"".join(iter_file_chunks(path, offset=2, length=5, chunk_size=2)) == b"23456"
+
+
+def test_command_chunks_return_the_status(make_file):
+    path: str = make_file(b"0123456789")
+
+    chunks: list = []
+    generator = iter_command_chunks(path, offset=2, length=5)
+    try:
+        while True:
+            chunks.append(next(generator))
+
+    except StopIteration as stop:
+        status = stop.value
+
+    assert b"".join(chunks) == b"23456"
+    assert status == 0
@@ -0,0 +1,267 @@
+import os
+import subprocess
+import threading
+import time
+import pytest
+from .. import service as service_module
+from ..service import Service
+
+
+class FakeSystemctl:
+
+    """
+    stands in for execute_command_run() of service.py and answers 'systemctl is-active/is-enabled' like systemd:
+    one line per unit, and 'is-enabled' stops at the first unit without a unit file.
+    """
+
+    def __init__(self, units: dict, broken: bool = False) -> None:
+        self.units: dict = units
+        self.broken: bool = broken
+        self.commands: list = []
+
+    def __call__(self, command_str: str, sudo_password: str = None, **kwargs) -> subprocess.CompletedProcess:
+        self.commands.append(command_str)
+        if self.broken:
+            return subprocess.CompletedProcess(args=command_str, returncode=1, stdout=b"",
+                                               stderr=b"sudo: a password is required\n")
+
+        _, verb, *names = command_str.split(" ")
+        lines: list = []
+        for name in names:
+            if name not in self.units:
+                if verb == "is-enabled":
+                    return subprocess.CompletedProcess(
+                        args=command_str, returncode=1, stdout="".join(lines).encode(),
+                        stderr=f"Failed to get unit file state for {name}.service: No such file\n".encode())
+
+                lines.append("inactive\n")
+                continue
+
+            lines.append(f"{self.units[name][0 if verb == 'is-active' else 1]}\n")
+
+        return subprocess.CompletedProcess(args=command_str, returncode=0, stdout="".join(lines).encode(), stderr=b"")
+
+
+@pytest.fixture
+def systemctl(monkeypatch):
+    def install(units: dict, broken: bool = False) -> FakeSystemctl:
+        fake: FakeSystemctl = FakeSystemctl(units=units, broken=broken)
+        monkeypatch.setattr(service_module, "execute_command_run", fake)
+        return fake
+
+    return install
+
+
+UNITS: dict = {f"unit{i}": ("active" if i % 2 else "inactive", "enabled" if i % 3 else "disabled") for i in range(10)}
+
+
+def test_states_are_read_in_chunks(systemctl):
+    fake: FakeSystemctl = systemctl(UNITS)
+
+    states: dict = Service.get_states(verb="is-active", services=list(UNITS), chunk_size=4)
+
+    assert states == {name: state for name, (state, _) in UNITS.items()}
+    assert len(fake.commands) == 3
+
+
+def test_missing_unit_stops_only_its_own_query(systemctl):
+    fake: FakeSystemctl = systemctl(UNITS)
+    services: list = ["unit1", "missing", "unit2", "unit3"]
+
+    states: dict = Service.get_states(verb="is-enabled", services=services, chunk_size=10)
+
+    assert states == {"unit1": "enabled", "missing": None, "unit2": "enabled", "unit3": "disabled"}
+    assert len(fake.commands) == 2
+
+
+def test_missing_first_unit(systemctl):
+    systemctl(UNITS)
+
+    assert Service.get_states(verb="is-enabled", services=["missing", "unit3"]) == {"missing": None,
+                                                                                   "unit3": "disabled"}
+
+
+def test_failed_command_does_not_query_unit_by_unit(systemctl):
+    fake: FakeSystemctl = systemctl(UNITS, broken=True)
+
+    states: dict = Service.get_states(verb="is-active", services=list(UNITS), chunk_size=4)
+
+    assert states == dict.fromkeys(UNITS)
+    assert len(fake.commands) == 1
+
+
+def test_duplicates_are_queried_once(systemctl):
+    fake: FakeSystemctl = systemctl(UNITS)
+
+    assert Service.are_running(services=["unit1", "unit1", "unit2"]) == {"unit1": True, "unit2": False}
+    assert fake.commands == ["systemctl is-active unit1 unit2"]
+
+
+def _show_output(units: dict) -> bytes:
+    blocks: list = [f"Id={unit_id}\nNames={' '.join(names)}\nAfter={' '.join(after)}\nRequires=\n"
+                    for unit_id, (names, after) in units.items()]
+    return "\n".join(blocks).encode()
+
+
+def test_plan_restart_follows_aliases(monkeypatch):
+    # 'sshd' is an alias of ssh.service, and the dependencies name the primary unit.
+    units: dict = {
+        "ssh.service": (["ssh.service", "sshd.service"], ["network.target"]),
+        "app.service": (["app.service"], ["ssh.service", "network.target"]),
+        "worker.service": (["worker.service"], ["app.service"]),
+    }
+    commands: list = []
+
+    def fake(command_str: str, sudo_password: str = None, **kwargs) -> subprocess.CompletedProcess:
+        commands.append(command_str)
+        return subprocess.CompletedProcess(args=command_str, returncode=0, stdout=_show_output(units), stderr=b"")
+
+    monkeypatch.setattr(service_module, "execute_command_run", fake)
+
+    assert Service.plan_restart(services=["worker", "app", "sshd"]) == [["sshd"], ["app"], ["worker"]]
+    assert len(commands) == 1
+
+
+class FakeUnits:
+
+    """
+    stands in for 'systemctl list-units', 'list-unit-files' and 'show' of ServiceSnapshot.
+    """
+
+    def __init__(self) -> None:
+        # name: [load, active, sub, unit file state or None, main pid]
+        self.units: dict = {
+            "sshd.service": ["loaded", "active", "running", "enabled", "101"],
+            "cron.service": ["loaded", "failed", "failed", "enabled", "0"],
+            "getty@tty1.service": ["loaded", "active", "running", None, "202"],
+            "old.service": [None, "inactive", "dead", "disabled", "0"],
+        }
+        self.shown: list = []
+
+    def __call__(self, command_str: str, sudo_password: str = None, **kwargs) -> subprocess.CompletedProcess:
+        lines: list = []
+        if command_str.startswith("systemctl list-units"):
+            lines = [f"{name} {load} {active} {sub} {name} daemon"
+                     for name, (load, active, sub, _, _) in self.units.items() if load is not None]
+
+        elif command_str.startswith("systemctl list-unit-files"):
+            lines = [f"{name} {enabled} enabled" for name, (_, _, _, enabled, _) in self.units.items()
+                     if enabled is not None]
+
+        elif command_str.startswith("systemctl show"):
+            names: list = command_str.split(" ")[3:]
+            self.shown.append(names)
+            lines = ["\n".join((f"Id={name}", f"MainPID={self.units[name][4]}",
+                                f"UnitFileState={self.units[name][3] or 'enabled-runtime'}")) + "\n"
+                     for name in names]
+            return subprocess.CompletedProcess(args=command_str, returncode=0, stdout="\n".join(lines).encode(),
+                                               stderr=b"")
+
+        return subprocess.CompletedProcess(args=command_str, returncode=0, stdout="\n".join(lines).encode() + b"\n",
+                                           stderr=b"")
+
+
+@pytest.fixture
+def units(monkeypatch) -> FakeUnits:
+    fake: FakeUnits = FakeUnits()
+    monkeypatch.setattr(service_module, "execute_command_run", fake)
+    return fake
+
+
+def test_snapshot_indexes_units(units):
+    snapshot = Service.snapshot()
+
+    assert len(snapshot) == 4
+    assert "sshd" in snapshot and snapshot.get("sshd").properties["MainPID"] == "101"
+    assert snapshot.failed() == ["cron.service"]
+    assert snapshot.with_sub_state("running") == ["getty@tty1.service", "sshd.service"]
+    assert snapshot.enabled_but_inactive() == ["cron.service"]
+    # a template instance takes its enablement from 'systemctl show'.
+    assert snapshot.get("getty@tty1").enabled == "enabled-runtime"
+    # a unit which is not loaded is not shown.
+    assert snapshot.get("old").load is None and "old.service" not in sum(units.shown, [])
+
+
+def test_snapshot_refresh_shows_only_changed_units(units):
+    snapshot = Service.snapshot()
+    units.shown.clear()
+
+    assert snapshot.refresh() == []
+    assert units.shown == []
+
+    units.units["cron.service"][1:3] = ["active", "running"]
+    units.units["sshd.service"][0] = None
+    assert snapshot.refresh() == ["cron.service", "sshd.service"]
+    assert units.shown == [["cron.service"]]
+    assert snapshot.failed() == []
+    assert snapshot.with_active_state("active") == ["cron.service", "getty@tty1.service"]
+    assert snapshot.get("sshd").load is None
+
+
+# stands in for 'systemctl is-active': the state of a unit is read from a file in $STATE_DIR.
+_FAKE_SYSTEMCTL: str = """#!/bin/sh
+shift
+for unit in "$@"; do
+    if [ -f "$STATE_DIR/$unit" ]; then cat "$STATE_DIR/$unit"; else echo inactive; fi
+done
+"""
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "bin"
+    directory.mkdir()
+    systemctl = directory / "systemctl"
+    systemctl.write_text(_FAKE_SYSTEMCTL)
+    systemctl.chmod(0o755)
+    states = tmp_path / "states"
+    states.mkdir()
+    monkeypatch.setenv("PATH", f"{directory}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("STATE_DIR", str(states))
+    return states
+
+
+def _set_state_later(states, service: str, state: str, delay: float) -> threading.Timer:
+    timer = threading.Timer(delay, lambda: (states / service).write_text(f"{state}\n"))
+    timer.start()
+    return timer
+
+
+def test_wait_for_polls_until_the_state_is_reached(state_dir):
+    timer = _set_state_later(state_dir, "sshd", "active", 0.3)
+    result = Service.wait_for(service="sshd", state="active", timeout=10.0, interval=0.05)
+    timer.join()
+
+    assert result
+    assert result.states == {"sshd": "active"}
+    assert [state for _, _, state in result.timeline] == ["inactive", "active"]
+    assert 0.3 <= result.elapsed < 5
+
+
+def test_wait_for_all_waits_for_the_last_service(state_dir):
+    (state_dir / "sshd").write_text("active\n")
+    timer = _set_state_later(state_dir, "cron", "active", 0.2)
+    result = Service.wait_for_all(services=["sshd", "cron"], timeout=10.0, interval=0.05)
+    timer.join()
+
+    assert result
+    assert result.timeline[0][1:] == ("sshd", "active")
+    assert result.timeline[-1][1:] == ("cron", "active")
+
+
+def test_wait_for_stops_at_a_fail_state(state_dir):
+    (state_dir / "sshd").write_text("failed\n")
+    started: float = time.monotonic()
+    result = Service.wait_for(service="sshd", state="active", timeout=10.0, interval=0.05)
+
+    assert not result
+    assert result.states == {"sshd": "failed"}
+    assert time.monotonic() - started < 5
+
+
+def test_wait_for_times_out(state_dir):
+    result = Service.wait_for(service="sshd", state="active", timeout=0.5, interval=0.05)
+
+    assert not result
+    assert result.states == {"sshd": "inactive"}
+    assert 0.4 <= result.elapsed < 5
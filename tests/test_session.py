@@ -0,0 +1,151 @@
+import os
+import subprocess
+import time
+import pytest
+from .. import execute_command_run
+from ..deadline import CommandTimeout
+from ..session import SessionPool, ShellSession
+from ..session import disable_privileged_session, enable_privileged_session, get_privileged_session
+
+
+def test_run_returns_output_and_returncode():
+    session = ShellSession()
+    try:
+        cp = session.run(command_str="echo out; echo err >&2; exit 3")
+
+    finally:
+        session.close()
+
+    assert cp.stdout == b"out\n"
+    assert cp.stderr == b"err\n"
+    assert cp.returncode == 3
+
+
+def test_run_keeps_output_without_line_feed_apart_from_the_frame():
+    session = ShellSession()
+    try:
+        first = session.run(command_str="printf 'no line feed'; printf 'err' >&2")
+        second = session.run(command_str="echo next")
+
+    finally:
+        session.close()
+
+    assert (first.stdout, first.stderr, first.returncode) == (b"no line feed", b"err", 0)
+    assert (second.stdout, second.returncode) == (b"next\n", 0)
+
+
+def test_run_does_not_let_a_command_read_the_next_frame():
+    session = ShellSession()
+    try:
+        first = session.run(command_str="cat")
+        second = session.run(command_str="echo still framed")
+
+    finally:
+        session.close()
+
+    assert first.stdout == b""
+    assert second.stdout == b"still framed\n"
+
+
+def test_run_quotes_argv():
+    session = ShellSession()
+    try:
+        cp = session.run(command_str=["printf", "%s|", "a b", "$HOME", "'"])
+
+    finally:
+        session.close()
+
+    assert cp.stdout == b"a b|$HOME|'|"
+
+
+def test_run_times_out_and_the_session_stays_usable():
+    session = ShellSession()
+    try:
+        started: float = time.monotonic()
+        cp = session.run(command_str="sleep 5", timeout=0.3)
+        elapsed: float = time.monotonic() - started
+        after = session.run(command_str="echo alive")
+
+    finally:
+        session.close()
+
+    assert isinstance(cp, CommandTimeout)
+    assert cp.returncode != 0
+    assert elapsed < 3
+    assert after.stdout == b"alive\n"
+
+
+def test_exit_does_not_end_the_session():
+    session = ShellSession()
+    try:
+        session.run(command_str="exit 0")
+        cp = session.run(command_str="echo kept")
+
+    finally:
+        session.close()
+
+    assert cp.stdout == b"kept\n"
+
+
+def test_run_after_the_shell_was_killed():
+    session = ShellSession()
+    try:
+        killed = session.run(command_str="kill -9 $$")
+        cp = session.run(command_str="echo lost")
+
+    finally:
+        session.close()
+
+    assert not session.is_alive()
+    assert killed.returncode != 0
+    assert isinstance(cp, subprocess.CompletedProcess)
+    assert cp.returncode != 0
+
+
+def test_pool_replaces_a_dead_worker():
+    with SessionPool(size=1) as pool:
+        pool.run(command_str="kill -9 $$")
+        cp = pool.run(command_str="echo replaced")
+
+    assert cp.stdout == b"replaced\n"
+    assert cp.returncode == 0
+
+
+@pytest.fixture
+def not_root(fake_sudo, monkeypatch):
+    # the root workers are started with 'sudo -S' only for a user who is not root.
+    monkeypatch.setattr(os, "geteuid", lambda: 1000)
+    yield
+    disable_privileged_session()
+
+
+def test_privileged_commands_run_on_one_root_worker(not_root):
+    pool = enable_privileged_session(sudo_password="secret")
+    assert pool is not None
+    assert get_privileged_session(sudo_password="secret") is pool
+
+    first = execute_command_run(command_str="echo $$", sudo_password="secret")
+    second = execute_command_run(command_str="echo $$", sudo_password="secret")
+    assert first.returncode == 0
+    assert first.stdout == second.stdout
+    assert int(first.stdout) != os.getpid()
+
+
+def test_privileged_session_is_not_lent_for_another_password(not_root):
+    assert enable_privileged_session(sudo_password="secret") is not None
+    assert get_privileged_session(sudo_password="other") is None
+    assert get_privileged_session(sudo_password=None) is None
+
+    # the command falls back to 'sudo -S', which rejects the password.
+    assert execute_command_run(command_str="true", sudo_password="other").returncode != 0
+
+
+def test_privileged_session_with_a_wrong_password(not_root):
+    assert enable_privileged_session(sudo_password="wrong") is None
+    assert get_privileged_session(sudo_password="wrong") is None
+
+
+def test_disable_privileged_session(not_root):
+    enable_privileged_session(sudo_password="secret")
+    disable_privileged_session()
+    assert get_privileged_session(sudo_password="secret") is None
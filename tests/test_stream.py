@@ -0,0 +1,68 @@
+import os
+import shutil
+import time
+import pytest
+from .. import execute_command_stream
+from ..file import FileSystem
+from ..ubuntu.dpkg import Dpkg
+
+
+def _is_gone(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+
+    except ProcessLookupError:
+        return True
+
+    return False
+
+
+def test_stream_yields_lines_without_line_feed():
+    assert list(execute_command_stream("printf 'a\\nb\\n\\nc'", shell=True)) == ["a", "b", "", "c"]
+
+
+def test_stream_parser_skips_none():
+    lines: list = list(execute_command_stream("printf '1\\nx\\n3\\n'", shell=True,
+                                              parser=lambda a: int(a) if a.isdigit() else None))
+    assert lines == [1, 3]
+
+
+def test_stream_splits_long_lines():
+    assert list(execute_command_stream("echo abcdefghij", max_line_length=4)) == ["abcd", "efgh", "ij"]
+
+
+def test_limit_kills_the_command():
+    started: float = time.monotonic()
+    lines: list = list(execute_command_stream("echo $$; sleep 30", shell=True, limit=1))
+
+    assert time.monotonic() - started < 10
+    assert _is_gone(int(lines[0]))
+
+
+def test_break_kills_the_command():
+    stream = execute_command_stream("echo $$; echo more; sleep 30", shell=True)
+    pid: int = int(next(stream))
+    stream.close()
+
+    assert _is_gone(pid)
+
+
+def test_timeout_stops_the_stream():
+    started: float = time.monotonic()
+    assert list(execute_command_stream("echo first; sleep 30", shell=True, timeout=0.3)) == ["first"]
+    assert time.monotonic() - started < 10
+
+
+def test_iter_list_on_path(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).touch()
+
+    assert list(FileSystem.iter_list_on_path(path=str(tmp_path))) == ["a", "b", "c"]
+    assert list(FileSystem.iter_list_on_path(path=str(tmp_path), limit=2)) == ["a", "b"]
+
+
+@pytest.mark.skipif(shutil.which("dpkg-query") is None, reason="dpkg-query is not installed.")
+def test_dpkg_iter_installed():
+    packages: list = list(Dpkg.iter_installed(limit=3))
+    assert len(packages) == 3
+    assert all(len(package) == 2 and package[0] for package in packages)
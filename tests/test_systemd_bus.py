@@ -0,0 +1,215 @@
+import shutil
+import subprocess
+import threading
+import time
+import pytest
+from ..service import Service
+from ..systemd_bus import SystemdBus, disable_dbus_backend, enable_dbus_backend
+
+jeepney = pytest.importorskip("jeepney")
+
+pytestmark = pytest.mark.skipif(shutil.which("dbus-daemon") is None, reason="dbus-daemon is not installed")
+
+_BUS_CONFIG: str = """<!DOCTYPE busconfig PUBLIC "-//freedesktop//DTD D-Bus Bus Configuration 1.0//EN"
+ "http://www.freedesktop.org/standards/dbus/1.0/busconfig.dtd">
+<busconfig>
+  <type>session</type>
+  <listen>unix:path={socket}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+"""
+
+
+class FakeSystemd:
+
+    """
+    answers the calls of SystemdBus like systemd: a job finishes after 'delay' seconds with JobRemoved,
+    and every change of ActiveState is signalled with PropertiesChanged. 'bad.service' always fails.
+    """
+
+    def __init__(self, address: str, delay: float = 0.2) -> None:
+        from jeepney.bus_messages import message_bus
+        from jeepney.io.blocking import open_dbus_connection
+
+        self.delay: float = delay
+        self.units: dict = {"sshd.service": ["inactive", "enabled"], "bad.service": ["inactive", "disabled"]}
+        self._lock = threading.Lock()
+        self._jobs: int = 0
+        self._running: list = []
+        self._conn = open_dbus_connection(bus=address)
+        self._conn.send_and_get_reply(message_bus.RequestName("org.freedesktop.systemd1"))
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        for thread in self._running:
+            thread.join()
+
+        self._conn.close()
+
+    def _send(self, message) -> None:
+        with self._lock:
+            self._conn.send(message)
+
+    def _set_state(self, unit: str, state: str) -> None:
+        from jeepney import DBusAddress, new_signal
+
+        self.units[unit][0] = state
+        address = DBusAddress(f"/org/freedesktop/systemd1/unit/{unit.replace('.', '_2e')}",
+                              interface="org.freedesktop.DBus.Properties")
+        self._send(new_signal(address, "PropertiesChanged", "sa{sv}as",
+                              ("org.freedesktop.systemd1.Unit", {"ActiveState": ("s", state)}, [])))
+
+    def _finish(self, job: int, path: str, unit: str, state: str) -> None:
+        from jeepney import DBusAddress, new_signal
+
+        self._set_state(unit=unit, state="activating")
+        time.sleep(self.delay)
+        self._set_state(unit=unit, state=state)
+        manager = DBusAddress("/org/freedesktop/systemd1", interface="org.freedesktop.systemd1.Manager")
+        result: str = "failed" if state == "failed" else "done"
+        self._send(new_signal(manager, "JobRemoved", "uoss", (job, path, unit, result)))
+
+    def _serve(self) -> None:
+        from jeepney import HeaderFields, MessageType, new_error, new_method_return
+
+        while True:
+            try:
+                message = self._conn.receive()
+
+            except Exception:
+                return
+
+            if message.header.message_type != MessageType.method_call:
+                continue
+
+            member: str = message.header.fields[HeaderFields.member]
+            body: tuple = message.body
+
+            if member in ("StartUnit", "StopUnit", "RestartUnit"):
+                unit: str = body[0]
+                if unit not in self.units:
+                    self._send(new_error(message, "org.freedesktop.systemd1.NoSuchUnit", "s", ("no such unit",)))
+                    continue
+
+                self._jobs += 1
+                path: str = f"/org/freedesktop/systemd1/job/{self._jobs}"
+                self._send(new_method_return(message, "o", (path,)))
+                state: str = "failed" if unit == "bad.service" else "inactive" if member == "StopUnit" else "active"
+                thread = threading.Thread(target=self._finish, args=(self._jobs, path, unit, state), daemon=True)
+                self._running.append(thread)
+                thread.start()
+
+            elif member == "LoadUnit":
+                path = f"/org/freedesktop/systemd1/unit/{body[0].replace('.', '_2e')}"
+                self._send(new_method_return(message, "o", (path,)))
+
+            elif member == "Get":
+                unit = message.header.fields[HeaderFields.path].rsplit("/", 1)[1].replace("_2e", ".")
+                self._send(new_method_return(message, "v", (("s", self.units.get(unit, ["inactive"])[0]),)))
+
+            elif member == "GetUnitFileState":
+                if body[0] in self.units:
+                    self._send(new_method_return(message, "s", (self.units[body[0]][1],)))
+                else:
+                    self._send(new_error(message, "org.freedesktop.DBus.Error.FileNotFound", "s", ("no such unit",)))
+
+            elif member == "EnableUnitFiles":
+                for unit in body[0]:
+                    self.units[unit][1] = "enabled"
+                self._send(new_method_return(message, "ba(sss)", (False, [])))
+
+            elif member == "DisableUnitFiles":
+                for unit in body[0]:
+                    self.units[unit][1] = "disabled"
+                self._send(new_method_return(message, "a(sss)", ([],)))
+
+            else:
+                self._send(new_method_return(message))
+
+
+@pytest.fixture
+def bus_address(tmp_path):
+    config = tmp_path / "bus.conf"
+    config.write_text(_BUS_CONFIG.format(socket=tmp_path / "bus"))
+    daemon = subprocess.Popen(args=["dbus-daemon", f"--config-file={config}", "--nofork", "--print-address"],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    address: str = daemon.stdout.readline().decode().strip()
+
+    systemd = FakeSystemd(address=address)
+    try:
+        yield address
+
+    finally:
+        systemd.close()
+        daemon.terminate()
+        daemon.wait()
+
+
+@pytest.fixture
+def bus(bus_address):
+    backend = SystemdBus(bus=bus_address, timeout=5.0)
+    assert backend.connect()
+    try:
+        yield backend
+
+    finally:
+        backend.close()
+
+
+def test_jobs_wait_for_job_removed(bus):
+    started: float = time.monotonic()
+
+    assert bus.start(unit="sshd") == "done"
+    assert time.monotonic() - started >= 0.2
+    assert bus.get_active_state(unit="sshd") == "active"
+    assert bus.stop(unit="sshd.service") == "done"
+    assert bus.get_active_state(unit="sshd") == "inactive"
+    assert bus.start(unit="bad") == "failed"
+
+
+def test_job_timeout_and_unknown_unit(bus):
+    assert bus.start(unit="sshd", timeout=0.05) == "timeout"
+    assert bus.start(unit="missing") is None
+    assert bus.get_unit_file_state(unit="missing") is None
+
+
+def test_unit_files(bus):
+    assert bus.get_unit_file_state(unit="bad") == "disabled"
+    assert bus.enable(unit="bad") is True
+    assert bus.get_unit_file_state(unit="bad") == "enabled"
+    assert bus.disable(unit="bad") is True
+    assert bus.get_unit_file_state(unit="bad") == "disabled"
+
+
+def test_watch_active_states_is_notified(bus):
+    events = bus.watch_active_states(units=["sshd"], timeout=3.0)
+    assert next(events) == ("sshd", "inactive")
+
+    threading.Thread(target=bus.start, kwargs={"unit": "sshd"}, daemon=True).start()
+    assert next(events) == ("sshd", "activating")
+    assert next(events) == ("sshd", "active")
+    events.close()
+
+
+def test_service_uses_the_backend(bus_address):
+    assert enable_dbus_backend(bus=bus_address, timeout=5.0) is not None
+    try:
+        assert Service.is_running(service="sshd") is False
+        assert Service.start(service="sshd") is True
+        assert Service.is_running(service="sshd") is True
+        assert Service.start(service="bad") is False
+
+        Service.stop(service="sshd")
+        threading.Thread(target=Service.start, kwargs={"service": "sshd"}, daemon=True).start()
+        result = Service.wait_for(service="sshd", state="active", timeout=3.0)
+        assert result
+        assert [state for _, _, state in result.timeline][-1] == "active"
+
+    finally:
+        disable_dbus_backend()
@@ -0,0 +1,136 @@
+import os
+import pytest
+from ..walk import Walker
+
+
+def _make_tree(root: str) -> None:
+    for directory in ("a/b/c", "a/skip", "d", "locked/inner"):
+        os.makedirs(os.path.join(root, directory))
+
+    for path in ("top.log", "a/one.log", "a/b/two.txt", "a/b/c/three.log", "a/skip/four.log", "d/five.log",
+                 "locked/inner/six.log"):
+        with open(os.path.join(root, path), "w") as file:
+            file.write(path)
+
+
+def _expected(root: str) -> set:
+    found: set = {root}
+    for directory, names, files in os.walk(root):
+        found.update(os.path.join(directory, name) for name in names + files)
+
+    return found
+
+
+def test_walker_finds_the_same_paths_as_os_walk(tmp_path):
+    root: str = str(tmp_path)
+    _make_tree(root)
+
+    assert set(Walker(path=root, workers=4)) == _expected(root)
+
+
+def test_walker_filters(tmp_path):
+    root: str = str(tmp_path)
+    _make_tree(root)
+
+    logs: set = set(Walker(path=root, name="*.log", file_type="file", exclude=["skip"], prune=[f"{root}/locked"]))
+    shallow: set = set(Walker(path=root, file_type="directory", max_depth=1))
+
+    assert {os.path.relpath(path, root) for path in logs} == {"top.log", "a/one.log", "a/b/c/three.log", "d/five.log"}
+    assert {os.path.relpath(path, root) for path in shallow} == {".", "a", "d", "locked"}
+
+
+def test_walker_stops_at_limit(tmp_path):
+    root: str = str(tmp_path)
+    _make_tree(root)
+
+    assert len(list(Walker(path=root).iter(limit=3))) == 3
+
+
+def test_walker_skips_unreadable_directories(tmp_path, monkeypatch):
+    root: str = str(tmp_path)
+    _make_tree(root)
+    locked: str = os.path.join(root, "locked")
+    scandir = os.scandir
+
+    def fake_scandir(path):
+        if path == locked:
+            raise PermissionError(13, "Permission denied", path)
+
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", fake_scandir)
+
+    found: set = set(Walker(path=root, workers=2))
+    assert locked in found
+    assert found == {path for path in _expected(root) if not path.startswith(locked + os.sep)}
+
+
+def test_walker_keeps_entries_read_before_an_error(tmp_path, monkeypatch):
+    root: str = str(tmp_path)
+    _make_tree(root)
+    broken: str = os.path.join(root, "a")
+    scandir = os.scandir
+
+    class FailingIterator:
+
+        def __init__(self, path):
+            self._entries = sorted(scandir(path), key=lambda entry: entry.name)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            return None
+
+        def __iter__(self):
+            yield self._entries[0]
+            raise OSError(5, "Input/output error")
+
+    monkeypatch.setattr(os, "scandir", lambda path: FailingIterator(path) if path == broken else scandir(path))
+
+    found: set = {os.path.relpath(path, root) for path in Walker(path=root, workers=2)}
+    assert "a/b" in found
+    assert "a/one.log" not in found
+    assert {"d/five.log", "locked/inner/six.log"} <= found
+
+
+def test_walker_raises_the_error_of_a_worker(tmp_path, monkeypatch):
+    _make_tree(str(tmp_path))
+
+    def fail(self, directory, depth):
+        raise RuntimeError("broken worker")
+
+    monkeypatch.setattr(Walker, "_scan", fail)
+
+    with pytest.raises(RuntimeError, match="broken worker"):
+        list(Walker(path=str(tmp_path), workers=2))
+
+
+def test_walker_skips_kernel_filesystems_by_default():
+    found: list = list(Walker(path="/", max_depth=2, file_type="directory"))
+
+    assert "/proc" in found
+    assert not any(path.startswith(("/proc/", "/sys/", "/dev/")) for path in found)
+
+
+def test_walker_stops_at_symlink_cycles(tmp_path):
+    root: str = str(tmp_path)
+    _make_tree(root)
+    os.symlink("..", os.path.join(root, "a", "loop"))
+    os.symlink(os.path.join(root, "a"), os.path.join(root, "d", "to_a"))
+
+    found: list = list(Walker(path=root, follow_symlinks=True, workers=4))
+    logs: list = [path for path in found if path.endswith("three.log")]
+
+    assert len(found) == len(set(found))
+    assert len(logs) == 1
+    assert os.path.join(root, "a", "loop") in found
+
+
+def test_walker_applies_exclude_to_the_root(tmp_path):
+    root: str = str(tmp_path)
+    _make_tree(root)
+
+    assert list(Walker(path=os.path.join(root, "a"), exclude=["a"])) == []
+    assert list(Walker(path=os.path.join(root, "a"), exclude=[os.path.join(root, "a")])) == []
+    assert len(list(Walker(path=os.path.join(root, "a"), exclude=["b"]))) == 4
@@ -0,0 +1,132 @@
+import os
+import resource
+import stat
+from ..writer import write_files, write_files_privileged
+
+
+def _files(root) -> dict:
+    return {
+        str(root / "small.conf"): b"key=value\n",
+        str(root / "binary.bin"): bytes(range(256)) * 64,
+        str(root / "no line feed"): b"last line",
+        str(root / "empty"): b"",
+    }
+
+
+def _assert_written(files: dict) -> None:
+    for path, data in files.items():
+        with open(path, "rb") as file:
+            assert file.read() == data
+
+
+def _leftovers(root) -> list:
+    return [name for name in os.listdir(root) if name.startswith(".")]
+
+
+def test_write_files(tmp_path):
+    files: dict = _files(tmp_path)
+
+    assert write_files(files=files) == dict.fromkeys(files, True)
+    _assert_written(files)
+    assert _leftovers(tmp_path) == []
+
+
+def test_write_files_keeps_the_mode_and_writes_through_symlinks(tmp_path):
+    target = tmp_path / "target"
+    target.write_bytes(b"old")
+    target.chmod(0o640)
+    link = tmp_path / "link"
+    link.symlink_to(target)
+
+    assert write_files(files={str(link): b"new"}) == {str(link): True}
+    assert link.is_symlink()
+    assert target.read_bytes() == b"new"
+    assert stat.S_IMODE(target.stat().st_mode) == 0o640
+
+    assert write_files(files={str(target): b"mode"}, mode=0o600) == {str(target): True}
+    assert stat.S_IMODE(target.stat().st_mode) == 0o600
+
+
+def test_write_files_skips_unchanged_files(tmp_path):
+    path = tmp_path / "same"
+    path.write_bytes(b"same")
+    inode: int = path.stat().st_ino
+
+    assert write_files(files={str(path): b"same"}, skip_unchanged=True) == {str(path): True}
+    assert path.stat().st_ino == inode
+
+
+def test_write_files_reports_each_failure(tmp_path):
+    files: dict = {str(tmp_path / "ok"): b"ok", str(tmp_path / "missing" / "file"): b"no folder"}
+
+    assert write_files(files=files) == {str(tmp_path / "ok"): True, str(tmp_path / "missing" / "file"): False}
+    assert (tmp_path / "ok").read_bytes() == b"ok"
+
+
+def test_write_files_privileged_without_sudo(tmp_path):
+    files: dict = _files(tmp_path)
+    files[str(tmp_path / "missing" / "file")] = b"no folder"
+    files[str(tmp_path / "line\nfeed")] = b"not allowed"
+
+    results: dict = write_files_privileged(files=files)
+
+    assert results.pop(str(tmp_path / "missing" / "file")) is False
+    assert results.pop(str(tmp_path / "line\nfeed")) is False
+    assert all(results.values())
+    _assert_written({path: files[path] for path in results})
+    assert _leftovers(tmp_path) == []
+
+
+def test_write_files_privileged_keeps_and_sets_the_mode(tmp_path):
+    existing = tmp_path / "existing"
+    existing.write_bytes(b"old")
+    existing.chmod(0o600)
+
+    assert write_files_privileged(files={str(existing): b"new", str(tmp_path / "new"): b"new"}) == \
+        {str(existing): True, str(tmp_path / "new"): True}
+    assert stat.S_IMODE(existing.stat().st_mode) == 0o600
+    assert stat.S_IMODE((tmp_path / "new").stat().st_mode) == 0o644
+
+    assert write_files_privileged(files={str(existing): b"newer"}, mode=0o640) == {str(existing): True}
+    assert stat.S_IMODE(existing.stat().st_mode) == 0o640
+
+
+def test_write_files_privileged_with_sudo(tmp_path, fake_sudo):
+    files: dict = _files(tmp_path)
+
+    assert write_files_privileged(files=files, sudo_password="secret") == dict.fromkeys(files, True)
+    _assert_written(files)
+
+
+def test_write_files_privileged_with_a_wrong_password(tmp_path, fake_sudo):
+    path: str = str(tmp_path / "file")
+
+    assert write_files_privileged(files={path: b"data"}, sudo_password="wrong") == {path: False}
+    assert not os.path.exists(path)
+
+
+def test_write_files_privileged_skips_unchanged_files(tmp_path, fake_sudo):
+    same = tmp_path / "same"
+    same.write_bytes(b"same")
+    inode: int = same.stat().st_ino
+    changed = tmp_path / "changed"
+
+    assert write_files_privileged(files={str(same): b"same", str(changed): b"changed"}, sudo_password="secret",
+                                  skip_unchanged=True) == {str(same): True, str(changed): True}
+    assert same.stat().st_ino == inode
+    assert changed.read_bytes() == b"changed"
+
+
+def test_write_files_more_files_than_the_open_file_limit(tmp_path):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    files: dict = {str(tmp_path / f"file{i}"): f"{i}\n".encode() for i in range(300)}
+
+    resource.setrlimit(resource.RLIMIT_NOFILE, (128, hard))
+    try:
+        results: dict = write_files(files=files)
+
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    assert results == dict.fromkeys(files, True)
+    _assert_written(files)
@@ -0,0 +1,287 @@
+import atexit
+import contextlib
+import os
+import subprocess
+import threading
+
+
+class LocalTransport:
+
+    """
+    class LocalTransport executes commands on this host. it is the default transport.
+    """
+
+    remote: bool = False
+
+    def __init__(self) -> None:
+        self.name: str = "local"
+
+    def wrap(self, command_str: str | list, shell: bool) -> tuple:
+
+        """
+        return the arguments for subprocess which execute the command built by build_command().
+
+        :param command_str: command string, or list of arguments when the command is executed without shell.
+        :param shell: 'shell' option of the command.
+        :return: tuple of (command string or list of arguments, shell)
+        """
+
+        return command_str, shell
+
+    def close(self) -> None:
+        return None
+
+    def __repr__(self) -> str:
+        return "LocalTransport()"
+
+
+class SSHTransport:
+
+    """
+    class SSHTransport executes commands on a remote host with the 'ssh' client of OpenSSH.
+    the first command opens a master connection (ControlMaster=auto) and the following commands are multiplexed
+    over it, so only the first one pays for the TCP connection, key exchange and authentication.
+    the master connection stays alive for 'control_persist' seconds after the last command.
+
+    the command is given to the remote login shell as it is, so a command built with sudo_password
+    ('echo pw | sudo -S ...') runs sudo on the remote host.
+    when a command times out, the local ssh client is killed and the channel to the remote command is closed.
+    """
+
+    remote: bool = True
+
+    def __init__(self,
+                 host: str,
+                 user: str = None,
+                 port: int = None,
+                 identity_file: str = None,
+                 control_dir: str = None,
+                 control_persist: int = 60,
+                 connect_timeout: int = 10,
+                 options: dict = None,
+                 ssh_path: str = "ssh") -> None:
+
+        """
+        :param host: host name or address of the remote host.
+        :param user: login user. default is the user of ~/.ssh/config or the local user.
+        :param port: ssh port. default is the port of ~/.ssh/config or 22.
+        :param identity_file: private key file.
+        :param control_dir: directory of the control sockets. default is the temporary directory.
+        :param control_persist: seconds the master connection stays alive after the last command.
+        :param connect_timeout: seconds to wait for the connection.
+        :param options: other ssh options, e.g. {"StrictHostKeyChecking": "accept-new"}
+        :param ssh_path: path of the ssh client.
+        """
+
+        self.host: str = host
+        self.user: str | None = user
+        self.port: int | None = port
+        self.identity_file: str | None = identity_file
+        self.control_dir: str | None = control_dir
+        self.control_persist: int = control_persist
+        self.connect_timeout: int = connect_timeout
+        self.options: dict = options or {}
+        self.ssh_path: str = ssh_path
+        self.name: str = host if user is None else f"{user}@{host}"
+        self._args: list | None = None
+
+    def ssh_args(self) -> list:
+
+        """
+        return the arguments of the ssh client without the remote command.
+
+        :return: list of arguments.
+        """
+
+        if self._args is not None:
+            return self._args
+
+        control_dir: str = self.control_dir
+        if control_dir is None:
+            import tempfile
+
+            control_dir = tempfile.gettempdir()
+
+        args: list = [self.ssh_path,
+                      "-o", "BatchMode=yes",
+                      "-o", "ControlMaster=auto",
+                      "-o", f"ControlPath={os.path.join(control_dir, 'linux_cmd-%C')}",
+                      "-o", f"ControlPersist={self.control_persist}",
+                      "-o", f"ConnectTimeout={self.connect_timeout}"]
+
+        for key, value in self.options.items():
+            args += ["-o", f"{key}={value}"]
+
+        if self.user is not None:
+            args += ["-l", self.user]
+
+        if self.port is not None:
+            args += ["-p", str(self.port)]
+
+        if self.identity_file is not None:
+            args += ["-i", os.path.expanduser(self.identity_file)]
+
+        self._args = args + [self.host]
+        return self._args
+
+    def wrap(self, command_str: str | list, shell: bool) -> tuple:
+
+        """
+        return the arguments for subprocess which execute the command built by build_command() on the remote host.
+
+        :param command_str: command string, or list of arguments when the command is executed without shell.
+        :param shell: 'shell' option of the command.
+        :return: tuple of (list of arguments of ssh, False)
+        """
+
+        if isinstance(command_str, list):
+            import shlex
+
+            command_str = shlex.join(command_str)
+
+        return self.ssh_args() + ["--", command_str], False
+
+    def check(self) -> bool:
+
+        """
+        return bool whether the remote host accepts commands or not. the master connection is opened by this call.
+
+        :return: bool whether the remote host is reachable or not.
+        """
+
+        try:
+            cp = subprocess.run(args=self.ssh_args() + ["--", "true"],
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL,
+                                timeout=self.connect_timeout + 5)
+
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+
+        return cp.returncode == 0
+
+    def close(self) -> None:
+
+        """
+        stop the master connection.
+
+        :return: None
+        """
+
+        if self._args is None:
+            return None
+
+        args: list = self.ssh_args()
+        try:
+            subprocess.run(args=args[:-1] + ["-O", "exit", args[-1]],
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL,
+                           timeout=5)
+
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+        return None
+
+    def __repr__(self) -> str:
+        return f"SSHTransport(host={self.host!r}, user={self.user!r}, port={self.port!r})"
+
+
+_default = LocalTransport()
+_local = threading.local()
+_transports: dict = {}
+_lock = threading.Lock()
+
+
+def get_transport():
+
+    """
+    return the transport of the current thread.
+
+    :return: transport bound with use_transport(), or the default transport.
+    """
+
+    transport = getattr(_local, "transport", None)
+    return transport if transport is not None else _default
+
+
+def set_default_transport(transport=None) -> None:
+
+    """
+    set the transport used by threads which are not in a 'with use_transport()' block.
+
+    :param transport: transport object. None means LocalTransport.
+    :return: None
+    """
+
+    global _default
+
+    _default = transport if transport is not None else LocalTransport()
+    return None
+
+
+@contextlib.contextmanager
+def use_transport(transport):
+
+    """
+    execute all commands of the current thread with transport while the 'with' block is executed.
+
+    e.g.
+        with use_transport(ssh_transport("web1")):
+            Service.restart(service="nginx", sudo_password=pw)
+
+    :param transport: transport object such as SSHTransport.
+    """
+
+    previous = getattr(_local, "transport", None)
+    _local.transport = transport
+
+    try:
+        yield transport
+
+    finally:
+        _local.transport = previous
+
+
+def ssh_transport(host: str, user: str = None, port: int = None, **options) -> SSHTransport:
+
+    """
+    return the pooled SSHTransport of the host. the same object is returned for the same host, user and port,
+    so all threads share one master connection per host.
+
+    :param host: host name or address of the remote host.
+    :param user: login user.
+    :param port: ssh port.
+    :param options: other arguments of SSHTransport. they are used only when the transport is created.
+    :return: SSHTransport.
+    """
+
+    key: tuple = (host, user, port)
+    with _lock:
+        transport = _transports.get(key)
+        if transport is None:
+            transport = SSHTransport(host=host, user=user, port=port, **options)
+            _transports[key] = transport
+
+    return transport
+
+
+def close_transports() -> None:
+
+    """
+    stop the master connections of all pooled transports.
+
+    :return: None
+    """
+
+    with _lock:
+        transports: list = list(_transports.values())
+        _transports.clear()
+
+    for transport in transports:
+        transport.close()
+
+    return None
+
+
+atexit.register(close_transports)
@@ -1,4 +1,5 @@
-from ..ubuntu import *
+from .. import execute_command_run
+from ..cache import cached, invalidates
 from ..ubuntu.dpkg import Dpkg
 
 
@@ -11,6 +12,7 @@ class Apt:
     """
 
     @staticmethod
+    @invalidates("package")
     def auto_remove(package: str, sudo_password: str = None) -> bool:
 
         """
@@ -31,6 +33,7 @@ class Apt:
         return False
 
     @staticmethod
+    @invalidates("package")
     def install(package: str, sudo_password: str = None) -> bool:
 
         """
@@ -50,6 +53,7 @@ class Apt:
         return False
 
     @staticmethod
+    @cached("package", ttl=30.0)
     def is_installed(package: str, sudo_password: str = None) -> bool:
 
         """
@@ -63,6 +67,20 @@ class Apt:
         return Dpkg.is_installed(package_name=package, sudo_password=sudo_password)
 
     @staticmethod
+    def iter_installed(limit: int = None, sudo_password: str = None):
+
+        """
+        yield installed deb packages as they arrive.
+
+        :param limit: stop after 'limit' packages. default is no limit.
+        :param sudo_password: if you need sudo, set sudo password.
+        :return: generator of tuple (package name, version).
+        """
+
+        yield from Dpkg.iter_installed(limit=limit, sudo_password=sudo_password)
+
+    @staticmethod
+    @invalidates("package")
     def uninstall(package: str, sudo_password: str = None) -> bool:
 
         """
@@ -83,6 +101,7 @@ class Apt:
         return False
 
     @staticmethod
+    @invalidates("package")
     def update(sudo_password: str = None) -> bool:
 
         """
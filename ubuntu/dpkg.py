@@ -1,4 +1,5 @@
-from ..ubuntu import *
+from .. import ENCODING, execute_command_run, execute_command_stream
+from ..cache import cached, invalidates
 
 
 class Dpkg:
@@ -29,6 +30,7 @@ class Dpkg:
         return None
 
     @staticmethod
+    @invalidates("package")
     def install(package_path: str, sudo_password: str = None) -> bool:
 
         """
@@ -48,6 +50,7 @@ class Dpkg:
         return False
 
     @staticmethod
+    @cached("package", ttl=30.0)
     def is_installed(package_name: str, sudo_password: str = None) -> bool:
 
         """
@@ -67,6 +70,25 @@ class Dpkg:
         return False
 
     @staticmethod
+    def iter_installed(limit: int = None, sudo_password: str = None):
+
+        """
+        yield installed deb packages as they arrive, without buffering the whole list of 'dpkg-query'.
+
+        :param limit: stop after 'limit' packages. default is no limit.
+        :param sudo_password: if you need sudo, set sudo password.
+        :return: generator of tuple (package name, version).
+        """
+
+        # default format of 'dpkg-query --show' is '${binary:Package}\t${Version}\n'
+        command_str: str = "dpkg-query --show"
+        yield from execute_command_stream(command_str=command_str,
+                                          sudo_password=sudo_password,
+                                          parser=lambda a: tuple(a.split("\t")) if "\t" in a else None,
+                                          limit=limit)
+
+    @staticmethod
+    @invalidates("package")
     def uninstall(package_name: str, sudo_password: str = None) -> bool:
 
         """
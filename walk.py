@@ -0,0 +1,320 @@
+import fnmatch
+import os
+import queue
+import re
+import threading
+
+
+DEFAULT_WORKERS: int = min(8, (os.cpu_count() or 1) * 2)
+
+# directories which are not searched by default. their contents are generated by the kernel,
+# and reading them is slow and fails in many places.
+DEFAULT_PRUNE: tuple = ("/proc", "/sys", "/dev")
+
+# paths handed over from a worker to the caller at once.
+_BATCH_SIZE: int = 256
+
+
+def _compile_globs(patterns) -> tuple:
+
+    """
+    compile glob patterns into two regular expressions, one for names and one for full paths.
+    a pattern with '/' is matched with the full path, e.g. '/proc', and the others with the name, e.g. '*.log'.
+    """
+
+    if isinstance(patterns, str):
+        patterns = [patterns]
+
+    names: list = [fnmatch.translate(pattern) for pattern in patterns or () if "/" not in pattern]
+    paths: list = [fnmatch.translate(pattern.rstrip("/") or "/") for pattern in patterns or () if "/" in pattern]
+
+    return (re.compile("|".join(names)).match if names else None,
+            re.compile("|".join(paths)).match if paths else None)
+
+
+def _is_matched(globs: tuple, name: str, path: str) -> bool:
+    match_name, match_path = globs
+    return (match_name is not None and match_name(name) is not None) or \
+        (match_path is not None and match_path(path) is not None)
+
+
+class Walker:
+
+    """
+    class Walker searches a directory tree with os.scandir() in worker threads, one directory per task,
+    so subtrees are read in parallel. matches are yielded as they are found, and the workers stop as soon as
+    the iteration stops.
+    the order of the results is not defined, like 'find'.
+    """
+
+    def __init__(self,
+                 path: str,
+                 name: str = None,
+                 regex: str = None,
+                 file_type: str = None,
+                 exclude=None,
+                 prune=DEFAULT_PRUNE,
+                 max_depth: int = None,
+                 xdev: bool = False,
+                 follow_symlinks: bool = False,
+                 workers: int = DEFAULT_WORKERS) -> None:
+
+        """
+        :param path: root of the search.
+        :param name: glob pattern of the name, same as 'find -name'.
+        :param regex: regular expression searched in the full path.
+        :param file_type: 'file', 'directory' or 'link'. None means all types.
+        :param exclude: glob patterns of names or paths which are neither yielded nor searched.
+        :param prune: glob patterns of names or paths of directories which are not searched. they can be yielded.
+                      default is DEFAULT_PRUNE. set an empty list to search everything.
+        :param max_depth: depth limit. entries in 'path' have depth 1, same as 'find -maxdepth'.
+        :param xdev: do not search directories on other filesystems, same as 'find -xdev'.
+        :param follow_symlinks: search symlinks to directories. each directory is searched once,
+                                so a symlink cycle is not followed again.
+        :param workers: number of threads which read directories.
+        """
+
+        self.path: str = path
+        self.file_type: str | None = file_type
+        self.max_depth: int | None = max_depth
+        self.xdev: bool = xdev
+        self.follow_symlinks: bool = follow_symlinks
+        self.workers: int = max(1, workers)
+        self._match_name = re.compile(fnmatch.translate(name)).match if name is not None else None
+        self._search_path = re.compile(regex).search if regex is not None else None
+        self._exclude: tuple = _compile_globs(exclude)
+        self._prune: tuple = _compile_globs(prune)
+        self._device: int | None = None
+        # (st_dev, st_ino) of the directories already searched, to stop at symlink cycles with follow_symlinks.
+        self._visited: set = set()
+        self._visited_lock = threading.Lock()
+
+    def __iter__(self):
+        return self.iter(limit=None)
+
+    def iter(self, limit: int = None):
+
+        """
+        yield the matched paths. an error in a worker thread is raised here, instead of being lost.
+
+        :param limit: stop after 'limit' paths. default is no limit.
+        :return: generator of paths.
+        """
+
+        if limit is not None and limit <= 0:
+            return
+
+        try:
+            root_stat: os.stat_result = os.stat(self.path)
+
+        except OSError:
+            return
+
+        self._device = root_stat.st_dev
+        self._visited = {(root_stat.st_dev, root_stat.st_ino)}
+        count: int = 0
+
+        root_name: str = os.path.basename(self.path.rstrip("/")) or self.path
+        if _is_matched(globs=self._exclude, name=root_name, path=self.path.rstrip("/") or "/"):
+            return
+
+        if self._is_wanted(name=root_name, path=self.path,
+                           path_type="directory" if os.path.isdir(self.path) else "file"):
+            yield self.path
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+        if not os.path.isdir(self.path) or self.max_depth == 0:
+            return
+
+        directories: queue.SimpleQueue = queue.SimpleQueue()
+        results: queue.Queue = queue.Queue(maxsize=self.workers * 4)
+        stop: threading.Event = threading.Event()
+        lock: threading.Lock = threading.Lock()
+        pending: list = [1]
+
+        def work() -> None:
+            while not stop.is_set():
+                item = directories.get()
+                if item is None:
+                    return
+
+                directory, depth = item
+                try:
+                    found, subdirectories = self._scan(directory=directory, depth=depth)
+
+                    with lock:
+                        pending[0] += len(subdirectories)
+
+                    for subdirectory in subdirectories:
+                        directories.put((subdirectory, depth + 1))
+
+                    for i in range(0, len(found), _BATCH_SIZE):
+                        if not self._put(results=results, item=found[i:i + _BATCH_SIZE], stop=stop):
+                            return
+
+                except BaseException as e:
+                    self._put(results=results, item=e, stop=stop)
+                    return
+
+                finally:
+                    # the directory is counted as done after its paths are handed over,
+                    # so the end of the search is never announced before them, even when this worker fails.
+                    with lock:
+                        pending[0] -= 1
+                        finished: bool = pending[0] == 0
+
+                    if finished:
+                        self._put(results=results, item=None, stop=stop)
+
+                if finished:
+                    return
+
+        directories.put((self.path, 1))
+        threads: list = [threading.Thread(target=work, name="linux_cmd_walk", daemon=True)
+                         for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                batch: list | BaseException | None = results.get()
+                if batch is None:
+                    return
+
+                if isinstance(batch, BaseException):
+                    raise batch
+
+                for path in batch:
+                    yield path
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+
+        finally:
+            stop.set()
+            for _ in threads:
+                directories.put(None)
+
+    def _put(self, results: queue.Queue, item, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+
+            except queue.Full:
+                continue
+
+        return False
+
+    def _scan(self, directory: str, depth: int) -> tuple:
+
+        """
+        read one directory.
+
+        :return: tuple of (list of matched paths, list of subdirectories to search)
+        """
+
+        found: list = []
+        subdirectories: list = []
+        descend: bool = self.max_depth is None or depth < self.max_depth
+
+        try:
+            entries = os.scandir(directory)
+
+        except OSError:
+            return found, subdirectories
+
+        # reading the entries can fail as well, e.g. in /proc while a process exits.
+        # the entries read until then are kept.
+        try:
+            with entries:
+                for entry in entries:
+                    name: str = entry.name
+                    path: str = entry.path
+                    if _is_matched(globs=self._exclude, name=name, path=path):
+                        continue
+
+                    try:
+                        if entry.is_symlink():
+                            path_type: str = "link"
+                            is_directory: bool = self.follow_symlinks and entry.is_dir()
+                        elif entry.is_dir(follow_symlinks=False):
+                            path_type = "directory"
+                            is_directory = True
+                        else:
+                            path_type = "file" if entry.is_file(follow_symlinks=False) else "other"
+                            is_directory = False
+
+                    except OSError:
+                        continue
+
+                    if self._is_wanted(name=name, path=path, path_type=path_type):
+                        found.append(path)
+
+                    if not is_directory or not descend or _is_matched(globs=self._prune, name=name, path=path):
+                        continue
+
+                    if self.xdev or self.follow_symlinks:
+                        try:
+                            entry_stat: os.stat_result = entry.stat(follow_symlinks=self.follow_symlinks)
+
+                        except OSError:
+                            continue
+
+                        if self.xdev and entry_stat.st_dev != self._device:
+                            continue
+
+                        if self.follow_symlinks and not self._visit(entry_stat=entry_stat):
+                            continue
+
+                    subdirectories.append(path)
+
+        except OSError:
+            pass
+
+        return found, subdirectories
+
+    def _visit(self, entry_stat: os.stat_result) -> bool:
+
+        """
+        :return: bool whether the directory is seen for the first time or not.
+        """
+
+        key: tuple = (entry_stat.st_dev, entry_stat.st_ino)
+        with self._visited_lock:
+            if key in self._visited:
+                return False
+
+            self._visited.add(key)
+            return True
+
+    def _is_wanted(self, name: str, path: str, path_type: str) -> bool:
+        if self.file_type is not None and path_type != self.file_type:
+            return False
+
+        if self._match_name is not None and self._match_name(name) is None:
+            return False
+
+        if self._search_path is not None and self._search_path(path) is None:
+            return False
+
+        return True
+
+
+def walk(path: str, limit: int = None, **options):
+
+    """
+    search a directory tree in parallel and yield the matched paths. see Walker for the options.
+
+    e.g.
+        for path in walk("/var", name="*.log", prune=["/var/lib/docker"], max_depth=4, limit=100):
+            ...
+
+    :param path: root of the search.
+    :param limit: stop after 'limit' paths. default is no limit.
+    :return: generator of paths.
+    """
+
+    yield from Walker(path=path, **options).iter(limit=limit)
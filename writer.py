@@ -0,0 +1,332 @@
+import hashlib
+import os
+import secrets
+import shlex
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from . import ENCODING, execute_command_popen, execute_command_run
+from .deadline import effective_timeout, kill_process_group
+
+
+# threads which fsync the temporary files of write_files() at once, so the journal commits them together.
+SYNC_WORKERS: int = 8
+
+# shell script which writes the files sent on stdin, for sudo or remote hosts. the arguments are the marker line
+# and the mode of new files. each file comes as three lines (size, mode or '-', path) and 'size' bytes of contents.
+# all files are written into temporary files first, then synced at once, and then renamed over the targets,
+# so a reader sees either the old or the new contents. the result of each file is printed as 'ok' or 'fail'.
+_WRITE_SCRIPT: str = r"""
+while IFS= read -r line && [ "$line" != "$1" ]; do :; done
+list=$(mktemp) || exit 1
+trap 'rm -f -- "$list"' EXIT
+while IFS= read -r size && IFS= read -r mode && IFS= read -r path; do
+    target=$(readlink -f -- "$path" 2>/dev/null) && [ -n "$target" ] || target=$path
+    temp=$(mktemp -- "$(dirname -- "$target")/.linux_cmd.XXXXXX" 2>/dev/null) || temp=
+    if [ -z "$temp" ]; then
+        dd of=/dev/null bs=65536 iflag=fullblock,count_bytes count="$size" status=none || break
+        printf '%s\n%s\n' - "$target" >> "$list"
+        continue
+    fi
+    if ! dd of="$temp" bs=65536 iflag=fullblock,count_bytes count="$size" status=none; then
+        rm -f -- "$temp"
+        break
+    fi
+    if [ "$mode" != - ]; then
+        chmod "$mode" -- "$temp"
+    elif [ -e "$target" ]; then
+        chown --reference="$target" -- "$temp" 2>/dev/null
+        chmod --reference="$target" -- "$temp"
+    else
+        chmod "$2" -- "$temp"
+    fi
+    printf '%s\n%s\n' "$temp" "$target" >> "$list"
+done
+sync
+while IFS= read -r temp && IFS= read -r target; do
+    if [ "$temp" != - ] && mv -f -- "$temp" "$target"; then
+        echo ok
+    else
+        [ "$temp" = - ] || rm -f -- "$temp"
+        echo fail
+    fi
+done < "$list"
+"""
+
+
+def file_digest(path: str) -> str | None:
+
+    """
+    return sha256 of the file contents. the file is read in chunks.
+
+    :param path: file path.
+    :return: hex digest, or None if the file cannot be read.
+    """
+
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb", buffering=0) as file:
+            while True:
+                chunk: bytes = file.read(1 << 20)
+                if chunk == b"":
+                    break
+                digest.update(chunk)
+
+    except OSError:
+        return None
+
+    return digest.hexdigest()
+
+
+def is_unchanged(path: str, data: bytes) -> bool:
+
+    """
+    return bool whether the file already has the data or not.
+    the sizes are compared first, so a changed file is usually detected without reading it.
+
+    :param path: file path.
+    :param data: new contents.
+    :return: bool whether the contents are the same or not.
+    """
+
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+
+    except OSError:
+        return False
+
+    return file_digest(path=path) == hashlib.sha256(data).hexdigest()
+
+
+def write_files(files: dict, mode: int = None, fsync: bool = True, skip_unchanged: bool = False) -> dict:
+
+    """
+    write many files atomically. each file is written into a temporary file in the same directory,
+    synced and renamed over the target, so a reader never sees a half-written file.
+    the owner and the mode of an existing file are kept, and a symlink is written through, as 'echo > path' does.
+
+    the fsyncs are batched: the temporary files are synced in parallel, so the filesystem journal commits them
+    together, and each directory is synced once after all renames. a temporary file is closed after it is written
+    and opened again to be synced, so any number of files can be written within the limit of open files.
+
+    :param files: dict of {path: bytes}
+    :param mode: mode of the files, e.g. 0o600. default keeps the mode of an existing file, or follows umask.
+    :param fsync: sync the files and directories before returning. without it the write is atomic but not durable.
+    :param skip_unchanged: do not write a file which already has the contents.
+    :return: dict of {path: bool whether the file has the contents}
+    """
+
+    results: dict = {}
+    pending: list = []
+
+    for path, data in files.items():
+        target: str = os.path.realpath(path)
+        if skip_unchanged and is_unchanged(path=target, data=data):
+            results[path] = True
+            continue
+
+        temp_path: str = os.path.join(os.path.dirname(target),
+                                      f".{os.path.basename(target)}.{secrets.token_hex(4)}.tmp")
+        try:
+            fd: int = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_CLOEXEC, 0o666)
+
+        except OSError:
+            results[path] = False
+            continue
+
+        try:
+            _write_all(fd=fd, data=data)
+            _copy_attributes(fd=fd, target=target, mode=mode)
+
+        except OSError:
+            _unlink(path=temp_path)
+            results[path] = False
+            continue
+
+        finally:
+            os.close(fd)
+
+        pending.append((path, target, temp_path))
+
+    if fsync and pending:
+        with ThreadPoolExecutor(max_workers=min(SYNC_WORKERS, len(pending))) as executor:
+            synced: list = list(executor.map(_fsync, [temp_path for _, _, temp_path in pending]))
+    else:
+        synced = [True] * len(pending)
+
+    directories: set = set()
+    for (path, target, temp_path), ok in zip(pending, synced):
+        try:
+            if not ok:
+                raise OSError
+
+            os.replace(temp_path, target)
+
+        except OSError:
+            _unlink(path=temp_path)
+            results[path] = False
+            continue
+
+        directories.add(os.path.dirname(target))
+        results[path] = True
+
+    if fsync:
+        for directory in directories:
+            _fsync_directory(path=directory)
+
+    return results
+
+
+def write_files_privileged(files: dict, sudo_password: str = None, mode: int = None, skip_unchanged: bool = False,
+                           timeout: float = None) -> dict:
+
+    """
+    write many files atomically with sudo, or on the remote host of the current transport, in one command.
+    the contents are streamed over stdin of the command, never in its arguments, so any bytes of any size can be
+    written. the sudo password is given on stdin as well.
+
+    :param files: dict of {path: bytes}. a path must not contain a line feed.
+    :param sudo_password: if you need sudo, set the sudo password.
+    :param mode: mode of the files, e.g. 0o600. default keeps the mode of an existing file, or 0644 for a new one.
+    :param skip_unchanged: compare the sha256 of the files first and send only the changed ones.
+    :param timeout: seconds until the command is killed. default is no limit except the current deadline.
+    :return: dict of {path: bool whether the file has the contents}
+    """
+
+    results: dict = {path: False for path in files if "\n" in path}
+    files = {path: data for path, data in files.items() if path not in results}
+
+    if skip_unchanged and files:
+        digests: dict = _remote_digests(paths=list(files), sudo_password=sudo_password)
+        for path, data in list(files.items()):
+            if digests.get(path) == hashlib.sha256(data).hexdigest():
+                results[path] = True
+                del files[path]
+
+    if not files:
+        return results
+
+    timeout = effective_timeout(timeout)
+    if timeout is not None and timeout <= 0:
+        results.update({path: False for path in files})
+        return results
+
+    marker: str = secrets.token_hex(16)
+    script: str = f"sh -c {shlex.quote(_WRITE_SCRIPT)} sh {marker} 644"
+    header: bytes = b""
+    if sudo_password is not None:
+        # sudo reads the password from stdin one byte at a time, so the rest of stdin is left for the script.
+        # -k makes sudo always ask the password, and the script skips lines until the marker
+        # in case sudo did not read it because of NOPASSWD.
+        script = f"sudo -S -k -p '' {script}"
+        header = f"{sudo_password}\n".encode(ENCODING)
+
+    chunks: list = [header, f"{marker}\n".encode(ENCODING)]
+    for path, data in files.items():
+        chunks.append(f"{len(data)}\n{'-' if mode is None else format(mode, 'o')}\n{path}\n".encode(ENCODING))
+        chunks.append(data)
+
+    process = execute_command_popen(command_str=script,
+                                    stdin=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL,
+                                    shell=True,
+                                    new_session=True)
+    try:
+        stdout, _ = process.communicate(input=b"".join(chunks), timeout=timeout)
+
+    except subprocess.TimeoutExpired:
+        kill_process_group(pid=process.pid)
+        process.communicate()
+        stdout = b""
+
+    lines: list = stdout.decode(ENCODING, errors="replace").split("\n")
+    for index, path in enumerate(files):
+        results[path] = index < len(lines) and lines[index] == "ok"
+
+    return results
+
+
+def _remote_digests(paths: list, sudo_password: str = None) -> dict:
+    command_str: str = "sha256sum -- " + " ".join(shlex.quote(path) for path in paths)
+    cp = execute_command_run(command_str=command_str, sudo_password=sudo_password, shell=True)
+
+    digests: dict = {}
+    for line in cp.stdout.decode(ENCODING, errors="replace").split("\n"):
+        # a name with special characters is escaped by sha256sum and starts with a backslash.
+        digest, _, path = line.partition("  ")
+        if path and not digest.startswith("\\"):
+            digests[path] = digest
+
+    return digests
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view: memoryview = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _copy_attributes(fd: int, target: str, mode: int | None) -> None:
+    try:
+        current: os.stat_result | None = os.stat(target)
+
+    except OSError:
+        current = None
+
+    # chown() clears the setuid and setgid bits, so the mode is set after it.
+    if current is not None:
+        try:
+            os.fchown(fd, current.st_uid, current.st_gid)
+
+        except PermissionError:
+            pass
+
+    if mode is not None:
+        os.fchmod(fd, mode)
+
+    elif current is not None:
+        os.fchmod(fd, current.st_mode & 0o7777)
+
+
+def _fsync(path: str) -> bool:
+    try:
+        fd: int = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+
+    except OSError:
+        return False
+
+    try:
+        os.fsync(fd)
+
+    except OSError:
+        return False
+
+    finally:
+        os.close(fd)
+
+    return True
+
+
+def _fsync_directory(path: str) -> None:
+    try:
+        fd: int = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+
+    except OSError:
+        return None
+
+    try:
+        os.fsync(fd)
+
+    except OSError:
+        pass
+
+    finally:
+        os.close(fd)
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+
+    except OSError:
+        pass